@@ -0,0 +1,91 @@
+import heapq
+import logging
+import itertools
+from PyQt5.QtCore import Qt, QObject, QTimer, QElapsedTimer
+
+
+class AnimationClock(QObject):
+    # One monotonic clock and one timer for every animation in the process.
+    # Frame players and idle bobbing schedule callbacks on it instead of
+    # owning timers, so N characters cost one wakeup per due moment and
+    # callbacks that fall due together run in the same tick.
+    COALESCE_MS = 2
+
+    _instance = None
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._elapsed = QElapsedTimer()
+        self._elapsed.start()
+        self._queue = []
+        self._entries = {}
+        self._ids = itertools.count(1)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._tick)
+        self._timer_due = None
+        self.ticks = 0
+
+    @classmethod
+    def instance(cls) -> 'AnimationClock':
+        if cls._instance is None:
+            cls._instance = AnimationClock()
+        return cls._instance
+
+    def now(self) -> int:
+        return self._elapsed.elapsed()
+
+    def call_at(self, due: int, callback) -> int:
+        handle = next(self._ids)
+        entry = [int(due), handle, callback]
+        self._entries[handle] = entry
+        heapq.heappush(self._queue, entry)
+        self._arm()
+        return handle
+
+    def call_later(self, delay_ms: int, callback) -> int:
+        return self.call_at(self.now() + max(0, int(delay_ms)), callback)
+
+    def cancel(self, handle) -> None:
+        entry = self._entries.pop(handle, None)
+        if entry is not None:
+            # Dropped lazily when it reaches the front of the queue
+            entry[2] = None
+
+    def pending(self) -> int:
+        return len(self._entries)
+
+    def _arm(self):
+        while self._queue and self._queue[0][2] is None:
+            heapq.heappop(self._queue)
+        if not self._queue:
+            self._timer.stop()
+            self._timer_due = None
+            return
+        due = self._queue[0][0]
+        if self._timer_due is not None and self._timer.isActive() and self._timer_due <= due:
+            return
+        self._timer_due = due
+        self._timer.start(max(0, due - self.now()))
+
+    def _tick(self):
+        self._timer_due = None
+        self.ticks += 1
+        limit = self.now() + self.COALESCE_MS
+        due = []
+        while self._queue and self._queue[0][0] <= limit:
+            entry = heapq.heappop(self._queue)
+            if entry[2] is not None:
+                due.append(entry)
+        for entry in due:
+            # An earlier callback in this tick may have cancelled this one
+            callback = entry[2]
+            if callback is None:
+                continue
+            self._entries.pop(entry[1], None)
+            try:
+                callback()
+            except Exception:
+                logging.exception('Animation callback failed')
+        self._arm()
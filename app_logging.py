@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(message)s'
+LOG_MAX_BYTES = 2 * 1024 * 1024
+LOG_BACKUPS = 5
+EVENTS_MAX_BYTES = 4 * 1024 * 1024
+EVENTS_BACKUPS = 3
+
+# Set by configure(); event() is a no-op until then
+_events = None
+_listeners = []
+
+
+def _next_midnight(t: float) -> float:
+    lt = time.localtime(t)
+    return time.mktime((lt.tm_year, lt.tm_mon, lt.tm_mday + 1, 0, 0, 0, 0, 0, -1))
+
+
+class RotatingLogHandler(logging.handlers.RotatingFileHandler):
+    # Numbered backups (app.log.1 ... app.log.N) that roll over once the file
+    # passes max_bytes or on the first record of a new day, whichever comes
+    # first. Only used from a listener thread, never on the GUI thread.
+    def __init__(self, filename: str, max_bytes: int, backup_count: int):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        try:
+            # A file left from an earlier day rolls over on the first record
+            self._next_day = _next_midnight(os.path.getmtime(self.baseFilename))
+        except OSError:
+            self._next_day = _next_midnight(time.time())
+
+    def shouldRollover(self, record) -> bool:
+        if record.created >= self._next_day:
+            self._next_day = _next_midnight(record.created)
+            try:
+                if os.path.getsize(self.baseFilename) > 0:
+                    return True
+            except OSError:
+                pass
+        return bool(super().shouldRollover(record))
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # Like the stock handler, the message and any traceback are rendered on
+    # the calling thread, so arguments (possibly Qt objects) are never read
+    # after the caller moves on. It skips the stock handler's lock, the full
+    # copy.copy() and the formatting of a line that the listener formats
+    # again anyway. The caller's record is left untouched.
+    _exceptions = logging.Formatter()
+
+    def handle(self, record) -> bool:
+        try:
+            self.queue.put(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+        return True
+
+    def prepare(self, record):
+        prepared = logging.LogRecord.__new__(type(record))
+        prepared.__dict__.update(record.__dict__)
+        prepared.msg = record.getMessage()
+        prepared.args = None
+        if record.exc_info:
+            prepared.exc_text = record.exc_text or self._exceptions.formatException(record.exc_info)
+            prepared.exc_info = None
+        return prepared
+
+
+class _EventListener(logging.handlers.QueueListener):
+    # Turns queued (time, name, fields) tuples into JSON lines off the
+    # emitting thread
+    def prepare(self, item):
+        created, name, fields = item
+        entry = {'ts': round(created, 3), 'event': name}
+        entry.update(fields)
+        line = json.dumps(entry, default=str, separators=(',', ':'))
+        return logging.makeLogRecord({'name': 'events', 'msg': line, 'created': created})
+
+
+def event(name: str, **fields) -> None:
+    # Records one structured event (e.g. event('decode', ms=12.5, frames=24))
+    # to events.jsonl. Costs one queue put; formatting and file I/O happen on
+    # the writer thread. Safe from any thread.
+    q = _events
+    if q is not None:
+        q.put((time.time(), name, fields))
+
+
+def events_enabled() -> bool:
+    # For callers that would do extra work just to fill in event fields
+    return _events is not None
+
+
+def configure(log_dir: str, level: int = logging.INFO, events: bool = True, console: bool = True) -> None:
+    # Root logging goes through a QueueHandler, so logging.info() on the GUI
+    # thread only enqueues; a listener thread writes app.log (rotated) and
+    # stdout when there is one (a windowed PyInstaller build has none).
+    global _events
+    os.makedirs(log_dir, exist_ok=True)
+    file_handler = RotatingLogHandler(os.path.join(log_dir, 'app.log'), LOG_MAX_BYTES, LOG_BACKUPS)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    handlers = [file_handler]
+    if console and sys.stdout is not None and hasattr(sys.stdout, 'write'):
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers.append(stream)
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    # Creating the LogRecord (including the caller lookup for file/line,
+    # which LOG_FORMAT does not use) still happens on the calling thread;
+    # that is the logging module's own cost and is left as is, since the
+    # switches that skip it are process-wide.
+    root.addHandler(_QueueHandler(log_queue))
+    root.setLevel(level)
+    _start(logging.handlers.QueueListener(log_queue, *handlers))
+
+    if events:
+        events_handler = RotatingLogHandler(os.path.join(log_dir, 'events.jsonl'), EVENTS_MAX_BYTES, EVENTS_BACKUPS)
+        events_handler.setFormatter(logging.Formatter('%(message)s'))
+        events_queue = queue.SimpleQueue()
+        _start(_EventListener(events_queue, events_handler))
+        _events = events_queue
+
+
+def _start(listener) -> None:
+    if not _listeners:
+        atexit.register(shutdown)
+    listener.start()
+    _listeners.append(listener)
+
+
+def shutdown() -> None:
+    # Writes out whatever is still queued and closes the files
+    global _events
+    _events = None
+    while _listeners:
+        listener = _listeners.pop()
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
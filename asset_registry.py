@@ -0,0 +1,205 @@
+import os
+import logging
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
+from PyQt5.QtGui import QPixmap
+try:
+    from .frame_cache import ScaledFrameCache, HitMaskCache  # type: ignore
+    from .frame_store import FrameStore  # type: ignore
+    from .frame_decoder import FrameDecoder, ProgressiveAnimation  # type: ignore
+    from .frame_player import FramePlayer  # type: ignore
+    from . import power_policy  # type: ignore
+    from .settings_helper import SettingsHelper  # type: ignore
+except Exception:
+    from frame_cache import ScaledFrameCache, HitMaskCache  # type: ignore
+    from frame_store import FrameStore  # type: ignore
+    from frame_decoder import FrameDecoder, ProgressiveAnimation  # type: ignore
+    from frame_player import FramePlayer  # type: ignore
+    import power_policy  # type: ignore
+    from settings_helper import SettingsHelper  # type: ignore
+
+
+class AnimationAsset(QObject):
+    # One decoded animation shared by every window showing the same file:
+    # a single frame source, player and scaled-frame cache. Playback runs
+    # only while at least one consumer is visible, and follows the power
+    # policy (paused or down-clocked when nobody is looking). A file missing
+    # from the frame store starts empty and fills in while it decodes.
+    frameChanged = pyqtSignal(int)
+    loadFinished = pyqtSignal(bool)
+
+    def __init__(self, key: str, animation, parent=None):
+        super().__init__(parent)
+        self.key = key
+        self.animation = animation
+        self.cache = ScaledFrameCache()
+        self.masks = HitMaskCache()
+        self.player = FramePlayer(animation, self)
+        self.player.frameChanged.connect(self.frameChanged)
+        self._consumers = set()
+        self._visible = set()
+        self._decode_job = None
+        # User playback settings: 0 = no FPS cap; speed multiplies frame rate
+        self.max_fps = 0
+        self.speed = 1.0
+        self.policy = power_policy.PowerPolicy.instance()
+        self.policy.modeChanged.connect(self._update_playback)
+        self.player.set_paused(True)
+        self.player.start()
+        self._update_playback()
+
+    def consumer_count(self) -> int:
+        return len(self._consumers)
+
+    def is_valid(self) -> bool:
+        return self.player.is_valid()
+
+    def is_loading(self) -> bool:
+        return self._decode_job is not None
+
+    def load(self, store, path: str) -> None:
+        # Decode in the background; the player starts on the first frame
+        self._decode_job = FrameDecoder.instance().decode(
+            store, path, self._on_frame_decoded,
+            lambda ok: self._on_decode_finished(store, path, ok))
+
+    def _on_frame_decoded(self, index, image, delay):
+        self.animation.add_frame(image, delay)
+        self.player.source_updated()
+
+    def _on_decode_finished(self, store, path, ok):
+        self._decode_job = None
+        progressive = self.animation
+        stored = store.open(path) if ok else None
+        if stored is not None and stored.frame_count() == progressive.frame_count():
+            # Same pixels, now paged from the mapped store entry
+            self.animation = stored
+            progressive.close()
+            self.player.replace_source(stored)
+        else:
+            if stored is not None:
+                stored.close()
+            progressive.complete = True
+            self.player.source_updated()
+        if not self.is_valid():
+            logging.warning('Could not load animation: %s', path)
+        self.loadFinished.emit(self.is_valid())
+
+    def current_frame(self) -> int:
+        return self.player.current_frame()
+
+    def scaled_frame(self, index: int, size):
+        return self.cache.scaled(index, size, lambda: self.animation.frame_image(index))
+
+    def hit_region(self, index: int, size):
+        return self.masks.region(index, size, lambda: self.scaled_frame(index, size))
+
+    def discard_size(self, size) -> None:
+        self.cache.discard_size(size)
+        self.masks.discard_size(size)
+
+    def preview_frame(self, index: int, size):
+        # Cheap scale for transient sizes (e.g. mid-resize); not cached
+        return QPixmap.fromImage(self.animation.frame_image(index).scaled(size, Qt.IgnoreAspectRatio, Qt.FastTransformation))
+
+    def set_visible(self, consumer, visible: bool) -> None:
+        if consumer not in self._consumers:
+            return
+        if visible:
+            self._visible.add(consumer)
+        else:
+            self._visible.discard(consumer)
+        self._update_playback()
+
+    def set_playback(self, max_fps: int, speed: float) -> None:
+        self.max_fps = max(0, int(max_fps))
+        self.speed = float(speed)
+        self.player.set_speed(self.speed)
+        self._update_playback()
+
+    def _update_playback(self, *_):
+        mode = self.policy.mode
+        reduced = power_policy.PowerPolicy.REDUCED_FRAME_INTERVAL_MS if mode == power_policy.REDUCED else 0
+        capped = int(round(1000.0 / self.max_fps)) if self.max_fps else 0
+        self.player.set_min_frame_interval(max(reduced, capped))
+        self.player.set_paused(not self._visible or mode == power_policy.PAUSED)
+
+    def _attach(self, consumer):
+        self._consumers.add(consumer)
+
+    def _detach(self, consumer):
+        self._consumers.discard(consumer)
+        self._visible.discard(consumer)
+        self._update_playback()
+
+    def close(self):
+        if self._decode_job is not None:
+            # Released mid-decode (e.g. another file was picked)
+            FrameDecoder.instance().cancel(self._decode_job)
+            self._decode_job = None
+        self.policy.modeChanged.disconnect(self._update_playback)
+        self.player.stop()
+        self.player.set_source(None)
+        self.cache.clear()
+        self.masks.clear()
+        self.animation.close()
+
+
+class AssetRegistry(QObject):
+    # Process-wide, refcounted map of file path -> AnimationAsset
+    _instance = None
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.store = FrameStore()
+        self._assets = {}
+        settings = SettingsHelper()
+        self.max_fps = settings.get_max_fps()
+        self.speed = settings.get_playback_speed()
+
+    @classmethod
+    def instance(cls) -> 'AssetRegistry':
+        if cls._instance is None:
+            cls._instance = AssetRegistry()
+        return cls._instance
+
+    def acquire(self, path: str, consumer):
+        if not path or not os.path.exists(path):
+            return None
+        key = os.path.normcase(os.path.abspath(path))
+        asset = self._assets.get(key)
+        if asset is None:
+            animation = self.store.open(path)
+            if animation is not None:
+                asset = AnimationAsset(key, animation, self)
+            else:
+                # Only the header is read here; frames decode off the GUI thread
+                if not self.store.can_decode(path):
+                    logging.warning('Could not load animation: %s', path)
+                    return None
+                asset = AnimationAsset(key, ProgressiveAnimation(), self)
+                asset.load(self.store, path)
+            asset.set_playback(self.max_fps, self.speed)
+            self._assets[key] = asset
+        asset._attach(consumer)
+        return asset
+
+    def release(self, asset, consumer) -> None:
+        if asset is None:
+            return
+        asset._detach(consumer)
+        if asset.consumer_count() == 0 and self._assets.get(asset.key) is asset:
+            del self._assets[asset.key]
+            asset.close()
+            asset.deleteLater()
+
+    def set_playback(self, max_fps: int = None, speed: float = None) -> None:
+        # Applies to every animation; the setting is app-wide like size
+        if max_fps is not None:
+            self.max_fps = max(0, int(max_fps))
+        if speed is not None:
+            self.speed = float(speed)
+        for asset in self._assets.values():
+            asset.set_playback(self.max_fps, self.speed)
+
+    def active_assets(self):
+        return list(self._assets.values())
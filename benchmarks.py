@@ -0,0 +1,626 @@
+import os
+import sys
+import json
+import time
+import logging
+import struct
+import argparse
+import platform
+import tempfile
+import subprocess
+
+# Benchmarks run headless unless a platform is forced
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QEventLoop, QTimer, QSettings, QPoint, QPointF, Qt, QT_VERSION_STR, PYQT_VERSION_STR
+from PyQt5.QtGui import QWheelEvent
+
+try:
+    from .typing_renderer import TypingRenderer  # type: ignore
+    from .transcript_view import TranscriptView  # type: ignore
+    from .settings_helper import SettingsHelper, SettingsStore  # type: ignore
+    from . import settings_helper  # type: ignore
+    from . import app_logging  # type: ignore
+except Exception:
+    from typing_renderer import TypingRenderer  # type: ignore
+    from transcript_view import TranscriptView  # type: ignore
+    from settings_helper import SettingsHelper, SettingsStore  # type: ignore
+    import settings_helper  # type: ignore
+    import app_logging  # type: ignore
+
+
+BENCHMARKS = {}
+PRESETS = (160, 250, 360, 480)
+# Synthetic GIF matrix: (width/height, frame count)
+GIF_MATRIX = ((160, 12), (160, 48), (320, 12), (320, 48), (640, 12), (640, 48))
+QUICK_GIF_MATRIX = ((160, 12), (640, 12))
+
+# Scratch space for generated GIFs, frame store and settings; set by main()
+_workdir = None
+_quick = False
+_app = None
+
+
+def benchmark(name):
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+def _sample_reply(length: int) -> str:
+    words = 'the quick brown fox jumps over the lazy dog while the deskmate keeps typing'.split()
+    out = []
+    total = 0
+    i = 0
+    while total < length:
+        w = words[i % len(words)]
+        sep = '\n' if i % 23 == 22 else ' '
+        out.append(w + sep)
+        total += len(w) + 1
+        i += 1
+    return ''.join(out)[:length]
+
+
+def _wait_for(signal, timeout_ms: int) -> None:
+    loop = QEventLoop()
+    if signal is not None:
+        signal.connect(loop.quit)
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec_()
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000.0, 3)
+
+
+# --- Synthetic GIFs ---
+
+def write_gif(path: str, width: int, height: int, frames: int, delay_cs: int = 4) -> None:
+    # Animated GIF with a transparent background and a moving striped disc.
+    # Uses a 128-colour palette with 8-bit codes and a clear code every 120
+    # literals, so the LZW stream is plain bytes and needs no bit packing.
+    palette = bytearray(3)
+    for i in range(1, 128):
+        palette += bytes(((i * 37) % 256, (i * 91) % 256, (i * 53) % 256))
+    out = bytearray(b'GIF89a')
+    out += struct.pack('<HHBBB', width, height, 0xF6, 0, 0)
+    out += palette
+    out += b'\x21\xFF\x0BNETSCAPE2.0\x03\x01\x00\x00\x00'
+    stripes = bytes(1 + (i % 127) for i in range(width + 127 * 2))
+    radius = min(width, height) * 0.4
+    cx, cy = width / 2.0, height / 2.0
+    spans = []
+    for y in range(height):
+        dy = y + 0.5 - cy
+        half = (radius * radius - dy * dy) ** 0.5 if abs(dy) < radius else -1
+        spans.append((max(0, int(cx - half)), min(width, int(cx + half))) if half >= 0 else (0, 0))
+    for f in range(frames):
+        pixels = bytearray()
+        for y, (x0, x1) in enumerate(spans):
+            shift = (y // 4 + f * 3) % 127
+            pixels += bytes(x0) + stripes[shift + x0:shift + x1] + bytes(width - x1)
+        data = bytearray()
+        for i in range(0, len(pixels), 120):
+            data.append(0x80)
+            data += pixels[i:i + 120]
+        data.append(0x81)
+        out += b'\x21\xF9\x04' + struct.pack('<BHBB', 0x09, delay_cs, 0, 0)
+        out += b'\x2C' + struct.pack('<HHHHB', 0, 0, width, height, 0) + b'\x07'
+        for i in range(0, len(data), 255):
+            chunk = data[i:i + 255]
+            out += bytes((len(chunk),)) + chunk
+        out += b'\x00'
+    out += b'\x3B'
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def synthetic_gif(size: int, frames: int) -> str:
+    path = os.path.join(_workdir, 'gifs', f'synthetic_{size}x{size}_{frames}f.gif')
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_gif(path, size, size, frames)
+    return path
+
+
+def _gif_matrix():
+    return QUICK_GIF_MATRIX if _quick else GIF_MATRIX
+
+
+def _isolate(workdir: str) -> None:
+    # Keep the user's settings, frame store and caches out of the numbers
+    os.environ['APPDATA'] = os.path.join(workdir, 'appdata')
+    ini = os.path.join(workdir, 'settings.ini')
+    settings_helper._shared_store = SettingsStore(QSettings(ini, QSettings.IniFormat))
+
+
+def _host():
+    try:
+        from .deskmate_host import DeskmateHost  # type: ignore
+    except Exception:
+        from deskmate_host import DeskmateHost  # type: ignore
+    return DeskmateHost.instance()
+
+
+def _clear_deskmates():
+    host = _host()
+    for w in host.deskmates():
+        host.remove(w)
+    _wait_for(None, 20)
+
+
+def _wait_loaded(asset, timeout_ms: int = 30000) -> None:
+    # Assets missing from the frame store decode in the background
+    deadline = time.perf_counter() + timeout_ms / 1000.0
+    while asset is not None and asset.is_loading() and time.perf_counter() < deadline:
+        QApplication.processEvents(QEventLoop.AllEvents, 5)
+
+
+# --- Benchmarks ---
+
+@benchmark('typing')
+def bench_typing(lengths=(4000, 20000)) -> dict:
+    result = {}
+    for length in lengths:
+        view = TranscriptView()
+        view.resize(520, 500)
+        view.show()
+        view.add_message('DeskMate')
+        renderer = TypingRenderer(view)
+        text = _sample_reply(length)
+        started = time.perf_counter()
+        renderer.begin(paced=True)
+        renderer.feed(text)
+        renderer.close()
+        _wait_for(renderer.finished, 60000)
+        wall = time.perf_counter() - started
+        stats = renderer.stats
+        view.close()
+        result[str(length)] = {
+            'chars': stats['chars'],
+            'wall_s': round(wall, 3),
+            'chars_per_sec': round(stats['chars'] / wall, 1) if wall else 0.0,
+            'ticks': stats['ticks'],
+            'busy_ms': round(stats['busy_ms'], 2),
+            'worst_tick_ms': round(stats['worst_tick_ms'], 3),
+        }
+    return result
+
+
+@benchmark('transcript')
+def bench_transcript(sizes=(5, 5000), appends: int = 50) -> dict:
+    # Cost of appending (and laying out) one more message to sessions of
+    # different lengths; should not grow with the session
+    result = {}
+    line = _sample_reply(240)
+    for size in sizes:
+        view = TranscriptView()
+        view.resize(520, 500)
+        view.show()
+        for i in range(size):
+            view.add_message('You' if i % 2 else 'DeskMate', line)
+        _wait_for(None, 50)
+        started = time.perf_counter()
+        for i in range(appends):
+            view.add_message('You', line)
+            QApplication.processEvents()
+        per_append = (time.perf_counter() - started) * 1000.0 / appends
+        result[f'append_ms_at_{size}'] = round(per_append, 3)
+        result[f'rows_kept_at_{size}'] = view.transcript.rowCount()
+        view.close()
+    return result
+
+
+@benchmark('settings')
+def bench_settings(persona_length: int = 500, wheel_notches: int = 60) -> dict:
+    # Typing a persona one character at a time and scrolling the size wheel,
+    # as the launcher and character widget do, against a throwaway ini file
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SettingsStore(QSettings(os.path.join(tmp, 'bench.ini'), QSettings.IniFormat))
+        helper = SettingsHelper(store)
+        persona = _sample_reply(persona_length)
+        started = time.perf_counter()
+        for i in range(1, len(persona) + 1):
+            helper.set_persona(persona[:i])
+        for i in range(wheel_notches):
+            helper.set_size(250 + (10 if i % 2 else -10) * (i % 7))
+        setter_ms = (time.perf_counter() - started) * 1000.0
+        _wait_for(None, store.FLUSH_DELAY_MS + 250)
+        store.flush()
+        assert helper.get_persona() == persona
+        return {
+            'setter_calls': store.write_requests,
+            'disk_writes': store.disk_writes,
+            'flushes': store.flushes,
+            'write_reduction': round(store.write_requests / max(1, store.disk_writes), 1),
+            'setter_total_ms': round(setter_ms, 2),
+        }
+
+
+@benchmark('decode')
+def bench_decode() -> dict:
+    # Decoding synthetic GIFs (and the same frames as a PNG sprite atlas)
+    # into the frame store, and re-opening the stored frames as a relaunch
+    # would
+    try:
+        from .frame_store import FrameStore  # type: ignore
+        from . import sprite_atlas  # type: ignore
+    except Exception:
+        from frame_store import FrameStore  # type: ignore
+        import sprite_atlas  # type: ignore
+    result = {}
+    for size, frames in _gif_matrix():
+        path = synthetic_gif(size, frames)
+        store = FrameStore(root=os.path.join(_workdir, 'decode_store'))
+        started = time.perf_counter()
+        animation = store.build(path)
+        build = time.perf_counter() - started
+        assert animation is not None and animation.frame_count() == frames
+        animation.close()
+        started = time.perf_counter()
+        animation = store.open(path)
+        reopen = time.perf_counter() - started
+        started = time.perf_counter()
+        for i in range(animation.frame_count()):
+            animation.frame_image(i).pixel(size // 2, size // 2)
+        touch = time.perf_counter() - started
+        animation.close()
+        manifest = sprite_atlas.convert(path)
+        started = time.perf_counter()
+        animation = store.build(manifest)
+        atlas_build = time.perf_counter() - started
+        assert animation is not None and animation.frame_count() == frames
+        animation.close()
+        result[f'{size}px_{frames}f'] = {
+            'gif_bytes': os.path.getsize(path),
+            'decode_ms_per_frame': _ms(build / frames),
+            'atlas_bytes': os.path.getsize(sprite_atlas.source_files(manifest)[1]),
+            'atlas_decode_ms_per_frame': _ms(atlas_build / frames),
+            'reopen_ms': _ms(reopen),
+            'mapped_frame_ms': _ms(touch / frames),
+        }
+    return result
+
+
+@benchmark('load')
+def bench_load() -> dict:
+    # Opening a file that is not in the frame store yet: how long the GUI
+    # thread is held, when the first frame arrives, when decoding finishes,
+    # and how quickly a load is abandoned when another file is picked
+    try:
+        from .asset_registry import AssetRegistry  # type: ignore
+        from .frame_decoder import FrameDecoder  # type: ignore
+    except Exception:
+        from asset_registry import AssetRegistry  # type: ignore
+        from frame_decoder import FrameDecoder  # type: ignore
+    registry = AssetRegistry.instance()
+    result = {}
+    for size, frames in _gif_matrix():
+        path = synthetic_gif(size, frames)
+        consumer = object()
+        marks = {}
+        started = time.perf_counter()
+        asset = registry.acquire(path, consumer)
+        marks['acquire'] = time.perf_counter() - started
+        asset.set_visible(consumer, True)
+        asset.frameChanged.connect(lambda i: marks.setdefault('first_frame', time.perf_counter() - started))
+        asset.loadFinished.connect(lambda ok: marks.setdefault('loaded', time.perf_counter() - started))
+        _wait_loaded(asset)
+        registry.release(asset, consumer)
+        result[f'{size}px_{frames}f'] = {
+            'gui_blocked_ms': _ms(marks['acquire']),
+            'first_frame_ms': _ms(marks.get('first_frame', 0.0)),
+            'fully_decoded_ms': _ms(marks.get('loaded', 0.0)),
+        }
+    # Pick a big file, then switch away as soon as its first frame shows
+    path = synthetic_gif(640, 48)
+    os.utime(path, None)
+    consumer = object()
+    asset = registry.acquire(path, consumer)
+    asset.set_visible(consumer, True)
+    _wait_for(asset.frameChanged, 5000)
+    decoded = asset.animation.frame_count()
+    started = time.perf_counter()
+    registry.release(asset, consumer)
+    FrameDecoder.instance().wait(5000)
+    result['cancel'] = {
+        'frames_decoded_before_cancel': decoded,
+        'decoder_stopped_ms': _ms(time.perf_counter() - started),
+    }
+    return result
+
+
+@benchmark('paint')
+def bench_paint(source_size: int = 640, frames: int = 24) -> dict:
+    # Per-frame cost of getting a frame on screen at each size preset: the
+    # first pass scales every frame (cache miss), later passes reuse them
+    path = synthetic_gif(source_size, frames)
+    host = _host()
+    result = {}
+    for preset in PRESETS:
+        _clear_deskmates()
+        w = host.add(path)
+        _wait_loaded(w.asset)
+        w.show()
+        w.set_size(preset)
+        w._on_resize_settled()
+        passes = []
+        for _ in range(3):
+            started = time.perf_counter()
+            for i in range(frames):
+                w._render_frame(i)
+                w.repaint()
+            passes.append((time.perf_counter() - started) / frames)
+        result[str(preset)] = {
+            'cold_ms_per_frame': _ms(passes[0]),
+            'warm_ms_per_frame': _ms(min(passes[1:])),
+            'cache_mb': round(w.asset.cache.memory_bytes() / (1024 * 1024), 2),
+            'hit_mask_kb': round(w.asset.masks.memory_bytes() / 1024, 1),
+        }
+    _clear_deskmates()
+    return result
+
+
+@benchmark('resize')
+def bench_resize(steps: int = 40) -> dict:
+    # Ctrl+wheel resizing (preview scale per notch, one re-rasterize after
+    # the size settles) and jumping between the menu presets
+    path = synthetic_gif(640, 24)
+    _clear_deskmates()
+    w = _host().add(path)
+    _wait_loaded(w.asset)
+    w.show()
+    w.set_size(250)
+    w._on_resize_settled()
+    center = QPointF(w.width() / 2, w.height() / 2)
+    wheel = []
+    for i in range(steps):
+        # Mostly growing, so the settled size is a new one
+        delta = -120 if i % 4 == 3 else 120
+        event = QWheelEvent(center, QPointF(w.mapToGlobal(center.toPoint())), QPoint(0, 0), QPoint(0, delta),
+                            Qt.NoButton, Qt.ControlModifier, Qt.NoScrollPhase, False)
+        started = time.perf_counter()
+        w.wheelEvent(event)
+        w.repaint()
+        wheel.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    w._on_resize_settled()
+    w.repaint()
+    settle = time.perf_counter() - started
+    presets = []
+    for preset in PRESETS * 2:
+        started = time.perf_counter()
+        w.set_size(preset)
+        w._on_resize_settled()
+        w.repaint()
+        presets.append(time.perf_counter() - started)
+    _clear_deskmates()
+    return {
+        'wheel_ms_per_notch': _ms(sum(wheel) / len(wheel)),
+        'wheel_worst_ms': _ms(max(wheel)),
+        'settle_ms': _ms(settle),
+        'preset_first_ms': _ms(sum(presets[:len(PRESETS)]) / len(PRESETS)),
+        'preset_repeat_ms': _ms(sum(presets[len(PRESETS):]) / len(PRESETS)),
+    }
+
+
+@benchmark('deskmates')
+def bench_deskmates(counts=(1, 10), seconds: float = 1.5) -> dict:
+    # CPU while N characters share one GIF on the animation clock
+    try:
+        from .asset_registry import AssetRegistry  # type: ignore
+    except Exception:
+        from asset_registry import AssetRegistry  # type: ignore
+    path = synthetic_gif(160, 24)
+    host = _host()
+    result = {}
+    for count in counts:
+        _clear_deskmates()
+        for _ in range(count):
+            host.add(path).show()
+        _wait_loaded(host.current().asset)
+        _wait_for(None, 200)
+        started = time.process_time()
+        _wait_for(None, int(seconds * 1000))
+        cpu = time.process_time() - started
+        result[str(count)] = {
+            'cpu_ms_per_s': round(cpu * 1000.0 / seconds, 1),
+            'assets': len(AssetRegistry.instance().active_assets()),
+        }
+    _clear_deskmates()
+    return result
+
+
+@benchmark('logging')
+def bench_logging(records: int = 4000, burst: int = 20) -> dict:
+    # Caller-side cost of logging.info() with a plain FileHandler versus the
+    # queued writer, and of app_logging.event() with the channel on and off.
+    # Records go out in short bursts, the way the app logs.
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    with tempfile.TemporaryDirectory() as tmp:
+        def per_call_us(fn):
+            spent = 0.0
+            for start in range(0, records, burst):
+                started = time.perf_counter()
+                for i in range(start, start + burst):
+                    fn(i)
+                spent += time.perf_counter() - started
+                time.sleep(0.001)
+            return round(spent * 1e6 / records, 3)
+        log = lambda i: logging.info('Benchmark record %d of %s', i, 'logging')
+        result = {'event_disabled_us': per_call_us(lambda i: app_logging.event('bench', i=i, ms=1.5))}
+        try:
+            root.handlers = [logging.FileHandler(os.path.join(tmp, 'sync.log'), encoding='utf-8')]
+            root.setLevel(logging.INFO)
+            result['sync_file_us'] = per_call_us(log)
+            root.handlers[0].close()
+            app_logging.configure(os.path.join(tmp, 'logs'), console=False)
+            result['queued_us'] = per_call_us(log)
+            result['event_us'] = per_call_us(lambda i: app_logging.event('bench', i=i, ms=1.5))
+            started = time.perf_counter()
+            app_logging.shutdown()
+            result['drain_ms'] = _ms(time.perf_counter() - started)
+        finally:
+            app_logging.shutdown()
+            for handler in root.handlers:
+                handler.close()
+            root.handlers = saved_handlers
+            root.setLevel(saved_level)
+        with open(os.path.join(tmp, 'logs', 'events.jsonl'), 'r', encoding='utf-8') as f:
+            assert sum(1 for _ in f) == records
+    return result
+
+
+@benchmark('cold_start')
+def bench_cold_start() -> dict:
+    # Fresh processes, so imports and first paint are really cold. The
+    # character runs twice: with an empty frame store, then a populated one.
+    path = synthetic_gif(320, 24)
+    fresh = lambda: tempfile.mkdtemp(prefix='appdata_', dir=_workdir)
+    character_appdata = fresh()
+    return {
+        'launcher': _run_child('launcher', path, fresh()),
+        'character_cold_store': _run_child('character', path, character_appdata),
+        'character_warm_store': _run_child('character', path, character_appdata),
+    }
+
+
+def _run_child(kind: str, path: str, appdata: str) -> dict:
+    env = dict(os.environ, APPDATA=appdata)
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', kind, path],
+                          env=env, capture_output=True, text=True, timeout=120)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    lines = (proc.stderr or 'no output').strip().splitlines()
+    return {'error': lines[-1] if lines else 'no output'}
+
+
+def _child(kind: str, path: str) -> int:
+    # Runs in a fresh interpreter: time to the first paint and to the first
+    # painted animation frame, measured from when this function starts
+    started = time.perf_counter()
+    try:
+        from . import startup_timing  # type: ignore
+    except Exception:
+        import startup_timing  # type: ignore
+    app = QApplication(sys.argv[:1])
+    _isolate(os.environ['APPDATA'])
+    out = {}
+
+    def stamp(key):
+        out[key] = _ms(time.perf_counter() - started)
+
+    stamp('qapplication_ms')
+    if kind == 'launcher':
+        settings_helper.shared_store().setValue('paths/lastGif', path)
+        try:
+            from .launcher_window import LauncherWindow  # type: ignore
+        except Exception:
+            from launcher_window import LauncherWindow  # type: ignore
+        widget = LauncherWindow()
+        label = widget.preview_label
+    else:
+        widget = _host().add(path)
+        label = widget.character_label
+    stamp('constructed_ms')
+    startup_timing.watch_first_paint(widget, 'first_paint')
+    widget.show()
+    deadline = time.perf_counter() + 10
+    while 'first_paint_ms' not in out or 'first_frame_ms' not in out:
+        app.processEvents(QEventLoop.AllEvents, 5)
+        if 'first_paint_ms' not in out and any(p == 'first_paint' for p, _ in startup_timing.phases()):
+            stamp('first_paint_ms')
+        pixmap = label.pixmap()
+        if 'first_frame_ms' not in out and pixmap is not None and not pixmap.isNull():
+            widget.repaint()
+            stamp('first_frame_ms')
+        if time.perf_counter() > deadline:
+            out['error'] = 'timed out'
+            break
+    print(json.dumps(out))
+    return 0
+
+
+# --- Results ---
+
+def _meta() -> dict:
+    commit = ''
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'qt': QT_VERSION_STR,
+        'pyqt': PYQT_VERSION_STR,
+        'platform': platform.platform(),
+        'qpa': os.environ.get('QT_QPA_PLATFORM', ''),
+        'quick': _quick,
+    }
+
+
+def _flatten(value, prefix=''):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(item, f'{prefix}.{key}' if prefix else str(key))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, value
+
+
+def compare(baseline: dict, current: dict) -> None:
+    base = dict(_flatten(baseline.get('results', {})))
+    print(f"# {baseline.get('meta', {}).get('commit', '?')} -> {current['meta'].get('commit', '?')}")
+    for key, value in _flatten(current['results']):
+        if key not in base:
+            continue
+        before = base[key]
+        change = f'{(value - before) / before * 100.0:+.1f}%' if before else 'n/a'
+        print(f'{key:60s} {before:>12} {value:>12} {change:>9}')
+
+
+def main(argv=None) -> int:
+    global _workdir, _quick, _app
+    parser = argparse.ArgumentParser(description='VirtualDeskmate benchmarks')
+    parser.add_argument('names', nargs='*', help='benchmarks to run (default: all)')
+    parser.add_argument('--json', dest='json_path', help='write all results (with run metadata) to this file')
+    parser.add_argument('--compare', help='results file from an earlier run to compare against')
+    parser.add_argument('--quick', action='store_true', help='smaller GIF matrix')
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        return _child(*args.child)
+    _quick = args.quick
+    names = args.names or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f'Unknown benchmark: {name}', file=sys.stderr)
+            return 2
+    _app = QApplication.instance() or QApplication(sys.argv[:1])
+    with tempfile.TemporaryDirectory(prefix='deskmate_bench_') as workdir:
+        _workdir = workdir
+        _isolate(workdir)
+        document = {'meta': _meta(), 'results': {}}
+        for name in names:
+            result = BENCHMARKS[name]()
+            document['results'][name] = result
+            print(json.dumps({'benchmark': name, **result}))
+        _clear_deskmates()
+        settings_helper.shared_store().flush()
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), document)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
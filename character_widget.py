@@ -1,37 +1,63 @@
 import os
-import logging
-import weakref
-from PyQt5.QtWidgets import QWidget, QLabel, QSystemTrayIcon, QMenu, QAction, QStyle, QShortcut
-from PyQt5.QtGui import QMovie, QIcon, QKeySequence
-from PyQt5.QtCore import Qt, QPoint, QTimer
+from PyQt5.QtWidgets import QWidget, QLabel, QMenu, QAction, QShortcut
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtCore import Qt, QPoint, QSize
 try:
     from .settings_helper import SettingsHelper  # type: ignore
     from .utils import resource_path  # type: ignore
-    from .startup_windows import WindowsStartupManager  # type: ignore
+    from .asset_registry import AssetRegistry  # type: ignore
+    from . import power_policy  # type: ignore
+    from .screen_index import ScreenIndex  # type: ignore
+    from .animation_clock import AnimationClock  # type: ignore
 except Exception:
     from settings_helper import SettingsHelper  # type: ignore
     from utils import resource_path  # type: ignore
-    from startup_windows import WindowsStartupManager  # type: ignore
-from PyQt5.QtWidgets import QApplication
+    from asset_registry import AssetRegistry  # type: ignore
+    import power_policy  # type: ignore
+    from screen_index import ScreenIndex  # type: ignore
+    from animation_clock import AnimationClock  # type: ignore
+
+
+class DeskmateState:
+    # Per-character state that isn't a Qt object. Timers are handles on the
+    # shared AnimationClock rather than a QTimer per character.
+    __slots__ = ('gif_path', 'drag_locked', 'idle_enabled', 'bob_phase_ms', 'bob_offset',
+                 'frame_size', 'drag_offset', 'drag_target', 'drag_pending', 'settle_pending', 'mask_key')
+
+    def __init__(self, gif_path: str = ''):
+        self.gif_path = gif_path
+        self.drag_locked = False
+        self.idle_enabled = True
+        self.bob_phase_ms = 0
+        self.bob_offset = 0
+        self.frame_size = QSize()
+        self.drag_offset = None
+        self.drag_target = None
+        self.drag_pending = None
+        self.settle_pending = None
+        self.mask_key = None
 
 
 class CharacterWidget(QWidget):
-    tray_icon = None
-    tray_menu = None
-    action_show = None
-    action_hide = None
-    action_show_launcher = None
-    action_quit = None
-    current_ref = None
-    launcher_ref = None
-
-    def __init__(self, gif_path: str = None, launcher: QWidget = None):
+    # Idle bobbing moves the character inside a slightly taller transparent
+    # window instead of moving the window itself. Tray, bobbing and the
+    # launcher live on the DeskmateHost, which can run several characters.
+    BOB_AMPLITUDE = 3
+    BOB_PERIOD_MS = 6000
+    DRAG_FRAME_MS = 16
+    RESIZE_SETTLE_MS = 150
+
+    def __init__(self, gif_path: str = None, host=None):
         super().__init__()
-        self.launcher = launcher
+        if host is None:
+            try:
+                from .deskmate_host import DeskmateHost  # type: ignore
+            except Exception:
+                from deskmate_host import DeskmateHost  # type: ignore
+            host = DeskmateHost.instance()
+        self.host = host
         self.settings_helper = SettingsHelper()
-        CharacterWidget.current_ref = weakref.ref(self)
-        if launcher is not None:
-            CharacterWidget.launcher_ref = weakref.ref(launcher)
+        self.clock = AnimationClock.instance()
 
         self.setWindowFlags(
             Qt.FramelessWindowHint |
@@ -44,32 +70,31 @@ class CharacterWidget(QWidget):
         if not gif_path:
             candidate = resource_path('Dance-Evernight-unscreen.gif')
             gif_path = candidate if os.path.exists(candidate) else ''
-        self.movie = QMovie(gif_path)
-        self.movie.setCacheMode(QMovie.CacheAll)
-        self.character_label.setMovie(self.movie)
         self.character_label.setStyleSheet("background: transparent;")
         self.character_label.setAttribute(Qt.WA_TransparentForMouseEvents, True)
-        self.movie.start()
+        self.state = DeskmateState(gif_path)
+
+        # Frames are drawn from the asset's cache of pre-scaled pixmaps rather
+        # than letting the label rescale the full-size frame on every paint.
+        # After a resize, frames are re-rasterized only once the size settles.
+        # The decoder, player and frame cache are shared with any other
+        # window showing the same file (other characters, the launcher preview).
+        self.asset = AssetRegistry.instance().acquire(gif_path, self)
+        if self.asset is not None:
+            self.asset.frameChanged.connect(self._on_frame_changed)
 
-        self.character_label.setScaledContents(True)
         saved_size = self.settings_helper.get_size()
-        new_width = saved_size
-        new_height = saved_size
-        self.character_label.setFixedSize(new_width, new_height)
-        self.setFixedSize(new_width, new_height)
+        self._apply_size(saved_size, settle=False)
 
-        self.old_pos = self.pos()
-        self.drag_locked = self.settings_helper.get_lock_position()
+        # Drag moves are coalesced to one window move per frame
+        self.screens = ScreenIndex.instance()
+        self.state.drag_locked = self.settings_helper.get_lock_position()
         # Always allow interaction; click-through removed
         self.setWindowOpacity(self.settings_helper.get_opacity())
 
-        self.idle_enabled = bool(self.settings_helper.settings.value('behavior/idleEnabled', False, type=bool))
-        self.bob_timer = QTimer(self)
-        self.bob_timer.setInterval(50)
-        self._bob_phase = 0
-        if self.idle_enabled:
-            self.bob_timer.timeout.connect(self._on_bob)
-            self.bob_timer.start()
+        self.state.idle_enabled = self.settings_helper.get_idle_enabled()
+        self.power_policy = power_policy.PowerPolicy.instance()
+        self.power_policy.watch(self)
 
         self.setContextMenuPolicy(Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self.open_context_menu)
@@ -80,158 +105,133 @@ class CharacterWidget(QWidget):
         self.shortcut_cycle_size = QShortcut(QKeySequence('Ctrl+Shift+S'), self)
         self.shortcut_cycle_size.activated.connect(self._cycle_size)
 
-        # Ensure the system tray is initialized immediately so controls are available
-        self._ensure_tray_initialized()
+    @property
+    def drag_locked(self) -> bool:
+        return self.state.drag_locked
+
+    @property
+    def idle_enabled(self) -> bool:
+        return self.state.idle_enabled
+
+    def _hits(self, pos) -> bool:
+        # Also enforced here for platforms that ignore window masks
+        mask = self.mask()
+        return mask.isEmpty() or mask.contains(pos)
 
     def mousePressEvent(self, event):
+        if not self._hits(event.pos()):
+            event.ignore()
+            return
         if event.button() == Qt.LeftButton:
-            if not self.drag_locked:
-                self.old_pos = event.globalPos()
+            self.host.set_current(self)
+            if not self.state.drag_locked:
+                self.state.drag_offset = event.globalPos() - self.pos()
 
     def mouseMoveEvent(self, event):
-        if event.buttons() == Qt.LeftButton and not self.drag_locked:
-            delta = QPoint(event.globalPos() - self.old_pos)
-            new_x = self.x() + delta.x()
-            new_y = self.y() + delta.y()
-            screen = QApplication.primaryScreen()
-            if screen:
-                avail = screen.availableGeometry()
-                new_x = max(avail.left(), min(new_x, avail.right() - self.width()))
-                new_y = max(avail.top(), min(new_y, avail.bottom() - self.height()))
-            self.move(new_x, new_y)
-            self.old_pos = event.globalPos()
+        state = self.state
+        if event.buttons() == Qt.LeftButton and not state.drag_locked and state.drag_offset is not None:
+            # Only remember where the pointer is; the move happens once per frame
+            state.drag_target = QPoint(event.globalPos())
+            if state.drag_pending is None:
+                state.drag_pending = self.clock.call_later(self.DRAG_FRAME_MS, self._apply_drag)
+
+    def _apply_drag(self):
+        state = self.state
+        state.drag_pending = None
+        if state.drag_target is None:
+            return
+        pointer = state.drag_target
+        state.drag_target = None
+        # Clamp to the screen under the pointer so the character can cross monitors
+        avail = self.screens.available_at(pointer)
+        pos = pointer - state.drag_offset
+        if not avail.isNull():
+            pos.setX(max(avail.left(), min(pos.x(), avail.left() + avail.width() - self.width())))
+            pos.setY(max(avail.top(), min(pos.y(), avail.top() + avail.height() - self.height())))
+        if pos != self.pos():
+            self.move(pos)
 
     def mouseReleaseEvent(self, event):
-        if event.button() == Qt.LeftButton and not self.drag_locked:
-            screen = QApplication.primaryScreen()
-            if screen:
-                avail = screen.availableGeometry()
-                left_dist = abs(self.x() - avail.left())
-                right_dist = abs(avail.right() - (self.x() + self.width()))
-                if left_dist < right_dist:
-                    self.move(avail.left(), self.y())
-                else:
-                    self.move(avail.right() - self.width(), self.y())
-        # Always ensure tray exists regardless of mouse interactions
-        self._ensure_tray_initialized()
+        state = self.state
+        if event.button() == Qt.LeftButton and not state.drag_locked and state.drag_offset is not None:
+            self.clock.cancel(state.drag_pending)
+            self._apply_drag()
+            state.drag_offset = None
+            self._snap_to_edge()
+
+    def _snap_to_edge(self):
+        # Snap to the nearer side edge of the screen the character is on
+        avail = self.screens.available_at(self.geometry().center())
+        if avail.isNull():
+            return
+        left_dist = abs(self.x() - avail.left())
+        right_edge = avail.left() + avail.width() - self.width()
+        right_dist = abs(right_edge - self.x())
+        self.move(avail.left() if left_dist < right_dist else right_edge, self.y())
 
     def wheelEvent(self, event):
-        modifiers = QApplication.keyboardModifiers()
-        if modifiers & Qt.ControlModifier:
+        modifiers = event.modifiers()
+        if modifiers & Qt.ControlModifier and self._hits(event.pos()):
             delta = event.angleDelta().y()
             step = 10 if delta > 0 else -10
             new_size = self.width() + step
             new_size = max(96, min(600, new_size))
-            self.character_label.setFixedSize(new_size, new_size)
-            self.setFixedSize(new_size, new_size)
+            self._apply_size(new_size)
             self.settings_helper.set_size(new_size)
             event.accept()
         else:
             event.ignore()
 
     def hideEvent(self, event):
-        try:
-            if self.movie:
-                self.movie.setPaused(True)
-        except Exception:
-            pass
-        self._sync_tray_state()
+        if self.asset is not None:
+            self.asset.set_visible(self, False)
+        self.host.update_bobbing()
+        self.host.sync_tray_state()
         super().hideEvent(event)
 
     def showEvent(self, event):
-        try:
-            if self.movie:
-                self.movie.setPaused(False)
-        except Exception:
-            pass
+        if self.asset is not None:
+            self.asset.set_visible(self, True)
+        self.host.update_bobbing()
         # Ensure tray is present when the widget is shown
-        self._ensure_tray_initialized()
-        self._sync_tray_state()
+        self.host.ensure_tray()
+        self.host.sync_tray_state()
         super().showEvent(event)
 
-    def _ensure_tray_initialized(self):
-        if not QSystemTrayIcon.isSystemTrayAvailable():
+    def wants_bob(self) -> bool:
+        return self.state.idle_enabled and self.isVisible()
+
+    def set_bob_offset(self, offset: int) -> None:
+        if offset != self.state.bob_offset:
+            self.state.bob_offset = offset
+            self._place_label()
+
+    def _place_label(self):
+        self.character_label.move(0, self.BOB_AMPLITUDE + self.state.bob_offset)
+        self._apply_hit_mask()
+
+    def _apply_hit_mask(self, frame_number: int = None):
+        # Only visible pixels take input, so clicks on transparent parts go
+        # to whatever is underneath. Masks are built once per frame at the
+        # settled size (shared through the asset); mid-resize the whole
+        # window stays clickable. The mask follows the bobbing label only on
+        # frame changes: a bob step alone (at most BOB_AMPLITUDE px either
+        # way) is not worth a setMask() round trip to the window manager.
+        state = self.state
+        key = None
+        if (self.asset is not None and self.asset.is_valid() and state.settle_pending is None
+                and self.character_label.size() == state.frame_size):
+            if frame_number is None:
+                frame_number = self.asset.current_frame()
+            if frame_number >= 0:
+                key = (frame_number, state.frame_size.width(), state.frame_size.height())
+        if key == state.mask_key:
             return
-        if CharacterWidget.tray_icon is not None:
-            return
-        CharacterWidget.tray_icon = QSystemTrayIcon()
-        icon_path = resource_path('Icon.png')
-        icon = QIcon(icon_path) if os.path.exists(icon_path) else QApplication.style().standardIcon(QStyle.SP_ComputerIcon)
-        CharacterWidget.tray_icon.setIcon(icon)
-        self.setWindowIcon(icon)
-        CharacterWidget.tray_icon.setToolTip('VirtualDeskmate')
-
-        CharacterWidget.tray_menu = QMenu()
-        CharacterWidget.action_show = QAction('Show')
-        CharacterWidget.action_hide = QAction('Hide')
-        CharacterWidget.action_show_launcher = QAction('Show Launcher')
-        CharacterWidget.action_quit = QAction('Quit')
-        CharacterWidget.action_chat = QAction('Open Chat')
-
-        def _show_current():
-            w = CharacterWidget.current_ref() if CharacterWidget.current_ref else None
-            if w is not None:
-                w.showNormal()
-
-        def _hide_current():
-            w = CharacterWidget.current_ref() if CharacterWidget.current_ref else None
-            if w is not None:
-                w.hide()
-
-        def _show_launcher():
-            l = CharacterWidget.launcher_ref() if CharacterWidget.launcher_ref else None
-            if l is not None:
-                l.show()
-                l.raise_()
-                l.activateWindow()
-
-        CharacterWidget.action_show.triggered.connect(_show_current)
-        CharacterWidget.action_hide.triggered.connect(_hide_current)
-        CharacterWidget.action_show_launcher.triggered.connect(_show_launcher)
-        CharacterWidget.action_quit.triggered.connect(QApplication.instance().quit)
-
-        CharacterWidget.action_startup = QAction('Start with Windows', self, checkable=True)
-        CharacterWidget.action_startup.setChecked(WindowsStartupManager.is_enabled())
-
-        def _toggle_startup(enabled):
-            WindowsStartupManager.set_enabled(enabled)
-        CharacterWidget.action_startup.toggled.connect(_toggle_startup)
-
-        CharacterWidget.tray_menu.addAction(CharacterWidget.action_show)
-        CharacterWidget.tray_menu.addAction(CharacterWidget.action_hide)
-        CharacterWidget.tray_menu.addAction(CharacterWidget.action_show_launcher)
-        CharacterWidget.tray_menu.addAction(CharacterWidget.action_startup)
-        CharacterWidget.tray_menu.addSeparator()
-        CharacterWidget.tray_menu.addAction(CharacterWidget.action_chat)
-        CharacterWidget.tray_menu.addAction(CharacterWidget.action_quit)
-        CharacterWidget.tray_icon.setContextMenu(CharacterWidget.tray_menu)
-
-        def on_tray_activated(reason):
-            if reason == QSystemTrayIcon.Trigger:
-                w = CharacterWidget.current_ref() if CharacterWidget.current_ref else None
-                if w is not None:
-                    if w.isHidden():
-                        w.showNormal()
-                    else:
-                        w.hide()
-        CharacterWidget.tray_icon.activated.connect(on_tray_activated)
-        CharacterWidget.tray_icon.show()
-
-        def _open_chat():
-            try:
-                from chat_window import ChatWindow
-            except Exception:
-                from .chat_window import ChatWindow  # type: ignore
-            l = CharacterWidget.launcher_ref() if CharacterWidget.launcher_ref else None
-            # Always open as a top-level window
-            w = ChatWindow()
-            w.show()
-        CharacterWidget.action_chat.triggered.connect(_open_chat)
-
-    def _on_bob(self):
-        self._bob_phase = (self._bob_phase + 1) % 120
-        offset = int(3 * __import__('math').sin(self._bob_phase / 120.0 * 2 * __import__('math').pi))
-        self.move(self.x(), self.y() + offset)
+        state.mask_key = key
+        if key is None:
+            self.clearMask()
+        else:
+            self.setMask(self.asset.hit_region(frame_number, state.frame_size).translated(self.character_label.pos()))
 
     def _toggle_visibility(self):
         if self.isHidden():
@@ -249,6 +249,9 @@ class CharacterWidget(QWidget):
         self.set_size(presets[0])
 
     def open_context_menu(self, pos):
+        if not self._hits(pos):
+            return
+        self.host.set_current(self)
         menu = QMenu(self)
         opacity_menu = menu.addMenu('Opacity')
         for label, value in [('100%', 1.0), ('80%', 0.8), ('60%', 0.6), ('40%', 0.4)]:
@@ -266,61 +269,146 @@ class CharacterWidget(QWidget):
             act.triggered.connect(make_size_setter(value))
             size_menu.addAction(act)
 
+        registry = AssetRegistry.instance()
+        fps_menu = menu.addMenu('Max FPS')
+        for label, value in [('Unlimited', 0), ('60', 60), ('30', 30), ('24', 24), ('15', 15)]:
+            act = QAction(label, self, checkable=True)
+            act.setChecked(registry.max_fps == value)
+            def make_fps_setter(v):
+                return lambda: self.set_max_fps(v)
+            act.triggered.connect(make_fps_setter(value))
+            fps_menu.addAction(act)
+
+        speed_menu = menu.addMenu('Speed')
+        for label, value in [('0.25×', 0.25), ('0.5×', 0.5), ('1×', 1.0), ('1.5×', 1.5), ('2×', 2.0), ('4×', 4.0)]:
+            act = QAction(label, self, checkable=True)
+            act.setChecked(abs(registry.speed - value) < 1e-6)
+            def make_speed_setter(v):
+                return lambda: self.set_playback_speed(v)
+            act.triggered.connect(make_speed_setter(value))
+            speed_menu.addAction(act)
+
         act_lock = QAction('Lock Position', self, checkable=True)
-        act_lock.setChecked(self.drag_locked)
+        act_lock.setChecked(self.state.drag_locked)
         act_lock.toggled.connect(self.set_lock_position)
         menu.addAction(act_lock)
 
         # Click-through removed
 
         act_idle = QAction('Idle Bobbing', self, checkable=True)
-        act_idle.setChecked(self.idle_enabled)
+        act_idle.setChecked(self.state.idle_enabled)
         act_idle.toggled.connect(self.set_idle_enabled)
         menu.addAction(act_idle)
 
+        menu.addSeparator()
+        act_add = QAction('Add Another Deskmate', self)
+        act_add.triggered.connect(self._add_another)
+        menu.addAction(act_add)
+        if len(self.host.deskmates()) > 1:
+            act_remove = QAction('Remove This Deskmate', self)
+            act_remove.triggered.connect(lambda: self.host.remove(self))
+            menu.addAction(act_remove)
+
         act_launcher = QAction('Show Launcher', self)
-        act_launcher.triggered.connect(lambda: CharacterWidget.launcher_ref() and CharacterWidget.launcher_ref().show())
+        act_launcher.triggered.connect(self.host.show_launcher)
         menu.addAction(act_launcher)
 
         menu.exec_(self.mapToGlobal(pos))
 
+    def _add_another(self):
+        other = self.host.add(self.state.gif_path)
+        other.move(self.pos() + QPoint(40, 0))
+        other.show()
+
     def set_opacity(self, value: float):
         self.setWindowOpacity(value)
         self.settings_helper.set_opacity(value)
-        self._sync_tray_state()
+        self.host.sync_tray_state()
+
+    def set_max_fps(self, fps: int):
+        self.settings_helper.set_max_fps(fps)
+        AssetRegistry.instance().set_playback(max_fps=self.settings_helper.get_max_fps())
+
+    def set_playback_speed(self, speed: float):
+        self.settings_helper.set_playback_speed(speed)
+        AssetRegistry.instance().set_playback(speed=self.settings_helper.get_playback_speed())
 
     def set_size(self, size: int):
         size = max(96, min(600, int(size)))
-        self.character_label.setFixedSize(size, size)
-        self.setFixedSize(size, size)
+        self._apply_size(size)
         self.settings_helper.set_size(size)
 
-    def set_lock_position(self, locked: bool):
-        self.drag_locked = bool(locked)
-        self.settings_helper.set_lock_position(self.drag_locked)
-        self._sync_tray_state()
+    def _apply_size(self, size: int, settle: bool = True):
+        self.character_label.setFixedSize(size, size)
+        self.setFixedSize(size, size + 2 * self.BOB_AMPLITUDE)
+        self._place_label()
+        if settle:
+            # Show a cheap preview scale until the size stops changing
+            self.clock.cancel(self.state.settle_pending)
+            self.state.settle_pending = self.clock.call_later(self.RESIZE_SETTLE_MS, self._on_resize_settled)
+            self._render_frame()
+        else:
+            self._on_resize_settled()
+
+    def _on_resize_settled(self):
+        state = self.state
+        self.clock.cancel(state.settle_pending)
+        state.settle_pending = None
+        new_size = self.character_label.size()
+        if self.asset is not None and state.frame_size.isValid() and state.frame_size != new_size:
+            self._discard_frame_size(state.frame_size)
+        state.frame_size = new_size
+        self._render_frame()
+
+    def _discard_frame_size(self, size: QSize):
+        # Other characters sharing the asset may still be drawing at that size
+        for w in self.host.deskmates():
+            if w is not self and w.asset is self.asset and w.state.frame_size == size:
+                return
+        self.asset.discard_size(size)
 
-    # Click-through removed
+    def _on_frame_changed(self, frame_number: int):
+        if self.isVisible():
+            self._render_frame(frame_number)
 
-    def set_idle_enabled(self, enabled: bool):
-        self.idle_enabled = bool(enabled)
-        self.settings_helper.settings.setValue('behavior/idleEnabled', self.idle_enabled)
-        if self.idle_enabled:
-            if not self.bob_timer.isActive():
-                self.bob_timer.timeout.connect(self._on_bob)
-                self.bob_timer.start()
+    def _render_frame(self, frame_number: int = None):
+        if self.asset is None or not self.asset.is_valid():
+            return
+        if frame_number is None:
+            frame_number = self.asset.current_frame()
+        if frame_number < 0:
+            return
+        target = self.character_label.size()
+        if self.state.settle_pending is not None or target != self.state.frame_size:
+            pixmap = self.asset.preview_frame(frame_number, target)
         else:
-            self.bob_timer.stop()
-
-    # Click-through removed
+            pixmap = self.asset.scaled_frame(frame_number, target)
+        self.character_label.setPixmap(pixmap)
+        self._apply_hit_mask(frame_number)
+
+    def release(self):
+        # Tear down this character and drop its hold on the shared asset
+        self.clock.cancel(self.state.drag_pending)
+        self.clock.cancel(self.state.settle_pending)
+        self.state.drag_pending = self.state.settle_pending = None
+        self.power_policy.unwatch(self)
+        if self.asset is not None:
+            self.asset.frameChanged.disconnect(self._on_frame_changed)
+            AssetRegistry.instance().release(self.asset, self)
+            self.asset = None
+        self.hide()
+        self.deleteLater()
 
-    def _sync_tray_state(self):
-        if CharacterWidget.tray_icon is not None:
-            state = []
-            if self.drag_locked:
-                state.append('Locked')
-            # Click-through removed
-            state.append(f"{int(self.windowOpacity()*100)}%")
-            CharacterWidget.tray_icon.setToolTip('VirtualDeskmate - ' + ', '.join(state))
+    def set_lock_position(self, locked: bool):
+        self.state.drag_locked = bool(locked)
+        self.settings_helper.set_lock_position(self.state.drag_locked)
+        self.host.sync_tray_state()
 
+    # Click-through removed
 
+    def set_idle_enabled(self, enabled: bool):
+        self.state.idle_enabled = bool(enabled)
+        self.settings_helper.set_idle_enabled(self.state.idle_enabled)
+        self.host.update_bobbing()
+        if not self.state.idle_enabled:
+            self.set_bob_offset(0)
@@ -0,0 +1,50 @@
+from PyQt5.QtCore import QCoreApplication
+try:
+    from .chat_window import ChatWindow  # type: ignore
+except Exception:
+    from chat_window import ChatWindow  # type: ignore
+
+
+class ChatWindowManager:
+    # Keeps one warm ChatWindow per conversation. Closing a chat only hides
+    # it, so reopening is instant and keeps the history, client and pooled
+    # connections.
+    DEFAULT_CONVERSATION = 'default'
+    _instance = None
+
+    def __init__(self):
+        self._windows = {}
+        app = QCoreApplication.instance()
+        if app is not None:
+            # Queued and in-flight requests are dropped on quit
+            app.aboutToQuit.connect(self.close_all)
+
+    @classmethod
+    def instance(cls) -> 'ChatWindowManager':
+        if cls._instance is None:
+            cls._instance = ChatWindowManager()
+        return cls._instance
+
+    def get(self, conversation: str = DEFAULT_CONVERSATION):
+        return self._windows.get(conversation)
+
+    def open(self, conversation: str = DEFAULT_CONVERSATION) -> ChatWindow:
+        window = self._windows.get(conversation)
+        if window is None:
+            window = ChatWindow()
+            self._windows[conversation] = window
+        else:
+            # Pick up launcher edits (key, model, persona, name) made meanwhile
+            window.refresh_settings()
+        if window.isMinimized():
+            window.showNormal()
+        else:
+            window.show()
+        window.raise_()
+        window.activateWindow()
+        return window
+
+    def close_all(self) -> None:
+        for window in self._windows.values():
+            window.worker.cancel()
+            window.hide()
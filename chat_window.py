@@ -1,13 +1,24 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTextEdit, QLineEdit, QPushButton, QLabel
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QTextCursor
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QLabel
+from PyQt5.QtCore import Qt
 
 try:
     from .settings_helper import SettingsHelper  # type: ignore
-    from .utils import ChatClient  # type: ignore
+    from .utils import ChatClient, app_data_dir  # type: ignore
+    from .response_cache import ResponseCache  # type: ignore
+    from .chat_worker import ChatWorker  # type: ignore
+    from .typing_renderer import TypingRenderer  # type: ignore
+    from .context_window import ContextWindow  # type: ignore
+    from .transcript_view import TranscriptView  # type: ignore
+    from .request_scheduler import RequestScheduler, INTERACTIVE  # type: ignore
 except Exception:
     from settings_helper import SettingsHelper  # type: ignore
-    from utils import ChatClient  # type: ignore
+    from utils import ChatClient, app_data_dir  # type: ignore
+    from response_cache import ResponseCache  # type: ignore
+    from chat_worker import ChatWorker  # type: ignore
+    from typing_renderer import TypingRenderer  # type: ignore
+    from context_window import ContextWindow  # type: ignore
+    from transcript_view import TranscriptView  # type: ignore
+    from request_scheduler import RequestScheduler, INTERACTIVE  # type: ignore
 
 
 class ChatWindow(QWidget):
@@ -17,12 +28,19 @@ class ChatWindow(QWidget):
         self.chat_name = self.settings.get_chat_name()
         self.setWindowTitle(f'{self.chat_name} — Chat')
         self.setMinimumSize(520, 620)
-        self.client = ChatClient(self.settings.get_api_key(), self.settings.get_model())
+        self._client_config = None
+        self._rejected_config = None
+        self.client = self._make_client()
         self.system_prompt = self.settings.get_persona()
+        self.context = ContextWindow(self.settings.get_model())
+        self.worker = ChatWorker(self.client, self)
+        self.worker.delta.connect(self._on_delta)
+        self.worker.reply_ready.connect(self._on_reply)
+        self.worker.failed.connect(self._on_failed)
+        self.worker.busy_changed.connect(self._set_busy)
 
         # --- Widgets ---
-        self.history_view = QTextEdit(self)
-        self.history_view.setReadOnly(True)
+        self.history_view = TranscriptView(self)
         self.history_view.setPlaceholderText('Conversation will appear here...')
         self.input = QLineEdit(self)
         self.input.setPlaceholderText('Type a message...')
@@ -31,21 +49,25 @@ class ChatWindow(QWidget):
         self.send_btn.setMinimumHeight(32)
         self.send_btn.clicked.connect(self.on_send)
         self.input.returnPressed.connect(self.on_send)
+        self.stop_btn = QPushButton('Stop', self)
+        self.stop_btn.setMinimumHeight(32)
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(self.on_stop)
 
         # Header with name and model
-        title = QLabel(self.chat_name)
-        title.setObjectName('chatTitle')
-        subtitle = QLabel(self.settings.get_model())
-        subtitle.setObjectName('chatSubtitle')
+        self.title_label = QLabel(self.chat_name)
+        self.title_label.setObjectName('chatTitle')
+        self.subtitle_label = QLabel(self.settings.get_model())
+        self.subtitle_label.setObjectName('chatSubtitle')
 
         root = QVBoxLayout()
         root.setContentsMargins(16, 16, 16, 16)
         root.setSpacing(10)
 
         header = QHBoxLayout()
-        header.addWidget(title, 0)
+        header.addWidget(self.title_label, 0)
         header.addStretch(1)
-        header.addWidget(subtitle, 0, Qt.AlignRight)
+        header.addWidget(self.subtitle_label, 0, Qt.AlignRight)
         root.addLayout(header)
         root.addWidget(self.history_view, 1)
 
@@ -53,6 +75,7 @@ class ChatWindow(QWidget):
         row.setSpacing(10)
         row.addWidget(self.input, 1)
         row.addWidget(self.send_btn, 0)
+        row.addWidget(self.stop_btn, 0)
         root.addLayout(row)
         self.setLayout(root)
 
@@ -66,7 +89,7 @@ class ChatWindow(QWidget):
             QWidget { background-color: #0f1226; color: #e5e7ff; font-family: 'Segoe UI', 'Bahnschrift', sans-serif; }
             #chatTitle { font-size: 18px; font-weight: 700; color: #f5f6ff; }
             #chatSubtitle { font-size: 12px; color: #9aa3ff; padding-top: 4px; }
-            QTextEdit { background: #181b34; border: 2px solid #2a2f55; border-radius: 12px; padding: 10px; color: #e5e7ff; }
+            TranscriptView { background: #181b34; border: 2px solid #2a2f55; border-radius: 12px; padding: 10px; color: #e5e7ff; }
             QLineEdit { background: #181b34; border: 2px solid #2a2f55; border-radius: 12px; padding: 10px 12px; color: #e5e7ff; selection-background-color: #6c7bff; }
             QPushButton { background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #6c7bff, stop:1 #b26cff); border: none; border-radius: 12px; padding: 10px 16px; color: white; font-weight: 600; }
             QPushButton:hover { filter: brightness(1.1); }
@@ -76,85 +99,120 @@ class ChatWindow(QWidget):
         )
 
         # --- Typing animation state ---
-        self._typing_timer = QTimer(self)
-        self._typing_timer.setInterval(12)
-        self._typing_timer.timeout.connect(self._on_type_tick)
-        self._typing_text = ''
-        self._typing_index = 0
-        self._typing_active = False
+        self.typer = TypingRenderer(self.history_view, self)
+        self._stream_id = None
 
     def on_send(self):
         text = self.input.text().strip()
         if not text:
             return
         self.input.clear()
+        self.send_message(text)
+
+    def send_message(self, text: str, priority: int = INTERACTIVE) -> int:
         self.append_line('You', text)
+        # The user turn joins the history only when the request is dispatched,
+        # so a send queued behind another one includes the earlier reply.
+        return self.worker.submit(lambda: self._build_payload(text), priority)
+
+    def on_stop(self):
+        self.worker.cancel()
+        self._end_stream()
+        self.append_line('Info', 'Request cancelled.')
+
+    def _build_payload(self, text: str):
         self.messages.append({'role': 'user', 'content': text})
-        self._set_busy(True)
-        try:
-            reply = self.client.chat(self.messages)
-            self.messages.append({'role': 'assistant', 'content': reply})
+        # Full history stays local; only a token-bounded slice is sent
+        return self.context.fit(self.messages)
+
+    def _on_delta(self, request_id: int, text: str):
+        # Streamed replies are rendered on the next frame, without pacing
+        if self._stream_id != request_id:
+            self._start_reply(paced=False)
+            self._stream_id = request_id
+        self.typer.feed(text)
+
+    def _on_reply(self, request_id: int, reply: str):
+        self.messages.append({'role': 'assistant', 'content': reply})
+        if self._stream_id == request_id:
+            self._stream_id = None
+            self.typer.close()
+        else:
             self.animate_assistant(reply)
-        except Exception as e:
-            self.append_line('Error', str(e))
-            self._set_busy(False)
+
+    def _on_failed(self, request_id: int, message: str):
+        self._end_stream()
+        self.append_line('Error', message)
+
+    def closeEvent(self, event):
+        # Hide rather than destroy; ChatWindowManager re-shows this window
+        # with its history and client intact. In-flight replies still land.
+        event.ignore()
+        self.hide()
+
+    def _make_client(self):
+        config = (self.settings.get_api_key(), self.settings.get_model(), self.settings.get_cache_responses())
+        cache = ResponseCache.shared(app_data_dir('cache', 'responses')) if config[2] else None
+        # Every window's requests go through the one process-wide scheduler
+        client = ChatClient(config[0], config[1], cache=cache, scheduler=RequestScheduler.instance())
+        self._client_config = config
+        return client
+
+    def refresh_settings(self):
+        config = (self.settings.get_api_key(), self.settings.get_model(), self.settings.get_cache_responses())
+        if config != self._client_config and config != self._rejected_config:
+            try:
+                client = self._make_client()
+            except ValueError as e:
+                # e.g. the API key was cleared; keep the working client
+                self._rejected_config = config
+                self.append_line('Error', f'Settings not applied: {e}')
+            else:
+                self.client = client
+                self.worker.client = client
+                self.context = ContextWindow(client.model)
+                self.subtitle_label.setText(client.model)
+        name = self.settings.get_chat_name()
+        if name != self.chat_name:
+            self.chat_name = name
+            self.title_label.setText(name)
+            self.setWindowTitle(f'{name} — Chat')
+        persona = self.settings.get_persona()
+        if persona != self.system_prompt:
+            self.system_prompt = persona
+            if self.messages and self.messages[0].get('role') == 'system':
+                if persona:
+                    self.messages[0] = {'role': 'system', 'content': persona}
+                else:
+                    self.messages.pop(0)
+            elif persona:
+                self.messages.insert(0, {'role': 'system', 'content': persona})
 
     def append_line(self, speaker: str, content: str):
         label = self.chat_name if speaker == 'DeskMate' else speaker
-        self.history_view.append(f"<b>{label}:</b> {content}")
-        self.history_view.moveCursor(self.history_view.textCursor().End)
+        self.history_view.add_message(label, content)
 
     def _set_busy(self, is_busy: bool):
-        self.input.setDisabled(is_busy)
-        self.send_btn.setDisabled(is_busy)
-        self.send_btn.setText('Sending...' if is_busy else 'Send')
+        # Input stays enabled while busy; further sends are queued
+        self.stop_btn.setEnabled(is_busy)
+        self.send_btn.setText('Queue' if is_busy else 'Send')
+
+    def _end_stream(self):
+        self._stream_id = None
+        self.typer.finish()
 
     def animate_assistant(self, content: str):
         # Prepare a new line with label, then type the content
-        if self._typing_active:
-            self._typing_timer.stop()
-            self._typing_active = False
-        label = self.chat_name
-        # Ensure cursor at end, insert bold label and a space
-        cursor = self.history_view.textCursor()
-        cursor.movePosition(QTextCursor.End)
-        self.history_view.setTextCursor(cursor)
-        # Start a fresh paragraph for the assistant so it doesn't join the user's line
-        cursor.insertBlock()
-        self.history_view.setTextCursor(cursor)
-        self.history_view.insertHtml(f"<b>{label}:</b> ")
-        self._typing_text = content
-        self._typing_index = 0
-        self._typing_active = True
-        self._typing_timer.start()
-
-    def _on_type_tick(self):
-        if not self._typing_active:
-            return
-        # Type in small chunks for smoother effect
-        chunk_size = 3
-        typed = 0
-        while typed < chunk_size and self._typing_index < len(self._typing_text):
-            ch = self._typing_text[self._typing_index]
-            self._typing_index += 1
-            typed += 1
-            if ch == '\r':
-                # ignore CR in CRLF
-                continue
-            if ch == '\n':
-                # Start a new block for a visible line break
-                cursor = self.history_view.textCursor()
-                cursor.movePosition(QTextCursor.End)
-                self.history_view.setTextCursor(cursor)
-                cursor.insertBlock()
-            else:
-                self.history_view.insertPlainText(ch)
-            self.history_view.moveCursor(self.history_view.textCursor().End)
-        if self._typing_index >= len(self._typing_text):
-            self._typing_timer.stop()
-            self._typing_active = False
-            # Finish the line with a newline for spacing
-            self.history_view.append("")
-            self._set_busy(False)
-
-
+        self._start_reply(paced=True)
+        self.typer.feed(content)
+        self.typer.close()
+
+    def _start_reply(self, paced: bool):
+        # Flush whatever is left of the previous reply instead of truncating it
+        self.typer.finish()
+        self._begin_assistant_line()
+        self.typer.begin(paced=paced)
+
+    def _begin_assistant_line(self):
+        # A fresh, empty row that the typing renderer fills in
+        self.history_view.add_message(self.chat_name)
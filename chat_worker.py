@@ -0,0 +1,220 @@
+import time
+import logging
+import threading
+from collections import deque
+from PyQt5.QtCore import QObject, pyqtSignal
+try:
+    from .request_scheduler import RequestScheduler, RateLimited, INTERACTIVE  # type: ignore
+    from .context_window import message_tokens  # type: ignore
+    from . import app_logging  # type: ignore
+except Exception:
+    from request_scheduler import RequestScheduler, RateLimited, INTERACTIVE  # type: ignore
+    from context_window import message_tokens  # type: ignore
+    import app_logging  # type: ignore
+
+
+class _JobSignals(QObject):
+    delta = pyqtSignal(int, str)
+    finished = pyqtSignal(int, str)
+    failed = pyqtSignal(int, str)
+
+
+class _ChatJob:
+    # Runs on a RequestScheduler thread. A RateLimited error is passed up so
+    # the scheduler can retry, unless part of a reply was already shown.
+    def __init__(self, request_id: int, client, messages, cancel_event: threading.Event, signals: _JobSignals, stream: bool = False):
+        self.request_id = request_id
+        self.client = client
+        self.messages = messages
+        self.cancel_event = cancel_event
+        self.signals = signals
+        self.stream = stream
+        # perf_counter() when a scheduler thread picked the job up
+        self.dispatched_at = None
+
+    def __call__(self):
+        self.dispatched_at = time.perf_counter()
+        if self.cancel_event.is_set():
+            return None
+        return self._run_stream() if self.stream else self.client.chat(self.messages)
+
+    def done(self, future):
+        # Future callback; may run on a scheduler thread, signals are queued
+        if self.cancel_event.is_set() or future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self.signals.failed.emit(self.request_id, str(error))
+        else:
+            self.signals.finished.emit(self.request_id, future.result())
+
+    def _run_stream(self) -> str:
+        parts = []
+        deltas = self.client.chat_stream(self.messages)
+        try:
+            for delta in deltas:
+                if self.cancel_event.is_set():
+                    break
+                parts.append(delta)
+                self.signals.delta.emit(self.request_id, delta)
+        except RateLimited as e:
+            if parts:
+                raise RuntimeError(str(e)) from None
+            raise
+        finally:
+            deltas.close()
+        reply = ''.join(parts)
+        if not reply and not self.cancel_event.is_set():
+            raise RuntimeError('No content in assistant message')
+        return reply
+
+
+class ChatWorker(QObject):
+    # Sits between ChatWindow and ChatClient: sends are queued and run one at a
+    # time through the process-wide RequestScheduler; results come back as
+    # signals on the GUI thread.
+    started = pyqtSignal(int)
+    delta = pyqtSignal(int, str)
+    reply_ready = pyqtSignal(int, str)
+    failed = pyqtSignal(int, str)
+    cancelled = pyqtSignal(int)
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, client, parent=None, stream: bool = True):
+        super().__init__(parent)
+        self.client = client
+        # Stream deltas when the client supports it; the full reply is still
+        # delivered through reply_ready once the response completes.
+        self.stream = bool(stream) and hasattr(client, 'chat_stream')
+        self.scheduler = RequestScheduler.instance()
+        self._signals = _JobSignals(self)
+        self._signals.delta.connect(self._on_delta)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+        self._queue = deque()
+        self._active_id = None
+        self._active_cancel = None
+        self._active_future = None
+        self._active_job = None
+        self._active_at = 0.0
+        self._first_delta_at = None
+        self._next_id = 1
+
+    def submit(self, messages, priority: int = INTERACTIVE) -> int:
+        # `messages` may be a list or a zero-argument callable that builds the
+        # payload when the request is dispatched, so queued sends see replies
+        # to earlier ones. Interactive sends go ahead of background ones
+        # (from any window) while the scheduler is holding requests back.
+        request_id = self._next_id
+        self._next_id += 1
+        self._queue.append((request_id, messages, priority))
+        was_busy = self.is_busy()
+        self._pump()
+        if not was_busy and self.is_busy():
+            self.busy_changed.emit(True)
+        return request_id
+
+    def cancel(self, request_id: int = None) -> None:
+        # Without an id, cancel the in-flight request and everything queued.
+        if request_id is None:
+            queued = [item[0] for item in self._queue]
+            self._queue.clear()
+            for rid in queued:
+                self.cancelled.emit(rid)
+            if self._active_id is not None:
+                self._cancel_active()
+        elif request_id == self._active_id:
+            self._cancel_active()
+        else:
+            for item in list(self._queue):
+                if item[0] == request_id:
+                    self._queue.remove(item)
+                    self.cancelled.emit(request_id)
+                    break
+        self._pump()
+        if not self.is_busy():
+            self.busy_changed.emit(False)
+
+    def is_busy(self) -> bool:
+        return self._active_id is not None or bool(self._queue)
+
+    def pending_count(self) -> int:
+        return len(self._queue) + (1 if self._active_id is not None else 0)
+
+    def _cancel_active(self):
+        rid = self._active_id
+        if self._active_cancel is not None:
+            self._active_cancel.set()
+        if self._active_future is not None:
+            # Never starts if the scheduler had not dispatched it yet
+            self._active_future.cancel()
+        self._record('cancelled')
+        self._active_id = None
+        self._active_cancel = None
+        self._active_future = None
+        self._active_job = None
+        logging.info('Chat request %s cancelled', rid)
+        self.cancelled.emit(rid)
+
+    def _pump(self):
+        if self._active_id is not None or not self._queue:
+            return
+        request_id, messages, priority = self._queue.popleft()
+        try:
+            payload = messages() if callable(messages) else list(messages)
+        except Exception as e:
+            self.failed.emit(request_id, str(e))
+            self._pump()
+            return
+        self._active_id = request_id
+        self._active_cancel = threading.Event()
+        job = _ChatJob(request_id, self.client, payload, self._active_cancel, self._signals, self.stream)
+        tokens = sum(message_tokens(m) for m in payload)
+        self._active_job = job
+        self._active_at = time.perf_counter()
+        self._first_delta_at = None
+        self._active_future = self.scheduler.submit(job, priority=priority, tokens=tokens)
+        self._active_future.add_done_callback(job.done)
+        self.started.emit(request_id)
+
+    def _complete(self):
+        self._active_id = None
+        self._active_cancel = None
+        self._active_future = None
+        self._active_job = None
+        self._pump()
+        if not self.is_busy():
+            self.busy_changed.emit(False)
+
+    def _record(self, outcome: str, chars: int = 0):
+        # One 'chat' timing event per request: time queued behind the
+        # scheduler, to the first streamed delta, and in total
+        now = time.perf_counter()
+        job = self._active_job
+        fields = {'outcome': outcome, 'stream': self.stream, 'chars': chars,
+                  'total_ms': round((now - self._active_at) * 1000.0, 1)}
+        if job is not None and job.dispatched_at is not None:
+            fields['queued_ms'] = round((job.dispatched_at - self._active_at) * 1000.0, 1)
+        if self._first_delta_at is not None:
+            fields['first_delta_ms'] = round((self._first_delta_at - self._active_at) * 1000.0, 1)
+        app_logging.event('chat', **fields)
+
+    def _on_delta(self, request_id: int, text: str):
+        if request_id == self._active_id:
+            if self._first_delta_at is None:
+                self._first_delta_at = time.perf_counter()
+            self.delta.emit(request_id, text)
+
+    def _on_finished(self, request_id: int, reply: str):
+        if request_id != self._active_id:
+            return
+        self._record('ok', len(reply or ''))
+        self.reply_ready.emit(request_id, reply)
+        self._complete()
+
+    def _on_failed(self, request_id: int, message: str):
+        if request_id != self._active_id:
+            return
+        self._record('error')
+        self.failed.emit(request_id, message)
+        self._complete()
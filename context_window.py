@@ -0,0 +1,113 @@
+import logging
+
+# Prompt-token budgets per model family (longest matching prefix wins). These
+# sit well below the real context limits so request size and cost stay flat
+# over a long session and there is room left for the reply.
+MODEL_TOKEN_BUDGETS = {
+    'gpt-4o-mini': 12000,
+    'gpt-4o': 12000,
+    'gpt-4.1': 12000,
+    'gpt-4-turbo': 12000,
+    'gpt-4': 6000,
+    'gpt-3.5-turbo': 8000,
+    'o1': 12000,
+    'o3': 12000,
+}
+DEFAULT_TOKEN_BUDGET = 6000
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_token_cache = {}
+_TOKEN_CACHE_LIMIT = 4096
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four ASCII characters per token; other scripts (CJK, emoji)
+    # tend to be about one token per character.
+    if not text:
+        return 0
+    ascii_chars = len(text.encode('ascii', 'ignore'))
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def message_tokens(message: dict) -> int:
+    content = message.get('content') or ''
+    key = (message.get('role', ''), content)
+    count = _token_cache.get(key)
+    if count is None:
+        if len(_token_cache) >= _TOKEN_CACHE_LIMIT:
+            _token_cache.clear()
+        count = estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        _token_cache[key] = count
+    return count
+
+
+def budget_for_model(model: str) -> int:
+    name = (model or '').lower()
+    best = None
+    for prefix in MODEL_TOKEN_BUDGETS:
+        if name.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return MODEL_TOKEN_BUDGETS[best] if best else DEFAULT_TOKEN_BUDGET
+
+
+class ContextWindow:
+    # Builds a bounded request payload from the full conversation: leading
+    # system messages (the persona) and the newest turns are always kept, the
+    # oldest turns are condensed into a short note or dropped.
+    SUMMARY_FRACTION = 0.1
+    SUMMARY_SNIPPET_CHARS = 160
+
+    def __init__(self, model: str = '', budget: int = None):
+        self.model = model
+        self.budget = int(budget) if budget else budget_for_model(model)
+
+    def fit(self, messages):
+        messages = list(messages)
+        head = []
+        for msg in messages:
+            if msg.get('role') != 'system':
+                break
+            head.append(msg)
+        turns = messages[len(head):]
+        used = sum(message_tokens(m) for m in head)
+        total = used + sum(message_tokens(m) for m in turns)
+        if total <= self.budget:
+            return messages
+
+        summary_budget = int(self.budget * self.SUMMARY_FRACTION)
+        remaining = self.budget - used - summary_budget
+        kept = []
+        for msg in reversed(turns):
+            cost = message_tokens(msg)
+            # The newest turn is always sent, even if it alone is over budget
+            if kept and cost > remaining:
+                break
+            kept.append(msg)
+            remaining -= cost
+        kept.reverse()
+        dropped = turns[:len(turns) - len(kept)]
+        summary = self._condense(dropped, summary_budget)
+        logging.info('Context trimmed: %d of %d turns sent (~%d token budget)', len(kept), len(turns), self.budget)
+        return head + ([summary] if summary else []) + kept
+
+    def _condense(self, dropped, budget: int):
+        # Newest dropped turns are the most relevant, so fill from the end
+        if not dropped or budget <= MESSAGE_OVERHEAD_TOKENS:
+            return None
+        header = 'Earlier conversation (condensed):'
+        remaining = budget - MESSAGE_OVERHEAD_TOKENS - estimate_tokens(header)
+        lines = []
+        for msg in reversed(dropped):
+            text = ' '.join((msg.get('content') or '').split())
+            if len(text) > self.SUMMARY_SNIPPET_CHARS:
+                text = text[:self.SUMMARY_SNIPPET_CHARS].rstrip() + '...'
+            line = f"- {msg.get('role', 'user')}: {text}"
+            cost = estimate_tokens(line) + 1
+            if cost > remaining:
+                break
+            lines.append(line)
+            remaining -= cost
+        if not lines:
+            return None
+        lines.reverse()
+        return {'role': 'system', 'content': header + '\n' + '\n'.join(lines)}
@@ -0,0 +1,218 @@
+import os
+import math
+import weakref
+from PyQt5.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QAction, QStyle
+from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import QObject, pyqtSignal
+try:
+    from .utils import resource_path  # type: ignore
+    from .startup_windows import WindowsStartupManager  # type: ignore
+    from .animation_clock import AnimationClock  # type: ignore
+    from . import power_policy  # type: ignore
+except Exception:
+    from utils import resource_path  # type: ignore
+    from startup_windows import WindowsStartupManager  # type: ignore
+    from animation_clock import AnimationClock  # type: ignore
+    import power_policy  # type: ignore
+
+
+class DeskmateHost(QObject):
+    # Runs any number of characters in one process. Owns what used to be
+    # per-class state on CharacterWidget (tray icon and actions, the current
+    # character, the launcher) and drives idle bobbing for every character
+    # from one tick on the shared AnimationClock. Decoders, players and frame
+    # caches are already shared per file by the AssetRegistry, so an extra
+    # character showing the same GIF costs a window and its small state.
+    # A character was taken off the desktop; its widget is about to go away
+    removed = pyqtSignal(object)
+    BOB_INTERVAL_MS = 50
+    BOB_REDUCED_INTERVAL_MS = 200
+
+    _instance = None
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._deskmates = []
+        self._current = None
+        self.launcher_ref = None
+        # Builds the launcher on demand when the app was started in tray mode
+        self.launcher_factory = None
+        self.tray_icon = None
+        self.tray_menu = None
+        self.actions = {}
+        self.clock = AnimationClock.instance()
+        self._bob_pending = None
+        self.power_policy = power_policy.PowerPolicy.instance()
+        self.power_policy.modeChanged.connect(self.update_bobbing)
+
+    @classmethod
+    def instance(cls) -> 'DeskmateHost':
+        if cls._instance is None:
+            cls._instance = DeskmateHost()
+        return cls._instance
+
+    # --- Characters ---
+
+    def add(self, gif_path: str = None, launcher=None):
+        try:
+            from .character_widget import CharacterWidget  # type: ignore
+        except Exception:
+            from character_widget import CharacterWidget  # type: ignore
+        if launcher is not None:
+            self.launcher_ref = weakref.ref(launcher)
+        widget = CharacterWidget(gif_path, host=self)
+        # Spread the idle bobbing so several characters don't move in lockstep
+        widget.state.bob_phase_ms = len(self._deskmates) * 977
+        self._deskmates.append(widget)
+        self.set_current(widget)
+        self.ensure_tray()
+        return widget
+
+    def remove(self, widget) -> None:
+        # Widgets already removed (and possibly deleted) are ignored
+        if widget is None or widget not in self._deskmates:
+            return
+        self._deskmates.remove(widget)
+        if self.current() is widget:
+            self._current = weakref.ref(self._deskmates[-1]) if self._deskmates else None
+        launcher = self.launcher_ref() if self.launcher_ref else None
+        if launcher is not None and launcher.deskmate is widget:
+            launcher.deskmate = None
+        self.removed.emit(widget)
+        widget.release()
+        self.update_bobbing()
+        self.sync_tray_state()
+
+    def deskmates(self):
+        return list(self._deskmates)
+
+    def current(self):
+        return self._current() if self._current is not None else None
+
+    def set_current(self, widget) -> None:
+        self._current = weakref.ref(widget)
+
+    def get_launcher(self):
+        l = self.launcher_ref() if self.launcher_ref else None
+        if l is None and self.launcher_factory is not None:
+            l = self.launcher_factory()
+            self.launcher_ref = weakref.ref(l)
+        return l
+
+    def show_launcher(self) -> None:
+        l = self.get_launcher()
+        if l is not None:
+            l.show()
+            l.raise_()
+            l.activateWindow()
+
+    def show_all(self) -> None:
+        for w in self._deskmates:
+            w.showNormal()
+
+    def hide_all(self) -> None:
+        for w in self._deskmates:
+            w.hide()
+
+    # --- Idle bobbing ---
+
+    def update_bobbing(self, *_):
+        # One clock tick for every bobbing character; none when nobody bobs
+        mode = self.power_policy.mode
+        wanted = mode != power_policy.PAUSED and any(w.wants_bob() for w in self._deskmates)
+        if not wanted:
+            if self._bob_pending is not None:
+                self.clock.cancel(self._bob_pending)
+                self._bob_pending = None
+            for w in self._deskmates:
+                w.set_bob_offset(0)
+            return
+        if self._bob_pending is None:
+            self._bob_pending = self.clock.call_later(0, self._bob_tick)
+
+    def _bob_tick(self):
+        self._bob_pending = None
+        now = self.clock.now()
+        for w in self._deskmates:
+            if w.wants_bob():
+                w.set_bob_offset(self.bob_offset(now + w.state.bob_phase_ms, w.BOB_AMPLITUDE, w.BOB_PERIOD_MS))
+        reduced = self.power_policy.mode == power_policy.REDUCED
+        interval = self.BOB_REDUCED_INTERVAL_MS if reduced else self.BOB_INTERVAL_MS
+        self._bob_pending = self.clock.call_later(interval, self._bob_tick)
+
+    @staticmethod
+    def bob_offset(t_ms: int, amplitude: int, period_ms: int) -> int:
+        # Offset follows elapsed time, so a late tick never accumulates drift
+        phase = (t_ms % period_ms) / period_ms
+        return int(round(amplitude * math.sin(phase * 2 * math.pi)))
+
+    # --- Tray ---
+
+    def ensure_tray(self) -> None:
+        if not QSystemTrayIcon.isSystemTrayAvailable():
+            return
+        if self.tray_icon is not None:
+            return
+        self.tray_icon = QSystemTrayIcon()
+        icon_path = resource_path('Icon.png')
+        icon = QIcon(icon_path) if os.path.exists(icon_path) else QApplication.style().standardIcon(QStyle.SP_ComputerIcon)
+        self.tray_icon.setIcon(icon)
+        QApplication.instance().setWindowIcon(icon)
+        self.tray_icon.setToolTip('VirtualDeskmate')
+
+        self.tray_menu = QMenu()
+        show = QAction('Show', self)
+        hide = QAction('Hide', self)
+        show_launcher = QAction('Show Launcher', self)
+        startup = QAction('Start with Windows', self, checkable=True)
+        chat = QAction('Open Chat', self)
+        quit_ = QAction('Quit', self)
+        self.actions = {'show': show, 'hide': hide, 'show_launcher': show_launcher,
+                        'startup': startup, 'chat': chat, 'quit': quit_}
+
+        show.triggered.connect(self.show_all)
+        hide.triggered.connect(self.hide_all)
+        show_launcher.triggered.connect(self.show_launcher)
+        startup.setChecked(WindowsStartupManager.is_enabled())
+        startup.toggled.connect(WindowsStartupManager.set_enabled)
+        chat.triggered.connect(self._open_chat)
+        quit_.triggered.connect(QApplication.instance().quit)
+
+        self.tray_menu.addAction(show)
+        self.tray_menu.addAction(hide)
+        self.tray_menu.addAction(show_launcher)
+        self.tray_menu.addAction(startup)
+        self.tray_menu.addSeparator()
+        self.tray_menu.addAction(chat)
+        self.tray_menu.addAction(quit_)
+        self.tray_icon.setContextMenu(self.tray_menu)
+        self.tray_icon.activated.connect(self._on_tray_activated)
+        self.tray_icon.show()
+
+    def _on_tray_activated(self, reason):
+        if reason == QSystemTrayIcon.Trigger and self._deskmates:
+            if all(w.isHidden() for w in self._deskmates):
+                self.show_all()
+            else:
+                self.hide_all()
+
+    def _open_chat(self):
+        try:
+            from chat_manager import ChatWindowManager
+        except Exception:
+            from .chat_manager import ChatWindowManager  # type: ignore
+        # Always open as a top-level window; reuses the warm one if any
+        ChatWindowManager.instance().open()
+
+    def sync_tray_state(self) -> None:
+        if self.tray_icon is None:
+            return
+        w = self.current()
+        state = []
+        if len(self._deskmates) > 1:
+            state.append(f'{len(self._deskmates)} deskmates')
+        if w is not None:
+            if w.state.drag_locked:
+                state.append('Locked')
+            state.append(f"{int(w.windowOpacity()*100)}%")
+        self.tray_icon.setToolTip('VirtualDeskmate - ' + ', '.join(state) if state else 'VirtualDeskmate')
@@ -0,0 +1,118 @@
+from collections import OrderedDict
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QPixmap, QBitmap, QRegion
+
+
+class ScaledFrameCache:
+    # Animation frames rasterized once at a display size, keyed by
+    # (width, height, frame index), with LRU eviction under a byte cap.
+    def __init__(self, max_bytes: int = 96 * 1024 * 1024):
+        self.max_bytes = int(max_bytes)
+        self._frames = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _cost(pixmap: QPixmap) -> int:
+        return pixmap.width() * pixmap.height() * 4
+
+    def get(self, index: int, size: QSize):
+        key = (size.width(), size.height(), index)
+        pixmap = self._frames.get(key)
+        if pixmap is not None:
+            self._frames.move_to_end(key)
+            self.hits += 1
+        return pixmap
+
+    def put(self, index: int, size: QSize, pixmap: QPixmap) -> None:
+        key = (size.width(), size.height(), index)
+        old = self._frames.pop(key, None)
+        if old is not None:
+            self._bytes -= self._cost(old)
+        self._frames[key] = pixmap
+        self._bytes += self._cost(pixmap)
+        while self._bytes > self.max_bytes and len(self._frames) > 1:
+            _, evicted = self._frames.popitem(last=False)
+            self._bytes -= self._cost(evicted)
+
+    def scaled(self, index: int, size: QSize, image_fn) -> QPixmap:
+        # image_fn is only called on a miss and returns the source QImage
+        pixmap = self.get(index, size)
+        if pixmap is None:
+            self.misses += 1
+            image = image_fn()
+            pixmap = QPixmap.fromImage(image.scaled(size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+            self.put(index, size, pixmap)
+        return pixmap
+
+    def discard_size(self, size: QSize) -> None:
+        drop = (size.width(), size.height())
+        for key in [k for k in self._frames if k[:2] == drop]:
+            self._bytes -= self._cost(self._frames.pop(key))
+
+    def retain_size(self, size: QSize) -> None:
+        # Frees frames rasterized for any other size
+        keep = (size.width(), size.height())
+        for key in [k for k in self._frames if k[:2] != keep]:
+            self._bytes -= self._cost(self._frames.pop(key))
+
+    def clear(self) -> None:
+        self._frames.clear()
+        self._bytes = 0
+
+    def memory_bytes(self) -> int:
+        return self._bytes
+
+
+class HitMaskCache:
+    # Per-frame input regions (the frame's visible pixels) at a display size,
+    # keyed like ScaledFrameCache. Each is built once from the scaled frame's
+    # alpha; a QRegion is a short list of rectangles, so thousands fit in a
+    # few MB and swapping one in as frames advance costs no pixel work.
+    ALPHA_THRESHOLD_FLAGS = Qt.ThresholdAlphaDither
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024):
+        self.max_bytes = int(max_bytes)
+        self._regions = OrderedDict()
+        self._bytes = 0
+
+    @staticmethod
+    def _cost(region: QRegion) -> int:
+        return 16 * max(1, region.rectCount())
+
+    @classmethod
+    def build(cls, pixmap: QPixmap) -> QRegion:
+        mask = pixmap.toImage().createAlphaMask(cls.ALPHA_THRESHOLD_FLAGS)
+        region = QRegion(QBitmap.fromImage(mask))
+        if region.isEmpty():
+            # An empty mask would mean "no mask"; keep one pixel instead
+            region = QRegion(0, 0, 1, 1)
+        return region
+
+    def region(self, index: int, size: QSize, pixmap_fn) -> QRegion:
+        # pixmap_fn is only called on a miss and returns the scaled frame
+        key = (size.width(), size.height(), index)
+        region = self._regions.get(key)
+        if region is not None:
+            self._regions.move_to_end(key)
+            return region
+        region = self.build(pixmap_fn())
+        self._regions[key] = region
+        self._bytes += self._cost(region)
+        while self._bytes > self.max_bytes and len(self._regions) > 1:
+            _, evicted = self._regions.popitem(last=False)
+            self._bytes -= self._cost(evicted)
+        return region
+
+    def discard_size(self, size: QSize) -> None:
+        drop = (size.width(), size.height())
+        for key in [k for k in self._regions if k[:2] == drop]:
+            self._bytes -= self._cost(self._regions.pop(key))
+
+    def clear(self) -> None:
+        self._regions.clear()
+        self._bytes = 0
+
+    def memory_bytes(self) -> int:
+        return self._bytes
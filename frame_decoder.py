@@ -0,0 +1,134 @@
+import logging
+import threading
+import itertools
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt5.QtGui import QImage
+try:
+    from .frame_store import DEFAULT_DELAY_MS  # type: ignore
+except Exception:
+    from frame_store import DEFAULT_DELAY_MS  # type: ignore
+
+
+class ProgressiveAnimation:
+    # Frame source that fills in while its file is decoded in the background.
+    # Frames are held in memory only until the finished store entry replaces
+    # this source.
+    def __init__(self):
+        self.frames = []
+        self.delays = []
+        self.complete = False
+        # Not known until decoding ends; the store entry that replaces this
+        # source carries the file's value
+        self.loop_count = -1
+
+    def add_frame(self, image: QImage, delay: int) -> None:
+        self.frames.append(image)
+        self.delays.append(int(delay))
+
+    def frame_count(self) -> int:
+        return len(self.frames)
+
+    def is_complete(self) -> bool:
+        return self.complete
+
+    def frame_size(self):
+        return self.frames[0].size() if self.frames else None
+
+    def frame_delay(self, index: int) -> int:
+        delay = self.delays[index]
+        return delay if delay > 0 else DEFAULT_DELAY_MS
+
+    def frame_image(self, index: int) -> QImage:
+        return self.frames[index]
+
+    def close(self) -> None:
+        self.frames = []
+        self.delays = []
+
+
+class _DecodeSignals(QObject):
+    frame = pyqtSignal(int, int, QImage, int)
+    finished = pyqtSignal(int, bool)
+
+
+class _DecodeJob(QRunnable):
+    def __init__(self, job_id: int, store, path: str, cancel_event: threading.Event, signals: _DecodeSignals):
+        super().__init__()
+        self.setAutoDelete(True)
+        self.job_id = job_id
+        self.store = store
+        self.path = path
+        self.cancel_event = cancel_event
+        self.signals = signals
+
+    def run(self):
+        if self.cancel_event.is_set():
+            return
+        try:
+            animation = self.store.build(self.path, self._on_frame, self.cancel_event.is_set)
+        except Exception:
+            logging.exception('Decoding %s failed', self.path)
+            animation = None
+        ok = animation is not None
+        if ok:
+            # The GUI thread maps the finished entry itself
+            animation.close()
+        if not self.cancel_event.is_set():
+            self.signals.finished.emit(self.job_id, ok)
+
+    def _on_frame(self, index, image, delay):
+        if not self.cancel_event.is_set():
+            self.signals.frame.emit(self.job_id, index, image, delay)
+
+
+class FrameDecoder(QObject):
+    # Decodes animations into the frame store on pool threads and hands each
+    # frame to the GUI thread as soon as it is ready, so a window can show the
+    # first frame while the rest of a large file is still decoding.
+    _instance = None
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max(1, min(2, QThreadPool.globalInstance().maxThreadCount())))
+        self._signals = _DecodeSignals(self)
+        self._signals.frame.connect(self._on_frame)
+        self._signals.finished.connect(self._on_finished)
+        self._ids = itertools.count(1)
+        self._jobs = {}
+
+    @classmethod
+    def instance(cls) -> 'FrameDecoder':
+        if cls._instance is None:
+            cls._instance = FrameDecoder()
+        return cls._instance
+
+    def decode(self, store, path: str, on_frame, on_finished) -> int:
+        # on_frame(index, image, delay) and on_finished(ok) run on the GUI thread
+        job_id = next(self._ids)
+        cancel_event = threading.Event()
+        self._jobs[job_id] = (cancel_event, on_frame, on_finished)
+        self._pool.start(_DecodeJob(job_id, store, path, cancel_event, self._signals))
+        return job_id
+
+    def cancel(self, job_id) -> None:
+        # Frames already queued for a cancelled job are dropped on arrival
+        job = self._jobs.pop(job_id, None)
+        if job is not None:
+            job[0].set()
+
+    def pending(self) -> int:
+        return len(self._jobs)
+
+    def wait(self, msecs: int = -1) -> bool:
+        return self._pool.waitForDone(msecs)
+
+    def _on_frame(self, job_id, index, image, delay):
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job[1](index, image, delay)
+
+    def _on_finished(self, job_id, ok):
+        job = self._jobs.pop(job_id, None)
+        if job is not None:
+            job[2](ok)
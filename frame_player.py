@@ -0,0 +1,204 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+try:
+    from .animation_clock import AnimationClock  # type: ignore
+except Exception:
+    from animation_clock import AnimationClock  # type: ignore
+
+
+class FramePlayer(QObject):
+    # Steps through the frames of an animation source (anything with
+    # frame_count(), is_complete(), frame_delay(i) and frame_image(i)),
+    # honoring each frame's delay. Replaces QMovie so frames can come from the
+    # frame store. While a source is still decoding, playback holds on its
+    # last frame until source_updated() reports more.
+    # With a minimum frame interval set (a max FPS), frames that would be
+    # shown for less than that are skipped while the animation keeps
+    # wall-clock time. A speed multiplier scales every frame's delay.
+    # Frames are scheduled on the shared AnimationClock rather than a timer
+    # of its own. loop_count follows QImageReader/QMovie: -1 loops forever,
+    # otherwise the animation plays loop_count + 1 times and stops on its
+    # last frame.
+    frameChanged = pyqtSignal(int)
+    MIN_SPEED = 0.25
+    MAX_SPEED = 4.0
+
+    def __init__(self, source=None, parent=None):
+        super().__init__(parent)
+        self.source = None
+        self._index = -1
+        self._paused = False
+        self._running = False
+        self._min_interval = 0
+        self._speed = 1.0
+        self._interval = 0
+        self._carry = 0
+        self._cycle_ms = 0
+        self._clock = AnimationClock.instance()
+        self._scheduled_at = 0
+        self._pending = None
+        self._waiting = False
+        self._loop_limit = 0
+        self._loops = 0
+        self._finished = False
+        if source is not None:
+            self.set_source(source)
+
+    def set_source(self, source) -> None:
+        self._cancel()
+        self.source = source
+        self._index = -1
+        self._loops = 0
+        self._finished = False
+        self._update_cycle()
+        if self._running:
+            self.start()
+
+    def replace_source(self, source) -> None:
+        # Same frames from a different source (e.g. the finished store
+        # entry replacing a progressive decode); playback position is kept
+        self.source = source
+        self.source_updated()
+
+    def source_updated(self) -> None:
+        # Frames were added to the source, or it finished decoding
+        self._update_cycle()
+        if not self._running or not self.is_valid():
+            return
+        if self._index < 0:
+            self.start()
+        elif self._waiting and not self._paused and not self._finished:
+            self._schedule()
+
+    def _update_cycle(self):
+        self._cycle_ms = 0
+        # Total plays, or 0 for no limit
+        loop_count = int(getattr(self.source, 'loop_count', -1))
+        self._loop_limit = 0 if loop_count < 0 else loop_count + 1
+        if self.is_valid() and self.source.is_complete():
+            self._cycle_ms = sum(self._delay(i) for i in range(self.source.frame_count()))
+
+    def is_valid(self) -> bool:
+        return self.source is not None and self.source.frame_count() > 0
+
+    def is_finished(self) -> bool:
+        # Stopped on the last frame after loop_count + 1 plays
+        return self._finished
+
+    def current_frame(self) -> int:
+        return self._index
+
+    def current_image(self):
+        return self.source.frame_image(self._index)
+
+    def set_min_frame_interval(self, ms: int) -> None:
+        self._min_interval = max(0, int(ms))
+
+    def min_frame_interval(self) -> int:
+        return self._min_interval
+
+    def set_speed(self, speed: float) -> None:
+        self._speed = max(self.MIN_SPEED, min(self.MAX_SPEED, float(speed)))
+        self._update_cycle()
+
+    def speed(self) -> float:
+        return self._speed
+
+    def _delay(self, index: int) -> int:
+        return max(1, int(round(self.source.frame_delay(index) / self._speed)))
+
+    def start(self) -> None:
+        self._running = True
+        if not self.is_valid():
+            return
+        self._index = 0
+        self._carry = 0
+        self._loops = 0
+        self._finished = False
+        self.frameChanged.emit(self._index)
+        if not self._paused:
+            self._schedule()
+
+    def stop(self) -> None:
+        self._running = False
+        self._cancel()
+
+    def set_paused(self, paused: bool) -> None:
+        paused = bool(paused)
+        if paused == self._paused:
+            return
+        self._paused = paused
+        if paused:
+            self._cancel()
+        elif self._running and self.is_valid() and not self._finished:
+            self._carry = 0
+            self._schedule()
+
+    def is_paused(self) -> bool:
+        return self._paused
+
+    def _cancel(self):
+        if self._pending is not None:
+            self._clock.cancel(self._pending)
+            self._pending = None
+
+    def _schedule(self):
+        self._cancel()
+        self._waiting = False
+        if self.source.frame_count() <= 1:
+            self._waiting = not self.source.is_complete()
+            return
+        delay = self._delay(self._index) - self._carry
+        self._interval = max(1, delay, self._min_interval)
+        self._scheduled_at = self._clock.now()
+        self._pending = self._clock.call_later(self._interval, self._advance)
+
+    def _advance(self):
+        self._pending = None
+        if not self.is_valid():
+            return
+        count = self.source.frame_count()
+        complete = self.source.is_complete()
+        total = self._carry + max(self._interval, self._clock.now() - self._scheduled_at)
+        limit = self._loop_limit if complete else 0
+        index = self._index
+        if complete and self._cycle_ms and total > self._cycle_ms:
+            # e.g. after a long stall; skip whole loops
+            skipped = int(total // self._cycle_ms)
+            total %= self._cycle_ms
+            if limit and self._loops + skipped >= limit:
+                self._finish(count - 1)
+                return
+            self._loops += skipped
+        delay = self._delay(index)
+        stepped = False
+        while total >= delay or not stepped:
+            if index + 1 >= count:
+                if not complete:
+                    # The next frame is still decoding
+                    total = 0
+                    break
+                if limit and self._loops + 1 >= limit:
+                    self._finish(index)
+                    return
+                self._loops += 1
+            total = max(0, total - delay)
+            index = (index + 1) % count
+            delay = self._delay(index)
+            stepped = True
+        self._carry = total
+        if not stepped:
+            self._waiting = True
+            return
+        self._index = index
+        self.frameChanged.emit(index)
+        if not self._paused:
+            self._schedule()
+
+    def _finish(self, index: int):
+        # Played loop_count + 1 times; hold on the last frame
+        self._finished = True
+        self._waiting = False
+        self._carry = 0
+        if index != self._index:
+            self._index = index
+            self.frameChanged.emit(index)
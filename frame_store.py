@@ -0,0 +1,229 @@
+import os
+import json
+import mmap
+import time
+import shutil
+import hashlib
+import tempfile
+import logging
+from PyQt5.QtCore import QSize
+from PyQt5.QtGui import QImage, QImageReader
+try:
+    from .utils import app_data_dir  # type: ignore
+    from . import sprite_atlas  # type: ignore
+    from . import app_logging  # type: ignore
+except Exception:
+    from utils import app_data_dir  # type: ignore
+    import sprite_atlas  # type: ignore
+    import app_logging  # type: ignore
+
+STORE_VERSION = 1
+FRAME_FORMAT = QImage.Format_ARGB32_Premultiplied
+DEFAULT_DELAY_MS = 100
+
+
+class StoredAnimation:
+    # Read-only view over one store entry. Frame pixels stay in the
+    # memory-mapped file and are paged in by the OS when a frame is drawn;
+    # frame_image() wraps them without copying, so an image is only valid
+    # while this object is open.
+    def __init__(self, directory: str, meta: dict):
+        self.directory = directory
+        self.meta = meta
+        self.width = int(meta['width'])
+        self.height = int(meta['height'])
+        self.bytes_per_line = int(meta['bytes_per_line'])
+        self.frame_bytes = self.bytes_per_line * self.height
+        self.delays = [int(d) for d in meta['delays']]
+        self.loop_count = int(meta.get('loop_count', -1))
+        self._file = open(os.path.join(directory, 'frames.bin'), 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+    def frame_count(self) -> int:
+        return len(self.delays)
+
+    def is_complete(self) -> bool:
+        return True
+
+    def frame_size(self) -> QSize:
+        return QSize(self.width, self.height)
+
+    def frame_delay(self, index: int) -> int:
+        delay = self.delays[index]
+        return delay if delay > 0 else DEFAULT_DELAY_MS
+
+    def frame_image(self, index: int) -> QImage:
+        offset = index * self.frame_bytes
+        return QImage(self._view[offset:offset + self.frame_bytes], self.width, self.height,
+                      self.bytes_per_line, FRAME_FORMAT)
+
+    def close(self) -> None:
+        if self._map is None:
+            return
+        try:
+            self._view.release()
+            self._map.close()
+        except BufferError:
+            # A frame image still references the mapping; let GC reclaim it
+            pass
+        self._file.close()
+        self._map = None
+
+
+class FrameStore:
+    # Decoded animation frames on disk, keyed by source path, mtime and size,
+    # so a relaunch maps the frames instead of decoding the GIF again.
+    def __init__(self, root: str = None, max_bytes: int = 1024 * 1024 * 1024):
+        self.root = root or app_data_dir('cache', 'frames')
+        self.max_bytes = int(max_bytes)
+
+    def key_for(self, path: str) -> str:
+        # An atlas entry also depends on the image its manifest points at
+        parts = [str(STORE_VERSION)]
+        for source in sprite_atlas.source_files(path):
+            st = os.stat(source)
+            parts.append(f'{os.path.abspath(source)}|{st.st_mtime_ns}|{st.st_size}')
+        return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def can_decode(path: str) -> bool:
+        # Header-only check, cheap enough for the GUI thread
+        if sprite_atlas.is_manifest(path):
+            return sprite_atlas.can_read(path)
+        return QImageReader(path).canRead()
+
+    def entry_dir(self, path: str) -> str:
+        return os.path.join(self.root, self.key_for(path))
+
+    def open(self, path: str):
+        try:
+            directory = self.entry_dir(path)
+            with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') != STORE_VERSION:
+                return None
+            # Touch so pruning treats this entry as recently used
+            os.utime(os.path.join(directory, 'meta.json'), None)
+            return StoredAnimation(directory, meta)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def load(self, path: str):
+        if not path or not os.path.exists(path):
+            return None
+        return self.open(path) or self.build(path)
+
+    def build(self, path: str, on_frame=None, cancelled=None):
+        # on_frame(index, image, delay) sees each frame as it is decoded;
+        # cancelled() is polled between frames. Safe to call off the GUI
+        # thread: every build writes to its own temporary directory.
+        directory = self.entry_dir(path)
+        tmp = None
+        started = time.perf_counter()
+        info = {'loop_count': -1}
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            tmp = tempfile.mkdtemp(prefix=os.path.basename(directory) + '.', suffix='.tmp', dir=self.root)
+            meta = self._decode_to(path, tmp, on_frame, cancelled, info)
+            if meta is None:
+                shutil.rmtree(tmp, ignore_errors=True)
+                return None
+            shutil.rmtree(directory, ignore_errors=True)
+            os.replace(tmp, directory)
+        except OSError as e:
+            logging.warning('Frame store write failed for %s: %s', path, e)
+            if tmp is not None:
+                shutil.rmtree(tmp, ignore_errors=True)
+            return None
+        app_logging.event('decode', file=os.path.basename(path), frames=len(meta['delays']),
+                          width=meta['width'], height=meta['height'],
+                          first_frame_ms=round((info['first_frame_at'] - started) * 1000.0, 2),
+                          ms=round((time.perf_counter() - started) * 1000.0, 2))
+        self.prune(keep=directory)
+        return StoredAnimation(directory, meta)
+
+    def _read_frames(self, path: str, info: dict):
+        # Yields (image, delay) from a GIF/WebP, or from a sprite atlas (one
+        # image load, frames cut out by sub-rect); sets info['loop_count']
+        if sprite_atlas.is_manifest(path):
+            info['loop_count'] = int(sprite_atlas.load_manifest(path).get('loop_count', -1))
+            yield from sprite_atlas.read_frames(path)
+            return
+        reader = QImageReader(path)
+        reader.setAutoTransform(True)
+        if not reader.canRead():
+            logging.warning('Cannot decode animation %s: %s', path, reader.errorString())
+            return
+        while True:
+            image = reader.read()
+            if image.isNull():
+                break
+            yield image, reader.nextImageDelay()
+            if not reader.supportsAnimation():
+                break
+        info['loop_count'] = reader.loopCount()
+
+    def _decode_to(self, path: str, directory: str, on_frame=None, cancelled=None, info=None):
+        width = height = bytes_per_line = None
+        delays = []
+        info = {'loop_count': -1} if info is None else info
+        with open(os.path.join(directory, 'frames.bin'), 'wb') as out:
+            try:
+                for image, delay in self._read_frames(path, info):
+                    if cancelled is not None and cancelled():
+                        return None
+                    if width is None:
+                        width, height = image.width(), image.height()
+                        info['first_frame_at'] = time.perf_counter()
+                    elif (image.width(), image.height()) != (width, height):
+                        image = image.scaled(width, height)
+                    image = image.convertToFormat(FRAME_FORMAT)
+                    if bytes_per_line is None:
+                        bytes_per_line = image.bytesPerLine()
+                    out.write(image.constBits().asstring(image.sizeInBytes()))
+                    delays.append(delay)
+                    if on_frame is not None:
+                        on_frame(len(delays) - 1, image, delay)
+            except sprite_atlas.AtlasError as e:
+                logging.warning('Cannot decode animation %s: %s', path, e)
+                return None
+        if not delays:
+            return None
+        meta = {
+            'version': STORE_VERSION,
+            'source': os.path.abspath(path),
+            'width': width,
+            'height': height,
+            'bytes_per_line': bytes_per_line,
+            'delays': delays,
+            'loop_count': info['loop_count'],
+        }
+        with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        return meta
+
+    def prune(self, keep: str = None) -> None:
+        # Evict least recently used entries beyond the size cap
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return
+        entries = []
+        total = 0
+        for name in names:
+            directory = os.path.join(self.root, name)
+            try:
+                size = os.path.getsize(os.path.join(directory, 'frames.bin'))
+                used = os.path.getmtime(os.path.join(directory, 'meta.json'))
+            except OSError:
+                continue
+            entries.append((used, size, directory))
+            total += size
+        for used, size, directory in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if directory == keep:
+                continue
+            shutil.rmtree(directory, ignore_errors=True)
+            total -= size
@@ -0,0 +1,252 @@
+import gzip
+import json
+import time
+import random
+import socket
+import zlib
+import logging
+import threading
+import http.client
+from typing import Optional
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, detail: str, headers=None):
+        super().__init__(f'API error {status}: {detail}')
+        self.status = status
+        self.detail = detail
+        self.headers = headers or {}
+
+
+class ConnectionPool:
+    # Idle keep-alive connections per (scheme, host, port), shared by every
+    # transport in the process. Connections are checked out by one request
+    # at a time, so worker threads never share a socket.
+    MAX_IDLE_PER_HOST = 4
+
+    def __init__(self):
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, scheme: str, host: str, port: int, connect_timeout: float):
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return cls(host, port, timeout=connect_timeout), False
+
+    def release(self, scheme: str, host: str, port: int, conn) -> None:
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.MAX_IDLE_PER_HOST:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            pools, self._idle = self._idle, {}
+        for idle in pools.values():
+            for conn in idle:
+                conn.close()
+
+
+shared_pool = ConnectionPool()
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    value = headers.get('retry-after-ms')
+    if value:
+        try:
+            return max(0.0, float(value) / 1000.0)
+        except ValueError:
+            pass
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+class HttpResponse:
+    def __init__(self, status: int, headers: dict, body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body.decode('utf-8'))
+
+
+class StreamingResponse:
+    # Iterates the body line by line (for server-sent events). The connection
+    # goes back to the pool only if the body was read to the end; a stream
+    # abandoned part way is closed, never drained, since the server may
+    # still be sending.
+    def __init__(self, transport, target, conn, resp):
+        self.status = resp.status
+        self.headers = {k.lower(): v for k, v in resp.getheaders()}
+        self._transport = transport
+        self._target = target
+        self._conn = conn
+        self._resp = resp
+        self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS) if self.headers.get('content-encoding') == 'gzip' else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        buf = b''
+        while self._resp is not None:
+            data = self._resp.read1(8192)
+            if not data:
+                break
+            if self._decoder is not None:
+                data = self._decoder.decompress(data)
+            buf += data
+            while b'\n' in buf:
+                line, buf = buf.split(b'\n', 1)
+                yield line + b'\n'
+        if self._decoder is not None:
+            # Output the decompressor was still holding at end of stream
+            buf += self._decoder.flush()
+            while b'\n' in buf:
+                line, buf = buf.split(b'\n', 1)
+                yield line + b'\n'
+        if buf:
+            yield buf
+
+    def close(self) -> None:
+        resp, self._resp = self._resp, None
+        if resp is None:
+            return
+        # http.client marks the response closed once the body hit EOF
+        if not resp.will_close and resp.isclosed():
+            self._transport._release(self._target, self._conn)
+        else:
+            self._conn.close()
+
+
+class HttpTransport:
+    # JSON POSTs over persistent http.client connections with gzip, separate
+    # connect/read timeouts and jittered exponential backoff on 429/5xx.
+    def __init__(self, connect_timeout: float = 10.0, read_timeout: float = 60.0,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 20.0,
+                 pool: ConnectionPool = None, retry_statuses=RETRY_STATUSES):
+        self.connect_timeout = float(connect_timeout)
+        self.read_timeout = float(read_timeout)
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.pool = pool or shared_pool
+        # Left out 429 when a scheduler handles rate limits for every caller
+        self.retry_statuses = tuple(retry_statuses)
+
+    def post_json(self, url: str, payload: dict, headers: dict = None) -> HttpResponse:
+        return self._request(url, payload, headers, stream=False)
+
+    def stream_json(self, url: str, payload: dict, headers: dict = None) -> StreamingResponse:
+        return self._request(url, payload, headers, stream=True)
+
+    def backoff_delay(self, attempt: int, retry_after: float = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, 60.0)
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    def _target(self, url: str):
+        parts = urlsplit(url)
+        scheme = parts.scheme or 'https'
+        port = parts.port or (443 if scheme == 'https' else 80)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        return (scheme, parts.hostname, port), path
+
+    def _release(self, target, conn):
+        self.pool.release(*target, conn)
+
+    def _request(self, url, payload, headers, stream):
+        target, path = self._target(url)
+        body = json.dumps(payload).encode('utf-8')
+        all_headers = {
+            'Content-Type': 'application/json',
+            'Accept-Encoding': 'gzip',
+            'Connection': 'keep-alive',
+        }
+        all_headers.update(headers or {})
+        attempt = 0
+        while True:
+            conn, reused = self.pool.acquire(*target, self.connect_timeout)
+            try:
+                if conn.sock is None:
+                    conn.connect()
+            except OSError as e:
+                conn.close()
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+                logging.info('HTTP connect to %s failed (%s); retrying in %.2fs', target[1], e, delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            try:
+                conn.sock.settimeout(self.read_timeout)
+                conn.request('POST', path, body=body, headers=all_headers)
+                resp = conn.getresponse()
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                if reused and not isinstance(e, socket.timeout):
+                    # Stale keep-alive socket; retry on a fresh one right away
+                    continue
+                # Once the request is sent the server may have acted on it,
+                # so read timeouts and resets are not retried.
+                raise
+
+            status = resp.status
+            if status >= 400:
+                resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+                detail = self._read_body(resp, resp_headers).decode('utf-8', errors='ignore')
+                self._finish(target, conn, resp)
+                if status in self.retry_statuses and attempt < self.max_retries:
+                    delay = self.backoff_delay(attempt, retry_after_seconds(resp_headers))
+                    logging.info('HTTP %s from %s; retrying in %.2fs', status, target[1], delay)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                raise HttpError(status, detail, resp_headers)
+
+            if stream:
+                return StreamingResponse(self, target, conn, resp)
+            resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+            data = self._read_body(resp, resp_headers)
+            self._finish(target, conn, resp)
+            return HttpResponse(status, resp_headers, data)
+
+    def _read_body(self, resp, headers) -> bytes:
+        data = resp.read()
+        if headers.get('content-encoding') == 'gzip':
+            data = gzip.decompress(data)
+        return data
+
+    def _finish(self, target, conn, resp):
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(target, conn)
@@ -0,0 +1,147 @@
+import json
+import logging
+from PyQt5.QtCore import QObject
+from PyQt5.QtNetwork import QLocalServer
+try:
+    from .ipc_client import HEADER, MAX_FRAME, SERVER_NAME, encode_frame  # type: ignore
+except Exception:
+    from ipc_client import HEADER, MAX_FRAME, SERVER_NAME, encode_frame  # type: ignore
+
+# What pre-protocol instances send to ask the running one to come forward
+LEGACY_ACTIVATE = b'activate'
+
+
+class CommandError(Exception):
+    pass
+
+
+class Deferred:
+    # Returned by a handler whose answer arrives later (e.g. a chat reply)
+    def __init__(self):
+        self._callback = None
+        self._done = None
+
+    def resolve(self, result=None) -> None:
+        self._finish({'ok': True, 'result': result})
+
+    def fail(self, message: str) -> None:
+        self._finish({'ok': False, 'error': message})
+
+    def _finish(self, reply):
+        if self._done is not None:
+            return
+        self._done = reply
+        if self._callback is not None:
+            self._callback(reply)
+
+    def _then(self, callback):
+        self._callback = callback
+        if self._done is not None:
+            callback(self._done)
+
+
+class _Connection:
+    __slots__ = ('socket', 'buffer', 'legacy_checked')
+
+    def __init__(self, socket):
+        self.socket = socket
+        self.buffer = bytearray()
+        self.legacy_checked = False
+
+
+class CommandServer(QObject):
+    # Length-prefixed JSON commands on the single-instance QLocalServer.
+    # Everything is driven by readyRead, so nothing on the GUI thread ever
+    # waits for a client. Handlers take the request's args dict and return a
+    # JSON-serializable result, raise CommandError, or return a Deferred.
+    def __init__(self, name: str = SERVER_NAME, parent=None):
+        super().__init__(parent)
+        self.name = name
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self._on_new_connection)
+        self._handlers = {}
+        self._connections = {}
+
+    def listen(self) -> bool:
+        return self.server.listen(self.name)
+
+    def register(self, cmd: str, handler) -> None:
+        self._handlers[cmd] = handler
+
+    def commands(self):
+        return sorted(self._handlers)
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            sock = self.server.nextPendingConnection()
+            conn = _Connection(sock)
+            self._connections[id(sock)] = conn
+            sock.readyRead.connect(lambda c=conn: self._on_ready_read(c))
+            sock.disconnected.connect(lambda c=conn: self._on_disconnected(c))
+            if sock.bytesAvailable():
+                self._on_ready_read(conn)
+
+    def _on_disconnected(self, conn):
+        self._connections.pop(id(conn.socket), None)
+        conn.socket.deleteLater()
+
+    def _on_ready_read(self, conn):
+        conn.buffer += bytes(conn.socket.readAll())
+        if not conn.legacy_checked and len(conn.buffer) >= len(LEGACY_ACTIVATE):
+            conn.legacy_checked = True
+            if conn.buffer.startswith(LEGACY_ACTIVATE):
+                conn.buffer.clear()
+                self._dispatch(conn, {'cmd': 'activate'}, reply=False)
+                return
+        while len(conn.buffer) >= HEADER.size:
+            (length,) = HEADER.unpack_from(conn.buffer)
+            if length > MAX_FRAME:
+                logging.warning('IPC frame too large (%d bytes); dropping connection', length)
+                conn.socket.abort()
+                return
+            if len(conn.buffer) < HEADER.size + length:
+                break
+            payload = bytes(conn.buffer[HEADER.size:HEADER.size + length])
+            del conn.buffer[:HEADER.size + length]
+            conn.legacy_checked = True
+            try:
+                request = json.loads(payload.decode('utf-8'))
+                if not isinstance(request, dict):
+                    raise ValueError('request must be an object')
+            except ValueError as e:
+                self._write(conn, {'id': None, 'ok': False, 'error': f'Bad request: {e}'})
+                continue
+            self._dispatch(conn, request)
+
+    def _dispatch(self, conn, request, reply=True):
+        request_id = request.get('id')
+        cmd = request.get('cmd')
+        handler = self._handlers.get(cmd)
+        if handler is None:
+            result = {'ok': False, 'error': f'Unknown command: {cmd!r}'}
+        else:
+            args = request.get('args') or {}
+            try:
+                value = handler(args)
+            except CommandError as e:
+                result = {'ok': False, 'error': str(e)}
+            except Exception as e:
+                logging.exception('IPC command %s failed', cmd)
+                result = {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+            else:
+                if isinstance(value, Deferred):
+                    if reply:
+                        value._then(lambda r: self._write(conn, {'id': request_id, **r}))
+                    return
+                result = {'ok': True, 'result': value}
+        if reply:
+            self._write(conn, {'id': request_id, **result})
+
+    def _write(self, conn, message):
+        if id(conn.socket) not in self._connections:
+            return
+        try:
+            data = encode_frame(message)
+        except Exception as e:
+            data = encode_frame({'id': message.get('id'), 'ok': False, 'error': f'Unserializable result: {e}'})
+        conn.socket.write(data)
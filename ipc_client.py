@@ -0,0 +1,208 @@
+import os
+import sys
+import time
+import json
+import errno
+import struct
+import socket
+import itertools
+
+# Name of the QLocalServer the running instance listens on
+SERVER_NAME = 'VirtualDeskmate_Launcher_Instance_Key'
+# Frames are a 4-byte big-endian length followed by a UTF-8 JSON object
+HEADER = struct.Struct('>I')
+MAX_FRAME = 4 * 1024 * 1024
+# Only these mean nothing is behind the endpoint (a crashed instance leaves
+# its socket file behind, which refuses connections). Anything else, e.g. a
+# busy pipe, a permission error or a timeout, may be a live instance.
+STALE_ERRNOS = (errno.ENOENT, errno.ECONNREFUSED)
+ERROR_PIPE_BUSY = 231
+PIPE_POLL_S = 0.005
+
+_kernel32 = None
+
+
+def _win32():
+    # kernel32 calls for named pipes, which have no timeouts of their own
+    global _kernel32
+    if _kernel32 is None:
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        kernel32.PeekNamedPipe.argtypes = [wintypes.HANDLE, wintypes.LPVOID, wintypes.DWORD,
+                                           wintypes.LPDWORD, wintypes.LPDWORD, wintypes.LPDWORD]
+        kernel32.PeekNamedPipe.restype = wintypes.BOOL
+        kernel32.WaitNamedPipeW.argtypes = [wintypes.LPCWSTR, wintypes.DWORD]
+        kernel32.WaitNamedPipeW.restype = wintypes.BOOL
+        _kernel32 = kernel32
+    return _kernel32
+
+
+class IpcError(Exception):
+    pass
+
+
+class IpcNotRunning(IpcError):
+    pass
+
+
+def encode_frame(message: dict) -> bytes:
+    payload = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    if len(payload) > MAX_FRAME:
+        raise IpcError('Message too large')
+    return HEADER.pack(len(payload)) + payload
+
+
+def server_path(name: str = SERVER_NAME) -> str:
+    # Where QLocalServer puts its endpoint for a plain name
+    if sys.platform == 'win32':
+        return r'\\.\pipe' + '\\' + name
+    if name.startswith('/'):
+        return name
+    return os.path.join((os.environ.get('TMPDIR') or '/tmp').rstrip('/') or '/', name)
+
+
+class IpcClient:
+    # Minimal client for the running instance's command channel; no Qt
+    # needed. Keep one open to send several commands over one connection.
+    def __init__(self, name: str = SERVER_NAME, timeout: float = 2.0):
+        self.path = server_path(name)
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._sock = None
+        self._pipe = None
+        self._connect()
+
+    def _connect(self):
+        try:
+            if sys.platform == 'win32':
+                self._pipe = self._open_pipe()
+            else:
+                self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._sock.settimeout(self.timeout)
+                self._sock.connect(self.path)
+        except socket.timeout:
+            self.close()
+            raise IpcError(f'VirtualDeskmate did not accept a connection within {self.timeout}s') from None
+        except OSError as e:
+            self.close()
+            if e.errno in STALE_ERRNOS:
+                raise IpcNotRunning(f'VirtualDeskmate is not running ({e})') from None
+            raise IpcError(f'Cannot connect to VirtualDeskmate ({e})') from None
+
+    def _open_pipe(self):
+        # Every pipe instance may be busy serving another client; wait for
+        # one for up to the timeout
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                return open(self.path, 'r+b', buffering=0)
+            except OSError as e:
+                if getattr(e, 'winerror', None) != ERROR_PIPE_BUSY:
+                    raise
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not _win32().WaitNamedPipeW(self.path, max(1, int(remaining * 1000))):
+                raise socket.timeout('pipe busy')
+
+    def _read_pipe(self, n: int) -> bytes:
+        # Polls for data so a silent server cannot block past the timeout
+        import ctypes
+        import msvcrt
+        handle = msvcrt.get_osfhandle(self._pipe.fileno())
+        available = ctypes.c_ulong(0)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            if not _win32().PeekNamedPipe(handle, None, 0, None, ctypes.byref(available), None):
+                # Broken pipe: the server went away
+                return b''
+            if available.value:
+                return self._pipe.read(min(n, available.value))
+            if time.monotonic() >= deadline:
+                raise socket.timeout('read timed out')
+            time.sleep(PIPE_POLL_S)
+
+    def _send(self, data: bytes):
+        if self._pipe is not None:
+            self._pipe.write(data)
+        else:
+            self._sock.sendall(data)
+
+    def _recv(self, n: int) -> bytes:
+        chunks = []
+        while n:
+            chunk = self._read_pipe(n) if self._pipe is not None else self._sock.recv(n)
+            if not chunk:
+                raise IpcError('Connection closed by VirtualDeskmate')
+            chunks.append(chunk)
+            n -= len(chunk)
+        return b''.join(chunks)
+
+    def call(self, cmd: str, **args):
+        request_id = next(self._ids)
+        self._send(encode_frame({'id': request_id, 'cmd': cmd, 'args': args}))
+        while True:
+            try:
+                (length,) = HEADER.unpack(self._recv(HEADER.size))
+                if length > MAX_FRAME:
+                    raise IpcError('Reply too large')
+                reply = json.loads(self._recv(length).decode('utf-8'))
+            except socket.timeout:
+                raise IpcError(f'No reply to {cmd!r} within {self.timeout}s') from None
+            if reply.get('id') == request_id:
+                break
+        if not reply.get('ok'):
+            raise IpcError(reply.get('error') or 'Command failed')
+        return reply.get('result')
+
+    def close(self) -> None:
+        for handle in (self._sock, self._pipe):
+            if handle is not None:
+                try:
+                    handle.close()
+                except OSError:
+                    pass
+        self._sock = self._pipe = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def send_command(cmd: str, timeout: float = 2.0, **args):
+    with IpcClient(timeout=timeout) as client:
+        return client.call(cmd, **args)
+
+
+def _parse_value(text: str):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main(argv=None) -> int:
+    # python ipc_client.py <command> [key=value ...]
+    #   e.g. set-size size=300, set-gif path=C:/gifs/cat.gif,
+    #        send-message text="hello" wait=true timeout=60
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print('usage: ipc_client.py <command> [key=value ...]', file=sys.stderr)
+        return 2
+    args = {}
+    for item in argv[1:]:
+        key, _, value = item.partition('=')
+        args[key.replace('-', '_')] = _parse_value(value)
+    timeout = float(args.pop('timeout', 2.0))
+    try:
+        result = send_command(argv[0], timeout=timeout, **args)
+    except IpcError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
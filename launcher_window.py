@@ -1,16 +1,20 @@
 import os
-from PyQt5.QtWidgets import QWidget, QPushButton, QFileDialog, QLineEdit, QTextEdit, QHBoxLayout, QVBoxLayout, QLabel, QGraphicsDropShadowEffect, QSizePolicy
-from PyQt5.QtGui import QMovie, QFont
-from PyQt5.QtCore import QSettings, Qt
+from PyQt5.QtWidgets import QWidget, QPushButton, QFileDialog, QLineEdit, QTextEdit, QHBoxLayout, QVBoxLayout, QLabel, QGraphicsDropShadowEffect, QSizePolicy, QCheckBox
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt, QTimer
 # Support package and script imports
 try:
     from .settings_helper import SettingsHelper  # type: ignore
-    from .character_widget import CharacterWidget  # type: ignore
     from .utils import resource_path  # type: ignore
+    from .asset_registry import AssetRegistry  # type: ignore
+    from .power_policy import PowerPolicy  # type: ignore
+    from . import sprite_atlas  # type: ignore
 except Exception:
     from settings_helper import SettingsHelper  # type: ignore
-    from character_widget import CharacterWidget  # type: ignore
     from utils import resource_path  # type: ignore
+    from asset_registry import AssetRegistry  # type: ignore
+    from power_policy import PowerPolicy  # type: ignore
+    import sprite_atlas  # type: ignore
 
 
 class LauncherWindow(QWidget):
@@ -18,12 +22,11 @@ class LauncherWindow(QWidget):
         super().__init__()
         self.setWindowTitle('VirtualDeskmate Launcher')
         self.setFixedSize(1080, 600)
-        self.settings = QSettings('VirtualPartner', 'VirtualDeskmate')
         self.settings_helper = SettingsHelper()
 
         # --- Title / Subtitle ---
         self.title_label = QLabel('Virtual Deskmate')
-        self.subtitle_label = QLabel('Summon your desk companion (choose a transparent GIF)')
+        self.subtitle_label = QLabel('Summon your desk companion (choose a transparent GIF, WebP or sprite atlas)')
         self.title_label.setAlignment(Qt.AlignCenter)
         self.subtitle_label.setAlignment(Qt.AlignCenter)
         self.title_label.setFont(QFont('Segoe UI', 20, QFont.Bold))
@@ -32,18 +35,20 @@ class LauncherWindow(QWidget):
         # --- Preview ---
         self.preview_label = QLabel()
         self.preview_label.setFixedSize(280, 280)
-        self.preview_label.setScaledContents(True)
         self.preview_label.setAlignment(Qt.AlignCenter)
-        self.preview_movie = None
+        self.preview_asset = None
+        self.deskmate = None
+        PowerPolicy.instance().watch(self)
 
         self.gif_path_input = QLineEdit(self)
-        self.gif_path_input.setPlaceholderText('Choose a GIF (transparent recommended)')
+        self.gif_path_input.setPlaceholderText('Choose a GIF, animated WebP or atlas .json (transparent recommended)')
         last_path = self.settings_helper.get_last_gif_path()
+        # Load the preview after the window is up so it never delays first paint
         if last_path and os.path.exists(last_path):
             self.gif_path_input.setText(last_path)
-            self.update_preview(last_path)
+            QTimer.singleShot(0, lambda: self.update_preview(last_path))
         else:
-            self.update_preview(resource_path('Dance-Evernight-unscreen.gif'))
+            QTimer.singleShot(0, lambda: self.update_preview(resource_path('Dance-Evernight-unscreen.gif')))
 
         browse_btn = QPushButton('Browse...', self)
         show_btn = QPushButton('Show Deskmate', self)
@@ -84,6 +89,10 @@ class LauncherWindow(QWidget):
         self.chat_name_input.setText(self.settings_helper.get_chat_name())
         self.chat_name_input.textChanged.connect(self.settings_helper.set_chat_name)
 
+        self.cache_replies_check = QCheckBox('Reuse replies for identical messages (response cache)', self)
+        self.cache_replies_check.setChecked(self.settings_helper.get_cache_responses())
+        self.cache_replies_check.toggled.connect(self.settings_helper.set_cache_responses)
+
         left_col.addWidget(QLabel('OpenAI Settings'))
         # Group: API & Model
         api_model_row = QHBoxLayout()
@@ -99,6 +108,7 @@ class LauncherWindow(QWidget):
         left_col.addSpacing(6)
         left_col.addWidget(QLabel('Chatbot Name'))
         left_col.addWidget(self.chat_name_input)
+        left_col.addWidget(self.cache_replies_check)
 
         left_col.addStretch(1)
         left_col.addWidget(show_btn)
@@ -120,7 +130,7 @@ class LauncherWindow(QWidget):
 
     def on_browse(self):
         start_dir = os.path.expanduser('~')
-        file_path, _ = QFileDialog.getOpenFileName(self, 'Select GIF', start_dir, 'GIF Files (*.gif)')
+        file_path, _ = QFileDialog.getOpenFileName(self, 'Select Animation', start_dir, sprite_atlas.FILE_FILTER)
         if file_path:
             self.gif_path_input.setText(file_path)
             self.settings_helper.set_last_gif_path(file_path)
@@ -133,33 +143,72 @@ class LauncherWindow(QWidget):
         else:
             self.settings_helper.set_last_gif_path(path)
 
-        self.deskmate = CharacterWidget(path, launcher=self)
+        try:
+            from .deskmate_host import DeskmateHost  # type: ignore
+        except Exception:
+            from deskmate_host import DeskmateHost  # type: ignore
+        host = DeskmateHost.instance()
+        # Replace (not stack) the launcher's character; extra ones stay
+        if self.deskmate is not None:
+            host.remove(self.deskmate)
+        self.deskmate = host.add(path, launcher=self)
         self.deskmate.show()
         self.hide()
 
     def on_open_chat(self):
         try:
-            from chat_window import ChatWindow  # local import to avoid circular
+            from chat_manager import ChatWindowManager  # local import to avoid circular
         except Exception:
-            from .chat_window import ChatWindow  # type: ignore
-        self.chat = ChatWindow()
-        self.chat.show()
+            from .chat_manager import ChatWindowManager  # type: ignore
+        self.chat = ChatWindowManager.instance().open()
 
     def closeEvent(self, event):
         event.ignore()
         self.hide()
 
+    def showEvent(self, event):
+        if self.preview_asset is not None:
+            self.preview_asset.set_visible(self, True)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        # The preview stops decoding while the launcher is hidden, unless the
+        # character is showing the same file
+        if self.preview_asset is not None:
+            self.preview_asset.set_visible(self, False)
+        super().hideEvent(event)
+
     # --- UI helpers ---
     def update_preview(self, path: str):
-        try:
-            if self.preview_movie:
-                self.preview_movie.stop()
-            self.preview_movie = QMovie(path)
-            self.preview_label.setMovie(self.preview_movie)
-            self.preview_movie.start()
-        except Exception:
-            self.preview_movie = None
+        registry = AssetRegistry.instance()
+        old = self.preview_asset
+        self.preview_asset = registry.acquire(path, self)
+        if old is not None and old is self.preview_asset:
+            # Same file again; the launcher already holds this asset
+            return
+        if old is not None:
+            # Releasing the last hold cancels a decode still in progress
+            old.frameChanged.disconnect(self._on_preview_frame)
+            old.loadFinished.disconnect(self._on_preview_loaded)
+            registry.release(old, self)
+        if self.preview_asset is None:
             self.preview_label.setText('No preview')
+            return
+        if not self.preview_asset.is_valid():
+            self.preview_label.setText('Loading preview...')
+        self.preview_asset.frameChanged.connect(self._on_preview_frame)
+        self.preview_asset.loadFinished.connect(self._on_preview_loaded)
+        self.preview_asset.set_visible(self, self.isVisible())
+        self._on_preview_frame(self.preview_asset.current_frame())
+
+    def _on_preview_loaded(self, ok: bool):
+        if not ok:
+            self.preview_label.setText('No preview')
+
+    def _on_preview_frame(self, index: int):
+        if index < 0 or not self.isVisible():
+            return
+        self.preview_label.setPixmap(self.preview_asset.scaled_frame(index, self.preview_label.size()))
 
     def apply_theme(self):
         self.setStyleSheet(
@@ -1,24 +1,237 @@
+import os
 import sys
+# Imported before anything heavy so startup phases are measured from here
+try:
+    from . import startup_timing  # type: ignore
+except Exception:
+    import startup_timing  # type: ignore
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import Qt
 try:
-    from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+    from PyQt5.QtNetwork import QLocalServer
 except Exception:
     QLocalServer = None  # type: ignore
-    QLocalSocket = None  # type: ignore
 
 # Support running as a script or as a package module
 try:
     from .utils import setup_logging  # type: ignore
-    from .launcher_window import LauncherWindow  # type: ignore
+    from .settings_helper import SettingsHelper  # type: ignore
+    from . import ipc_client  # type: ignore
 except Exception:
     from utils import setup_logging  # type: ignore
-    from launcher_window import LauncherWindow  # type: ignore
+    from settings_helper import SettingsHelper  # type: ignore
+    import ipc_client  # type: ignore
+
+startup_timing.mark('imports')
+
+launcher = None
+deskmate = None
+
+
+def ensure_launcher():
+    # The launcher (and its live preview) is only built when first needed,
+    # so tray mode never pays for it.
+    global launcher
+    if launcher is None:
+        try:
+            from .launcher_window import LauncherWindow  # type: ignore
+        except Exception:
+            from launcher_window import LauncherWindow  # type: ignore
+        launcher = LauncherWindow()
+        if deskmate is not None:
+            # Adopt the tray-mode character so the launcher replaces it
+            # rather than stacking a second one
+            launcher.deskmate = deskmate
+    return launcher
+
+
+def show_launcher():
+    l = ensure_launcher()
+    if l.isHidden():
+        l.show()
+    l.raise_()
+    l.activateWindow()
+
+
+def _forget_deskmate(widget):
+    # The host removed a character; drop references to the deleted widget
+    global deskmate
+    if deskmate is widget:
+        deskmate = None
+    if launcher is not None and launcher.deskmate is widget:
+        launcher.deskmate = None
+
+
+def start_tray_mode():
+    # Straight to the character with the last GIF; no launcher construction
+    global deskmate
+    try:
+        from .deskmate_host import DeskmateHost  # type: ignore
+    except Exception:
+        from deskmate_host import DeskmateHost  # type: ignore
+    host = DeskmateHost.instance()
+    if host.launcher_factory is None:
+        # First tray start: keep this module's references in step with the host
+        host.removed.connect(_forget_deskmate)
+    host.launcher_factory = ensure_launcher
+    deskmate = host.add(SettingsHelper().get_last_gif_path() or None)
+    if launcher is not None:
+        # The launcher's next Show replaces this character instead of
+        # stacking a second one
+        launcher.deskmate = deskmate
+    startup_timing.watch_first_paint(deskmate)
+    deskmate.show()
+
+
+def _host():
+    try:
+        from .deskmate_host import DeskmateHost  # type: ignore
+    except Exception:
+        from deskmate_host import DeskmateHost  # type: ignore
+    return DeskmateHost.instance()
+
+
+def _chat_manager():
+    try:
+        from .chat_manager import ChatWindowManager  # type: ignore
+    except Exception:
+        from chat_manager import ChatWindowManager  # type: ignore
+    return ChatWindowManager.instance()
+
+
+def _state():
+    host = _host()
+    chat = _chat_manager().get()
+    return {
+        'deskmates': [{
+            'gif': w.state.gif_path,
+            'size': w.character_label.width(),
+            'pos': [w.x(), w.y()],
+            'visible': w.isVisible(),
+            'opacity': round(w.windowOpacity(), 2),
+            'locked': w.state.drag_locked,
+        } for w in host.deskmates()],
+        'launcher_visible': launcher is not None and launcher.isVisible(),
+        'chat': None if chat is None else {
+            'visible': chat.isVisible(),
+            'busy': chat.worker.is_busy(),
+            'messages': len(chat.messages),
+            'scheduler': chat.worker.scheduler.stats(),
+        },
+        'power_mode': host.power_policy.mode,
+    }
+
+
+def register_commands(server):
+    # Commands for ipc_client.py and other external tools
+    try:
+        from .ipc import CommandError, Deferred  # type: ignore
+        from .request_scheduler import INTERACTIVE, BACKGROUND  # type: ignore
+    except Exception:
+        from ipc import CommandError, Deferred  # type: ignore
+        from request_scheduler import INTERACTIVE, BACKGROUND  # type: ignore
+
+    def require(args, key, kind):
+        value = args.get(key)
+        if not isinstance(value, kind) or isinstance(value, bool):
+            raise CommandError(f'{key!r} is required')
+        return value
+
+    def activate(args):
+        show_launcher()
+
+    def show(args):
+        host = _host()
+        if not host.deskmates():
+            start_tray_mode()
+        host.show_all()
+        return _state()
+
+    def hide(args):
+        _host().hide_all()
+        return _state()
+
+    def set_size(args):
+        size = require(args, 'size', int)
+        for w in _host().deskmates():
+            w.set_size(size)
+        return _state()
+
+    def set_gif(args):
+        global deskmate
+        path = require(args, 'path', str)
+        if not os.path.exists(path):
+            raise CommandError(f'No such file: {path}')
+        host = _host()
+        old = host.current()
+        new = host.add(path)
+        if new.asset is None:
+            host.remove(new)
+            raise CommandError(f'Could not load animation: {path}')
+        SettingsHelper().set_last_gif_path(path)
+        if old is not None:
+            new.move(old.pos())
+            host.remove(old)
+            if launcher is not None and launcher.deskmate is old:
+                launcher.deskmate = new
+            if deskmate is old:
+                deskmate = new
+        new.show()
+        return _state()
+
+    def open_chat(args):
+        _chat_manager().open()
+
+    def send_message(args):
+        text = require(args, 'text', str).strip()
+        if not text:
+            raise CommandError("'text' is empty")
+        # Scripted sends yield to someone typing in a chat window unless asked
+        priority = {'interactive': INTERACTIVE, 'background': BACKGROUND}.get(args.get('priority', 'background'))
+        if priority is None:
+            raise CommandError("'priority' must be 'interactive' or 'background'")
+        window = _chat_manager().open()
+        request_id = window.send_message(text, priority)
+        if not args.get('wait'):
+            return {'request_id': request_id}
+        deferred = Deferred()
+        worker = window.worker
+
+        def done(rid, value=None, ok=True):
+            if rid != request_id:
+                return
+            for signal, slot in connections:
+                signal.disconnect(slot)
+            if ok:
+                deferred.resolve({'request_id': rid, 'reply': value})
+            else:
+                deferred.fail(value or 'Request cancelled')
+        connections = [
+            (worker.reply_ready, lambda rid, reply: done(rid, reply)),
+            (worker.failed, lambda rid, message: done(rid, message, ok=False)),
+            (worker.cancelled, lambda rid: done(rid, ok=False)),
+        ]
+        for signal, slot in connections:
+            signal.connect(slot)
+        return deferred
+
+    def get_state(args):
+        return _state()
+
+    def ping(args):
+        return {'commands': server.commands()}
+
+    for name, handler in [('activate', activate), ('show-launcher', activate), ('show', show),
+                          ('hide', hide), ('set-size', set_size), ('set-gif', set_gif),
+                          ('open-chat', open_chat), ('send-message', send_message),
+                          ('get-state', get_state), ('ping', ping)]:
+        server.register(name, handler)
 
- 
 
 # --- RUN THE APPLICATION ---
 if __name__ == '__main__':
+    tray_mode = '--tray' in sys.argv[1:]
+
     # High-DPI scaling for Windows/HiDPI screens
     try:
         QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
@@ -29,37 +242,38 @@ if __name__ == '__main__':
     setup_logging()
 
     app = QApplication(sys.argv)
+    startup_timing.mark('qapplication')
 
     # --- Single-instance guard ---
-    if QLocalServer is not None and QLocalSocket is not None:
-        instance_key = 'VirtualDeskmate_Launcher_Instance_Key'
-        server = QLocalServer()
-        if not server.listen(instance_key):
-            # Another instance exists; try to activate it and exit
-            socket = QLocalSocket()
-            socket.connectToServer(instance_key)
-            if socket.waitForConnected(500):
-                # Send a simple activation message
-                socket.write(b'activate')
-                socket.flush()
-                socket.waitForBytesWritten(200)
-                socket.disconnectFromServer()
-            sys.exit(0)
-
-        def on_new_connection():
-            sock = server.nextPendingConnection()
-            if sock:
-                sock.waitForReadyRead(100)
-                data = bytes(sock.readAll()).decode('utf-8', errors='ignore')
-                if 'activate' in data:
-                    if launcher.isHidden():
-                        launcher.show()
-                    launcher.raise_()
-                    launcher.activateWindow()
-                sock.disconnectFromServer()
-        server.newConnection.connect(on_new_connection)
+    if QLocalServer is not None:
+        try:
+            from .ipc import CommandServer  # type: ignore
+        except Exception:
+            from ipc import CommandServer  # type: ignore
+        server = CommandServer()
+        if not server.listen():
+            # Another instance exists; ask it to come forward and exit
+            try:
+                ipc_client.send_command('activate', timeout=0.5)
+            except ipc_client.IpcNotRunning:
+                # Nothing behind the endpoint: a stale one left by a crash
+                QLocalServer.removeServer(server.name)
+                if not server.listen():
+                    # Another instance claimed it in the meantime
+                    sys.exit(0)
+            except ipc_client.IpcError:
+                # Running but did not answer (e.g. an older version)
+                sys.exit(0)
+            else:
+                sys.exit(0)
+        register_commands(server)
     # Keep app running when all windows are hidden (required for tray-only apps)
     app.setQuitOnLastWindowClosed(False)
-    launcher = LauncherWindow()
-    launcher.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    if tray_mode:
+        start_tray_mode()
+    else:
+        ensure_launcher()
+        startup_timing.mark('launcher_built')
+        startup_timing.watch_first_paint(launcher)
+        launcher.show()
+    sys.exit(app.exec_())
@@ -0,0 +1,216 @@
+import sys
+import logging
+import weakref
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+ACTIVE = 'active'
+REDUCED = 'reduced'
+PAUSED = 'paused'
+
+# Walk at most this many windows above ours when checking coverage
+MAX_Z_ORDER_WALK = 256
+
+
+def windows_idle_seconds():
+    # Seconds since the last keyboard/mouse input anywhere on the desktop
+    import ctypes
+    from ctypes import wintypes
+
+    class LASTINPUTINFO(ctypes.Structure):
+        _fields_ = [('cbSize', wintypes.UINT), ('dwTime', wintypes.DWORD)]
+
+    info = LASTINPUTINFO()
+    info.cbSize = ctypes.sizeof(LASTINPUTINFO)
+    if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+        return None
+    ticks = ctypes.windll.kernel32.GetTickCount() & 0xFFFFFFFF
+    return ((ticks - info.dwTime) & 0xFFFFFFFF) / 1000.0
+
+
+def windows_fullscreen_active() -> bool:
+    # Busy / fullscreen Direct3D / presentation mode, as reported by the shell
+    import ctypes
+    state = ctypes.c_int(0)
+    if ctypes.windll.shell32.SHQueryUserNotificationState(ctypes.byref(state)) != 0:
+        return False
+    return state.value in (2, 3, 4)
+
+
+_user32 = None
+
+
+def _win32_user32():
+    global _user32
+    if _user32 is None:
+        import ctypes
+        from ctypes import wintypes
+        user32 = ctypes.WinDLL('user32')
+        user32.GetWindow.argtypes = [wintypes.HWND, wintypes.UINT]
+        user32.GetWindow.restype = wintypes.HWND
+        user32.GetWindowRect.argtypes = [wintypes.HWND, ctypes.POINTER(wintypes.RECT)]
+        user32.GetWindowLongW.argtypes = [wintypes.HWND, ctypes.c_int]
+        user32.IsWindowVisible.argtypes = [wintypes.HWND]
+        user32.IsIconic.argtypes = [wintypes.HWND]
+        _user32 = user32
+    return _user32
+
+
+def windows_window_covered(widget) -> bool:
+    # True when windows above `widget` in the Z order cover all of it.
+    # Layered or click-through windows (overlays, other deskmates) and
+    # cloaked ones (other virtual desktops, suspended UWP apps) may be see-
+    # through, so they never count as covering.
+    import ctypes
+    from ctypes import wintypes
+    from PyQt5.QtCore import QRect
+    from PyQt5.QtGui import QRegion
+    GW_HWNDPREV = 3
+    GWL_EXSTYLE = -20
+    WS_EX_TRANSPARENT = 0x20
+    WS_EX_LAYERED = 0x80000
+    DWMWA_CLOAKED = 14
+    user32 = _win32_user32()
+    dwmapi = ctypes.windll.dwmapi
+    rect = wintypes.RECT()
+
+    def bounds(hwnd):
+        if not user32.GetWindowRect(hwnd, ctypes.byref(rect)):
+            return QRect()
+        return QRect(rect.left, rect.top, rect.right - rect.left, rect.bottom - rect.top)
+
+    hwnd = int(widget.winId())
+    remaining = QRegion(bounds(hwnd))
+    if remaining.isEmpty():
+        return False
+    above = user32.GetWindow(hwnd, GW_HWNDPREV)
+    for _ in range(MAX_Z_ORDER_WALK):
+        if not above:
+            return False
+        if user32.IsWindowVisible(above) and not user32.IsIconic(above) \
+                and not user32.GetWindowLongW(above, GWL_EXSTYLE) & (WS_EX_LAYERED | WS_EX_TRANSPARENT):
+            cloaked = ctypes.c_int(0)
+            dwmapi.DwmGetWindowAttribute(wintypes.HWND(above), DWMWA_CLOAKED, ctypes.byref(cloaked), ctypes.sizeof(cloaked))
+            if not cloaked.value:
+                remaining = remaining.subtracted(QRegion(bounds(above)))
+                if remaining.isEmpty():
+                    return True
+        above = user32.GetWindow(above, GW_HWNDPREV)
+    return False
+
+
+def default_idle_probe():
+    return windows_idle_seconds if sys.platform == 'win32' else None
+
+
+def default_fullscreen_probe():
+    return windows_fullscreen_active if sys.platform == 'win32' else None
+
+
+def default_occlusion_probe():
+    return windows_window_covered if sys.platform == 'win32' else None
+
+
+class PowerPolicy(QObject):
+    # Decides how much animation work is worth doing right now:
+    #   paused  - a fullscreen app is in front, the user has been away for a
+    #             long time, or every watched window is covered by others
+    #   reduced - the user has been idle for a while (lower frame rate)
+    #   active  - otherwise
+    # Probes are plain callables so other platforms or tests can plug in
+    # their own; a missing probe simply never triggers its condition. The
+    # occlusion probe takes a widget. Without one, a window only counts as
+    # covered if Qt reports it unexposed, which Windows and X11 do not do
+    # for windows hidden behind others.
+    modeChanged = pyqtSignal(str)
+
+    IDLE_REDUCE_SECONDS = 300
+    IDLE_PAUSE_SECONDS = 3600
+    POLL_ACTIVE_MS = 2000
+    # Poll quickly while throttled so activity restores playback at once
+    POLL_THROTTLED_MS = 250
+    REDUCED_FRAME_INTERVAL_MS = 100
+
+    _instance = None
+
+    def __init__(self, idle_probe=None, fullscreen_probe=None, occlusion_probe=None, parent=None):
+        super().__init__(parent)
+        self.idle_probe = idle_probe
+        self.fullscreen_probe = fullscreen_probe
+        self.occlusion_probe = occlusion_probe
+        self.mode = ACTIVE
+        self._watched = []
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.evaluate)
+        self._timer.start(self.POLL_ACTIVE_MS)
+
+    @classmethod
+    def instance(cls) -> 'PowerPolicy':
+        if cls._instance is None:
+            cls._instance = PowerPolicy(default_idle_probe(), default_fullscreen_probe(), default_occlusion_probe())
+        return cls._instance
+
+    def set_idle_probe(self, probe) -> None:
+        self.idle_probe = probe
+        self.evaluate()
+
+    def set_fullscreen_probe(self, probe) -> None:
+        self.fullscreen_probe = probe
+        self.evaluate()
+
+    def set_occlusion_probe(self, probe) -> None:
+        self.occlusion_probe = probe
+        self.evaluate()
+
+    def watch(self, widget) -> None:
+        # Windows that must all be covered for animation to pause
+        self._watched = [r for r in self._watched if r() is not None]
+        self._watched.append(weakref.ref(widget))
+        self.evaluate()
+
+    def unwatch(self, widget) -> None:
+        self._watched = [r for r in self._watched if r() is not None and r() is not widget]
+        self.evaluate()
+
+    def _occluded(self) -> bool:
+        shown = [w for w in (r() for r in self._watched) if w is not None and w.isVisible()]
+        if not shown:
+            # Nothing on screen; consumers pause themselves when hidden
+            return False
+        for w in shown:
+            handle = w.windowHandle()
+            if handle is None or handle.isExposed():
+                if not self._probe(self.occlusion_probe, False, w):
+                    return False
+        return True
+
+    def _probe(self, probe, default, *args):
+        if probe is None:
+            return default
+        try:
+            return probe(*args)
+        except Exception as e:
+            logging.warning('Power probe failed, disabling it: %s', e)
+            if probe is self.idle_probe:
+                self.idle_probe = None
+            if probe is self.fullscreen_probe:
+                self.fullscreen_probe = None
+            if probe is self.occlusion_probe:
+                self.occlusion_probe = None
+            return default
+
+    def evaluate(self) -> str:
+        idle = self._probe(self.idle_probe, None)
+        if self._probe(self.fullscreen_probe, False) or self._occluded():
+            mode = PAUSED
+        elif idle is not None and idle >= self.IDLE_PAUSE_SECONDS:
+            mode = PAUSED
+        elif idle is not None and idle >= self.IDLE_REDUCE_SECONDS:
+            mode = REDUCED
+        else:
+            mode = ACTIVE
+        if mode != self.mode:
+            logging.info('Power policy: %s -> %s', self.mode, mode)
+            self.mode = mode
+            self._timer.setInterval(self.POLL_ACTIVE_MS if mode == ACTIVE else self.POLL_THROTTLED_MS)
+            self.modeChanged.emit(mode)
+        return mode
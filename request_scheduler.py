@@ -0,0 +1,260 @@
+import re
+import time
+import heapq
+import logging
+import itertools
+import threading
+from concurrent.futures import Future
+
+# Lower runs first; a waiting interactive send always goes before queued
+# background work (scripted sends, prefetches)
+INTERACTIVE = 0
+BACKGROUND = 10
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+
+class RateLimited(RuntimeError):
+    # Raised by a request the server refused with 429; the scheduler holds
+    # every queued request for retry_after seconds and then retries it
+    def __init__(self, message: str, retry_after: float = None, headers=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.headers = headers or {}
+
+
+def parse_reset(value) -> float:
+    # x-ratelimit-reset-* values look like '1s', '6m0s', '20ms' or '1h2m3.5s'
+    if value is None:
+        return None
+    text = str(value).strip()
+    try:
+        return max(0.0, float(text))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(text)
+    if not parts:
+        return None
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+
+class TokenBucket:
+    # Unlimited until the server reports a limit. After that it holds what
+    # the server says is left and refills so it is full again at the reported
+    # reset time (or over a minute, the window the limits are quoted in).
+    DEFAULT_WINDOW_S = 60.0
+
+    def __init__(self):
+        self.capacity = None
+        self.level = 0.0
+        self.rate = 0.0
+        self._updated = 0.0
+
+    def _refill(self, now: float):
+        if self.capacity is None:
+            return
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        if self.capacity is None or amount <= 0:
+            return 0.0
+        self._refill(now)
+        # A request bigger than the whole bucket only waits for a full one
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        if self.rate <= 0:
+            return self.DEFAULT_WINDOW_S
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        if self.capacity is None:
+            return
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def update(self, limit, remaining, reset_s, now: float) -> None:
+        try:
+            limit = float(limit)
+            remaining = float(remaining)
+        except (TypeError, ValueError):
+            return
+        if limit <= 0:
+            return
+        self.capacity = limit
+        self.level = max(0.0, min(limit, remaining))
+        missing = limit - self.level
+        if reset_s and missing > 0:
+            self.rate = missing / reset_s
+        else:
+            self.rate = limit / self.DEFAULT_WINDOW_S
+        self._updated = now
+
+
+class _Job:
+    __slots__ = ('fn', 'args', 'kwargs', 'priority', 'tokens', 'future', 'attempts')
+
+    def __init__(self, fn, args, kwargs, priority, tokens):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.tokens = tokens
+        self.future = Future()
+        self.attempts = 0
+
+
+class RequestScheduler:
+    # Process-wide gate in front of every ChatClient call. Requests wait in a
+    # priority queue and are started on a small shared set of threads only
+    # when the request and token buckets (fed from the server's
+    # x-ratelimit-* headers) allow it. A 429 pauses everything for the
+    # server's retry-after and the refused request is retried, instead of
+    # each chat window failing on its own. Callers get a Future back.
+    MAX_CONCURRENT = 4
+    MAX_RATE_LIMIT_RETRIES = 3
+    DEFAULT_BACKOFF_S = 2.0
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, max_concurrent: int = None):
+        self.max_concurrent = max(1, int(max_concurrent or self.MAX_CONCURRENT))
+        self.requests = TokenBucket()
+        self.tokens = TokenBucket()
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._blocked_until = 0.0
+        self._threads = []
+        self._idle = 0
+        self._running = 0
+        self.submitted = 0
+        self.rate_limited = 0
+
+    @classmethod
+    def instance(cls) -> 'RequestScheduler':
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = RequestScheduler()
+            return cls._instance
+
+    def submit(self, fn, *args, priority: int = INTERACTIVE, tokens: int = 0, **kwargs) -> Future:
+        # `tokens` is the caller's estimate of what the request will use
+        job = _Job(fn, args, kwargs, int(priority), max(0, int(tokens)))
+        with self._cond:
+            self._push(job, next(self._seq))
+            self.submitted += 1
+            if not self._idle and len(self._threads) < self.max_concurrent:
+                thread = threading.Thread(target=self._run, name=f'chat-scheduler-{len(self._threads) + 1}', daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._cond.notify()
+        return job.future
+
+    def observe(self, headers) -> None:
+        # Feed rate-limit headers from any response (success or error)
+        if not headers:
+            return
+        get = headers.get
+        now = time.monotonic()
+        with self._cond:
+            if get('x-ratelimit-limit-requests') is not None:
+                self.requests.update(get('x-ratelimit-limit-requests'), get('x-ratelimit-remaining-requests'),
+                                     parse_reset(get('x-ratelimit-reset-requests')), now)
+            if get('x-ratelimit-limit-tokens') is not None:
+                self.tokens.update(get('x-ratelimit-limit-tokens'), get('x-ratelimit-remaining-tokens'),
+                                   parse_reset(get('x-ratelimit-reset-tokens')), now)
+            self._cond.notify_all()
+
+    def backoff(self, seconds: float) -> None:
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + max(0.0, seconds))
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def running(self) -> int:
+        with self._cond:
+            return self._running
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'queued': len(self._heap),
+                'running': self._running,
+                'submitted': self.submitted,
+                'rate_limited': self.rate_limited,
+                'requests_left': None if self.requests.capacity is None else int(self.requests.level),
+                'tokens_left': None if self.tokens.capacity is None else int(self.tokens.level),
+                'blocked_s': round(max(0.0, self._blocked_until - time.monotonic()), 3),
+            }
+
+    def _push(self, job, seq):
+        heapq.heappush(self._heap, (job.priority, seq, job))
+
+    def _next_job(self):
+        # Called with the lock held; blocks until a job may start
+        while True:
+            while self._heap and self._heap[0][2].future.cancelled():
+                heapq.heappop(self._heap)
+            if not self._heap:
+                self._cond.wait()
+                continue
+            priority, seq, job = self._heap[0]
+            now = time.monotonic()
+            wait = max(self._blocked_until - now,
+                       self.requests.wait_time(1, now),
+                       self.tokens.wait_time(job.tokens, now))
+            if wait > 0:
+                self._cond.wait(wait)
+                continue
+            heapq.heappop(self._heap)
+            # A job retried after a 429 is already running
+            if not job.future.running() and not job.future.set_running_or_notify_cancel():
+                continue
+            self.requests.take(1, now)
+            self.tokens.take(job.tokens, now)
+            return seq, job
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._idle += 1
+                try:
+                    seq, job = self._next_job()
+                finally:
+                    self._idle -= 1
+                self._running += 1
+            try:
+                result = job.fn(*job.args, **job.kwargs)
+            except RateLimited as e:
+                if self._requeue(seq, job, e):
+                    continue
+                job.future.set_exception(e)
+            except BaseException as e:
+                job.future.set_exception(e)
+            else:
+                job.future.set_result(result)
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    self._cond.notify()
+
+    def _requeue(self, seq, job, error: RateLimited) -> bool:
+        self.observe(error.headers)
+        delay = error.retry_after if error.retry_after is not None else self.DEFAULT_BACKOFF_S * (2 ** job.attempts)
+        self.backoff(delay)
+        with self._cond:
+            self.rate_limited += 1
+            if job.attempts >= self.MAX_RATE_LIMIT_RETRIES:
+                return False
+            job.attempts += 1
+            # Keeps its place in line; the future stays running
+            heapq.heappush(self._heap, (job.priority, seq, job))
+            self._cond.notify()
+        logging.info('Rate limited; holding chat requests for %.2fs', delay)
+        return True
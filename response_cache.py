@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache:
+    # Two-tier cache of chat completions: an in-memory LRU in front of a
+    # size- and TTL-bounded directory of small JSON files.
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, directory: str = None, memory_entries: int = 128,
+                 disk_max_bytes: int = 20 * 1024 * 1024, ttl_seconds: float = 7 * 24 * 3600):
+        self.directory = directory
+        self.memory_entries = max(1, int(memory_entries))
+        self.disk_max_bytes = int(disk_max_bytes)
+        self.ttl_seconds = float(ttl_seconds)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.stores = 0
+        if self.directory:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+            except OSError as e:
+                logging.warning('Response cache disabled on disk: %s', e)
+                self.directory = None
+
+    @classmethod
+    def shared(cls, directory: str = None) -> 'ResponseCache':
+        with cls._shared_lock:
+            cache = cls._shared.get(directory)
+            if cache is None:
+                cache = cls(directory)
+                cls._shared[directory] = cache
+            return cache
+
+    @staticmethod
+    def make_key(base_url: str, model: str, messages, temperature: float) -> str:
+        blob = json.dumps([base_url or '', model, messages, temperature], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits_memory': self.hits_memory,
+                'hits_disk': self.hits_disk,
+                'misses': self.misses,
+                'stores': self.stores,
+                'memory_entries': len(self._memory),
+            }
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, content = entry
+                if now - created <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.hits_memory += 1
+                    return content
+                del self._memory[key]
+        entry = self._read_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits_disk += 1
+            self._remember(key, entry)
+            return entry[1]
+
+    def put(self, key: str, content: str) -> None:
+        if not content:
+            return
+        entry = (time.time(), content)
+        with self._lock:
+            self._remember(key, entry)
+            self.stores += 1
+        self._write_disk(key, entry)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._disk_bytes = None
+        for path, _, _ in self._disk_entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def _read_disk(self, key: str, now: float):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            st = os.stat(path)
+            if now - st.st_mtime > self.ttl_seconds:
+                os.remove(path)
+                with self._lock:
+                    if self._disk_bytes is not None:
+                        self._disk_bytes -= st.st_size
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return float(data['created']), data['content']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_disk(self, key: str, entry) -> None:
+        if not self.directory:
+            return
+        path = self._path(key)
+        tmp = path + '.tmp'
+        try:
+            # An overwritten entry only adds the difference in size
+            previous = os.path.getsize(path)
+        except OSError:
+            previous = 0
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'created': entry[0], 'content': entry[1]}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            logging.warning('Response cache write failed: %s', e)
+            return
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(s for _, s, _ in self._disk_entries())
+            else:
+                self._disk_bytes += size - previous
+            over = self._disk_bytes > self.disk_max_bytes
+        if over:
+            self._prune()
+
+    def _disk_entries(self):
+        if not self.directory:
+            return []
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, st.st_size, st.st_mtime))
+        return entries
+
+    def _prune(self) -> None:
+        # Drop expired entries, then the oldest until under 80% of the cap
+        now = time.time()
+        entries = sorted(self._disk_entries(), key=lambda e: e[2])
+        total = sum(e[1] for e in entries)
+        target = int(self.disk_max_bytes * 0.8)
+        for path, size, mtime in entries:
+            if total <= target and now - mtime <= self.ttl_seconds:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
@@ -0,0 +1,110 @@
+from PyQt5.QtCore import QObject, QPoint, QRect, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+
+
+class ScreenIndex(QObject):
+    # Cached geometry of all screens, rebuilt only when screens are added,
+    # removed or change geometry. Point lookups go through a coarse grid over
+    # the virtual desktop, so "which screen is this on" is O(1) no matter how
+    # often it is asked (e.g. on every mouse move of a 1000 Hz mouse).
+    changed = pyqtSignal()
+
+    CELL = 256
+
+    _instance = None
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._screens = []
+        self._geometries = []
+        self._available = []
+        self._origin = QPoint()
+        self._columns = 0
+        self._cells = []
+        self.rebuilds = 0
+        app = QApplication.instance()
+        app.screenAdded.connect(self._on_screen_added)
+        app.screenRemoved.connect(self._on_screen_removed)
+        for screen in app.screens():
+            self._connect(screen)
+        self.rebuild()
+
+    @classmethod
+    def instance(cls) -> 'ScreenIndex':
+        if cls._instance is None:
+            cls._instance = ScreenIndex()
+        return cls._instance
+
+    def _connect(self, screen):
+        screen.geometryChanged.connect(self.rebuild)
+        screen.availableGeometryChanged.connect(self.rebuild)
+
+    def _on_screen_added(self, screen):
+        self._connect(screen)
+        self.rebuild()
+
+    def _on_screen_removed(self, screen):
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        app = QApplication.instance()
+        self._screens = list(app.screens())
+        self._geometries = [s.geometry() for s in self._screens]
+        self._available = [s.availableGeometry() for s in self._screens]
+        self._cells = []
+        self._columns = 0
+        self.rebuilds += 1
+        if self._screens:
+            bounds = QRect()
+            for g in self._geometries:
+                bounds = bounds.united(g)
+            self._origin = bounds.topLeft()
+            self._columns = bounds.width() // self.CELL + 1
+            rows = bounds.height() // self.CELL + 1
+            self._cells = [() for _ in range(self._columns * rows)]
+            for i, g in enumerate(self._geometries):
+                c0, r0 = self._cell(g.left(), g.top())
+                c1, r1 = self._cell(g.right(), g.bottom())
+                for r in range(r0, r1 + 1):
+                    for c in range(c0, c1 + 1):
+                        self._cells[r * self._columns + c] += (i,)
+        self.changed.emit()
+
+    def _cell(self, x: int, y: int):
+        return (x - self._origin.x()) // self.CELL, (y - self._origin.y()) // self.CELL
+
+    def screen_count(self) -> int:
+        return len(self._screens)
+
+    def index_at(self, point: QPoint) -> int:
+        # Index of the screen containing point, or -1 if it is on none
+        if not self._cells:
+            return -1
+        x, y = point.x(), point.y()
+        c, r = self._cell(x, y)
+        if 0 <= c < self._columns and 0 <= r and r * self._columns + c < len(self._cells):
+            for i in self._cells[r * self._columns + c]:
+                if self._geometries[i].contains(x, y):
+                    return i
+        return -1
+
+    def nearest_index(self, point: QPoint) -> int:
+        # Containing screen, else the closest one (point in a gap or off-desktop)
+        i = self.index_at(point)
+        if i >= 0 or not self._geometries:
+            return i
+        x, y = point.x(), point.y()
+
+        def distance(g):
+            dx = max(g.left() - x, 0, x - g.right())
+            dy = max(g.top() - y, 0, y - g.bottom())
+            return dx * dx + dy * dy
+        return min(range(len(self._geometries)), key=lambda k: distance(self._geometries[k]))
+
+    def screen_at(self, point: QPoint):
+        i = self.nearest_index(point)
+        return self._screens[i] if i >= 0 else None
+
+    def available_at(self, point: QPoint) -> QRect:
+        i = self.nearest_index(point)
+        return QRect(self._available[i]) if i >= 0 else QRect()
@@ -1,10 +1,88 @@
 import os
-from PyQt5.QtCore import QSettings
+import atexit
+from PyQt5.QtCore import QSettings, QTimer, QCoreApplication
+
+_MISSING = object()
+
+
+class SettingsStore:
+    # Process-wide in-memory snapshot in front of QSettings. Reads are served
+    # from the snapshot; writes are coalesced per key and flushed to disk
+    # after a short quiet period, and always on quit. Same value()/setValue()
+    # interface as QSettings.
+    FLUSH_DELAY_MS = 750
+
+    def __init__(self, settings: QSettings = None):
+        self.qsettings = settings or QSettings('VirtualPartner', 'VirtualDeskmate')
+        self._values = {}
+        self._dirty = {}
+        self._timer = None
+        self.write_requests = 0
+        self.disk_writes = 0
+        self.flushes = 0
+
+    def value(self, key: str, defaultValue=None, type=None):
+        cached = self._values.get(key, _MISSING)
+        if cached is _MISSING:
+            if self.qsettings.contains(key):
+                cached = self.qsettings.value(key, defaultValue, type=type) if type is not None else self.qsettings.value(key, defaultValue)
+            else:
+                cached = None
+            self._values[key] = cached
+        if cached is None:
+            if defaultValue is None and type is not None:
+                return type()
+            return defaultValue
+        return cached
+
+    def setValue(self, key: str, value) -> None:
+        self.write_requests += 1
+        if self._values.get(key, _MISSING) == value and key not in self._dirty:
+            return
+        self._values[key] = value
+        self._dirty[key] = value
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        app = QCoreApplication.instance()
+        if app is None:
+            self.flush()
+            return
+        if self._timer is None:
+            self._timer = QTimer()
+            self._timer.setSingleShot(True)
+            self._timer.setInterval(self.FLUSH_DELAY_MS)
+            self._timer.timeout.connect(self.flush)
+            app.aboutToQuit.connect(self.flush)
+        self._timer.start()
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.stop()
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, {}
+        for key, value in dirty.items():
+            self.qsettings.setValue(key, value)
+            self.disk_writes += 1
+        self.qsettings.sync()
+        self.flushes += 1
+
+
+_shared_store = None
+
+
+def shared_store() -> SettingsStore:
+    global _shared_store
+    if _shared_store is None:
+        _shared_store = SettingsStore()
+        atexit.register(_shared_store.flush)
+    return _shared_store
 
 
 class SettingsHelper:
-    def __init__(self):
-        self.settings = QSettings('VirtualPartner', 'VirtualDeskmate')
+    def __init__(self, store: SettingsStore = None):
+        self.settings = store or shared_store()
 
     def get_last_gif_path(self) -> str:
         path = self.settings.value('paths/lastGif', type=str)
@@ -29,6 +107,22 @@ class SettingsHelper:
 
     # Click-through settings removed
 
+    def get_max_fps(self) -> int:
+        # 0 means no cap beyond the animation's own frame delays
+        value = int(self.settings.value('ui/maxFps', 60))
+        return 0 if value <= 0 else max(5, min(240, value))
+
+    def set_max_fps(self, value: int) -> None:
+        value = int(value)
+        self.settings.setValue('ui/maxFps', 0 if value <= 0 else max(5, min(240, value)))
+
+    def get_playback_speed(self) -> float:
+        value = self.settings.value('ui/playbackSpeed', 1.0, type=float)
+        return max(0.25, min(4.0, value))
+
+    def set_playback_speed(self, value: float) -> None:
+        self.settings.setValue('ui/playbackSpeed', max(0.25, min(4.0, float(value))))
+
     def get_lock_position(self) -> bool:
         return bool(self.settings.value('behavior/lockPosition', False, type=bool))
 
@@ -61,4 +155,17 @@ class SettingsHelper:
     def set_chat_name(self, name: str) -> None:
         self.settings.setValue('chat/name', name or 'DeskMate')
 
+    def get_idle_enabled(self) -> bool:
+        return bool(self.settings.value('behavior/idleEnabled', False, type=bool))
+
+    def set_idle_enabled(self, enabled: bool) -> None:
+        self.settings.setValue('behavior/idleEnabled', bool(enabled))
+
+    def flush(self) -> None:
+        self.settings.flush()
+
+    def get_cache_responses(self) -> bool:
+        return bool(self.settings.value('chat/cacheResponses', False, type=bool))
 
+    def set_cache_responses(self, enabled: bool) -> None:
+        self.settings.setValue('chat/cacheResponses', bool(enabled))
@@ -0,0 +1,194 @@
+import os
+import sys
+import json
+import math
+from PyQt5.QtCore import QRect, QPoint
+from PyQt5.QtGui import QImage, QImageReader, QImageWriter, QPainter
+
+# A sprite atlas is one PNG/WebP image holding every frame on a grid plus a
+# JSON manifest with each frame's rectangle and delay. It decodes with a
+# single image load, keeps full 8-bit alpha and true color, and frames are
+# cut out by sub-rect instead of LZW-decoding a GIF frame by frame.
+MANIFEST_FORMAT = 'virtualdeskmate-atlas'
+MANIFEST_VERSION = 1
+ATLAS_FORMAT = QImage.Format_ARGB32_Premultiplied
+DEFAULT_DELAY_MS = 100
+# WebP's largest image side; PNG atlases keep to it too
+MAX_ATLAS_SIDE = 16383
+
+# For file dialogs that pick a character animation
+FILE_FILTER = 'Animations (*.gif *.webp *.json);;GIF Files (*.gif);;Animated WebP (*.webp);;Sprite Atlases (*.json)'
+
+
+class AtlasError(ValueError):
+    pass
+
+
+def is_manifest(path: str) -> bool:
+    return bool(path) and path.lower().endswith('.json')
+
+
+def load_manifest(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise AtlasError(f'Cannot read atlas manifest {path}: {e}') from None
+    if not isinstance(manifest, dict) or manifest.get('format') != MANIFEST_FORMAT:
+        raise AtlasError(f'{path} is not a sprite atlas manifest')
+    if int(manifest.get('version', 0)) > MANIFEST_VERSION:
+        raise AtlasError(f'{path} needs a newer version (atlas v{manifest.get("version")})')
+    frames = manifest.get('frames')
+    if not isinstance(frames, list) or not frames or not manifest.get('image'):
+        raise AtlasError(f'{path} lists no frames')
+    try:
+        width = int(manifest['frame_width'])
+        height = int(manifest['frame_height'])
+        for frame in frames:
+            int(frame['x'])
+            int(frame['y'])
+    except (KeyError, TypeError, ValueError):
+        raise AtlasError(f'{path} has malformed frame entries') from None
+    if width <= 0 or height <= 0:
+        raise AtlasError(f'{path} has an empty frame size')
+    return manifest
+
+
+def image_path(manifest_path: str, manifest: dict) -> str:
+    # The image is named relative to the manifest
+    return os.path.join(os.path.dirname(os.path.abspath(manifest_path)), manifest['image'])
+
+
+def source_files(path: str):
+    # Files whose changes invalidate frames decoded from `path`
+    if not is_manifest(path):
+        return [path]
+    try:
+        return [path, image_path(path, load_manifest(path))]
+    except AtlasError:
+        return [path]
+
+
+def can_read(path: str) -> bool:
+    try:
+        manifest = load_manifest(path)
+    except AtlasError:
+        return False
+    return QImageReader(image_path(path, manifest)).canRead()
+
+
+def read_frames(path: str):
+    # Loads the atlas image once and yields (frame image, delay ms) for each
+    # frame, cut out by sub-rect
+    manifest = load_manifest(path)
+    reader = QImageReader(image_path(path, manifest))
+    atlas = reader.read()
+    if atlas.isNull():
+        raise AtlasError(f'Cannot decode atlas image for {path}: {reader.errorString()}')
+    atlas = atlas.convertToFormat(ATLAS_FORMAT)
+    width = int(manifest['frame_width'])
+    height = int(manifest['frame_height'])
+    bounds = atlas.rect()
+    for frame in manifest['frames']:
+        rect = QRect(int(frame['x']), int(frame['y']), int(frame.get('w', width)), int(frame.get('h', height)))
+        if not bounds.contains(rect):
+            raise AtlasError(f'Frame {rect} lies outside the {bounds.width()}x{bounds.height()} atlas')
+        image = atlas.copy(rect)
+        if (rect.width(), rect.height()) != (width, height):
+            image = image.scaled(width, height)
+        yield image, int(frame.get('delay', DEFAULT_DELAY_MS))
+
+
+def convert(source: str, output: str = None, columns: int = None) -> str:
+    # Turns any animation Qt can read (GIF, animated WebP) into an atlas.
+    # `output` names the image (.png or .webp, lossless); the manifest is
+    # written next to it with a .json suffix. Returns the manifest path.
+    reader = QImageReader(source)
+    reader.setAutoTransform(True)
+    if not reader.canRead():
+        raise AtlasError(f'Cannot decode {source}: {reader.errorString()}')
+    frames = []
+    delays = []
+    size = None
+    while True:
+        image = reader.read()
+        if image.isNull():
+            break
+        if size is None:
+            size = image.size()
+        elif image.size() != size:
+            image = image.scaled(size)
+        frames.append(image.convertToFormat(ATLAS_FORMAT))
+        delays.append(reader.nextImageDelay())
+        if not reader.supportsAnimation():
+            break
+    if not frames:
+        raise AtlasError(f'No frames in {source}')
+    w, h = size.width(), size.height()
+    if columns is None:
+        columns = max(1, math.ceil(math.sqrt(len(frames))))
+    columns = max(1, min(int(columns), len(frames), MAX_ATLAS_SIDE // w or 1))
+    rows = math.ceil(len(frames) / columns)
+    if rows * h > MAX_ATLAS_SIDE:
+        raise AtlasError(f'{len(frames)} frames of {w}x{h} do not fit in one atlas')
+
+    atlas = QImage(columns * w, rows * h, ATLAS_FORMAT)
+    atlas.fill(0)
+    painter = QPainter(atlas)
+    painter.setCompositionMode(QPainter.CompositionMode_Source)
+    entries = []
+    for i, (image, delay) in enumerate(zip(frames, delays)):
+        x, y = (i % columns) * w, (i // columns) * h
+        painter.drawImage(QPoint(x, y), image)
+        entries.append({'x': x, 'y': y, 'delay': delay if delay > 0 else DEFAULT_DELAY_MS})
+    painter.end()
+
+    if output is None:
+        output = os.path.splitext(source)[0] + '.atlas.png'
+    root, ext = os.path.splitext(output)
+    fmt = ext.lstrip('.').lower() or 'png'
+    if fmt not in ('png', 'webp'):
+        raise AtlasError('Atlas images must be .png or .webp')
+    writer = QImageWriter(output, fmt.encode('ascii'))
+    if fmt == 'webp':
+        # Quality 100 selects lossless WebP
+        writer.setQuality(100)
+    if not writer.write(atlas.convertToFormat(QImage.Format_ARGB32)):
+        raise AtlasError(f'Cannot write {output}: {writer.errorString()}')
+    manifest_path = root + '.json'
+    manifest = {
+        'format': MANIFEST_FORMAT,
+        'version': MANIFEST_VERSION,
+        'image': os.path.basename(output),
+        'frame_width': w,
+        'frame_height': h,
+        'loop_count': reader.loopCount(),
+        'frames': entries,
+    }
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    return manifest_path
+
+
+def main(argv=None) -> int:
+    # python sprite_atlas.py input.gif [output.png|output.webp] [--columns N]
+    argv = sys.argv[1:] if argv is None else argv
+    columns = None
+    if '--columns' in argv:
+        i = argv.index('--columns')
+        columns = int(argv[i + 1])
+        argv = argv[:i] + argv[i + 2:]
+    if not argv or len(argv) > 2:
+        print('usage: sprite_atlas.py input.gif [output.png|output.webp] [--columns N]', file=sys.stderr)
+        return 2
+    try:
+        manifest_path = convert(argv[0], argv[1] if len(argv) > 1 else None, columns)
+    except AtlasError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    print(manifest_path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
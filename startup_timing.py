@@ -0,0 +1,54 @@
+import time
+import logging
+
+# Imported first by main.py, so this is as close to process start as Python
+# code can measure.
+_origin = time.perf_counter()
+_phases = []
+_reported = False
+
+
+def mark(phase: str) -> float:
+    elapsed = (time.perf_counter() - _origin) * 1000.0
+    _phases.append((phase, elapsed))
+    return elapsed
+
+
+def phases():
+    return list(_phases)
+
+
+def report() -> None:
+    global _reported
+    if _reported:
+        return
+    _reported = True
+    parts = []
+    previous = 0.0
+    for phase, elapsed in _phases:
+        parts.append(f'{phase}={elapsed:.1f}ms (+{elapsed - previous:.1f})')
+        previous = elapsed
+    logging.info('Startup timing: %s', ', '.join(parts))
+    try:
+        from . import app_logging  # type: ignore
+    except Exception:
+        import app_logging  # type: ignore
+    app_logging.event('startup', phases={phase: round(elapsed, 1) for phase, elapsed in _phases},
+                      total_ms=round(previous, 1))
+
+
+def watch_first_paint(widget, phase: str = 'first_frame') -> None:
+    # Marks `phase` and logs the timing summary when `widget` first paints
+    from PyQt5.QtCore import QObject, QEvent
+
+    class _FirstPaintFilter(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                obj.removeEventFilter(self)
+                mark(phase)
+                report()
+                self.deleteLater()
+            return False
+
+    watcher = _FirstPaintFilter(widget)
+    widget.installEventFilter(watcher)
@@ -29,7 +29,8 @@ class WindowsStartupManager:
             path = WindowsStartupManager._get_executable_path()
             with winreg.OpenKey(winreg.HKEY_CURRENT_USER, WindowsStartupManager.REG_PATH, 0, winreg.KEY_SET_VALUE) as key:
                 if enabled:
-                    winreg.SetValueEx(key, WindowsStartupManager.APP_NAME, 0, winreg.REG_SZ, f'"{path}"')
+                    # Autostart goes straight to the character in the tray
+                    winreg.SetValueEx(key, WindowsStartupManager.APP_NAME, 0, winreg.REG_SZ, f'"{path}" --tray')
                 else:
                     try:
                         winreg.DeleteValue(key, WindowsStartupManager.APP_NAME)
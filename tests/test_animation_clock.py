@@ -0,0 +1,41 @@
+import unittest
+
+from PyQt5.QtCore import QCoreApplication
+
+from animation_clock import AnimationClock
+
+
+class AnimationClockTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def test_callback_cancelled_earlier_in_the_same_tick_does_not_run(self):
+        clock = AnimationClock()
+        calls = []
+        due = clock.now()
+        handles = {}
+
+        def first():
+            calls.append('first')
+            clock.cancel(handles['second'])
+
+        handles['first'] = clock.call_at(due, first)
+        handles['second'] = clock.call_at(due, lambda: calls.append('second'))
+        clock._tick()
+        self.assertEqual(calls, ['first'])
+        self.assertEqual(clock.pending(), 0)
+
+    def test_callbacks_due_together_run_in_one_tick(self):
+        clock = AnimationClock()
+        calls = []
+        due = clock.now()
+        for i in range(3):
+            clock.call_at(due, lambda i=i: calls.append(i))
+        clock._tick()
+        self.assertEqual(calls, [0, 1, 2])
+        self.assertEqual(clock.ticks, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
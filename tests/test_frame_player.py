@@ -0,0 +1,108 @@
+import unittest
+
+from frame_player import FramePlayer
+
+
+class FakeClock:
+    # Stands in for AnimationClock; tests move time and fire callbacks
+    def __init__(self):
+        self.time = 0
+        self.pending = {}
+        self._next = 1
+
+    def now(self) -> int:
+        return self.time
+
+    def call_later(self, delay_ms, callback):
+        handle = self._next
+        self._next += 1
+        self.pending[handle] = (self.time + delay_ms, callback)
+        return handle
+
+    def cancel(self, handle):
+        self.pending.pop(handle, None)
+
+    def advance(self, ms: int):
+        end = self.time + ms
+        while self.pending:
+            handle, (due, callback) = min(self.pending.items(), key=lambda item: item[1][0])
+            if due > end:
+                break
+            del self.pending[handle]
+            self.time = due
+            callback()
+        self.time = end
+
+
+class FakeSource:
+    def __init__(self, frames: int, delay: int = 100, loop_count: int = -1):
+        self.delays = [delay] * frames
+        self.loop_count = loop_count
+
+    def frame_count(self):
+        return len(self.delays)
+
+    def is_complete(self):
+        return True
+
+    def frame_delay(self, index):
+        return self.delays[index]
+
+    def frame_image(self, index):
+        return None
+
+
+def make_player(source):
+    player = FramePlayer()
+    player._clock = FakeClock()
+    frames = []
+    player.frameChanged.connect(frames.append)
+    player.set_source(source)
+    player.start()
+    return player, frames
+
+
+class FramePlayerLoopCountTest(unittest.TestCase):
+    def test_stops_on_last_frame_after_loop_count_repeats(self):
+        # As in QMovie: loop_count N means N + 1 plays in total
+        player, frames = make_player(FakeSource(3, loop_count=1))
+        player._clock.advance(10000)
+        self.assertEqual(frames, [0, 1, 2, 0, 1, 2])
+        self.assertTrue(player.is_finished())
+        self.assertEqual(player.current_frame(), 2)
+        self.assertFalse(player._clock.pending)
+
+    def test_zero_plays_once(self):
+        player, frames = make_player(FakeSource(3, loop_count=0))
+        player._clock.advance(10000)
+        self.assertEqual(frames, [0, 1, 2])
+        self.assertTrue(player.is_finished())
+
+    def test_minus_one_loops_forever(self):
+        player, frames = make_player(FakeSource(3, loop_count=-1))
+        player._clock.advance(3000)
+        self.assertEqual(len(frames), 31)
+        self.assertFalse(player.is_finished())
+        self.assertTrue(player._clock.pending)
+
+    def test_long_stall_past_the_limit_finishes(self):
+        player, frames = make_player(FakeSource(3, loop_count=1))
+        # The clock fires 5 s late, e.g. after the machine was suspended
+        player._clock.time += 5000
+        player._clock.advance(0)
+        self.assertTrue(player.is_finished())
+        self.assertEqual(player.current_frame(), 2)
+
+    def test_unpause_after_finishing_does_not_restart(self):
+        player, frames = make_player(FakeSource(2, loop_count=0))
+        player._clock.advance(1000)
+        player.set_paused(True)
+        player.set_paused(False)
+        self.assertFalse(player._clock.pending)
+        player.start()
+        self.assertFalse(player.is_finished())
+        self.assertEqual(player.current_frame(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import gzip
+import json
+import time
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from http_transport import ConnectionPool, HttpError, HttpTransport
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # A stand-in API: gzip JSON, a failing-then-healthy endpoint and a
+    # chunked, gzip-compressed event stream, all over HTTP/1.1 keep-alive
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        with self.server.lock:
+            self.server.requests += 1
+        if self.path == '/flaky':
+            with self.server.lock:
+                status = self.server.failures.pop(0) if self.server.failures else 200
+            if status != 200:
+                self._send(status, {'error': 'try again'}, {'Retry-After': '0'})
+                return
+        if self.path == '/stream':
+            self._stream(payload['lines'])
+            return
+        if self.path == '/endless':
+            self._endless()
+            return
+        self._send(200, {'echo': payload})
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        gzipped = 'gzip' in self.headers.get('Accept-Encoding', '')
+        if gzipped:
+            data = gzip.compress(data)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, lines):
+        data = gzip.compress('\n'.join(lines).encode('utf-8'))
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i in range(0, len(data), 7):
+            chunk = data[i:i + 7]
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+        self.wfile.write(b'0\r\n\r\n')
+
+    def _endless(self):
+        # Keeps sending events until the client goes away
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for i in range(2000):
+                chunk = f'data: {i}\n'.encode('utf-8')
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                self.wfile.flush()
+                time.sleep(0.005)
+        except OSError:
+            pass
+
+
+class HttpTransportTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.connections = 0
+        self.server.requests = 0
+        self.server.failures = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.pool = ConnectionPool()
+        self.transport = HttpTransport(2.0, 5.0, max_retries=3, backoff_base=0.01, pool=self.pool)
+
+    def tearDown(self):
+        self.pool.clear()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_keep_alive_reuses_one_connection(self):
+        for i in range(3):
+            resp = self.transport.post_json(self.base + '/echo', {'n': i})
+            self.assertEqual(resp.json(), {'echo': {'n': i}})
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.server.requests, 3)
+
+    def test_gzip_body_is_decoded(self):
+        resp = self.transport.post_json(self.base + '/echo', {'text': 'x' * 5000})
+        self.assertEqual(resp.headers.get('content-encoding'), 'gzip')
+        self.assertEqual(resp.json()['echo']['text'], 'x' * 5000)
+
+    def test_retries_429_and_5xx_then_succeeds(self):
+        self.server.failures = [429, 503]
+        resp = self.transport.post_json(self.base + '/flaky', {})
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(self.server.requests, 3)
+
+    def test_gives_up_after_max_retries(self):
+        self.server.failures = [503] * 10
+        with self.assertRaises(HttpError) as caught:
+            self.transport.post_json(self.base + '/flaky', {})
+        self.assertEqual(caught.exception.status, 503)
+        self.assertEqual(self.server.requests, 4)
+
+    def test_429_left_out_of_retry_statuses_is_raised(self):
+        transport = HttpTransport(2.0, 5.0, max_retries=3, pool=self.pool, retry_statuses=(500, 502, 503, 504))
+        self.server.failures = [429]
+        with self.assertRaises(HttpError) as caught:
+            transport.post_json(self.base + '/flaky', {})
+        self.assertEqual(caught.exception.status, 429)
+        self.assertEqual(caught.exception.headers.get('retry-after'), '0')
+        self.assertEqual(self.server.requests, 1)
+
+    def test_gzip_stream_yields_every_line(self):
+        lines = [f'data: {{"n": {i}}}' for i in range(50)] + ['data: [DONE]']
+        with self.transport.stream_json(self.base + '/stream', {'lines': lines}) as resp:
+            received = [line.decode('utf-8').rstrip('\n') for line in resp]
+        self.assertEqual(received, lines)
+        # The drained stream leaves its connection reusable
+        self.transport.post_json(self.base + '/echo', {})
+        self.assertEqual(self.server.connections, 1)
+
+    def test_abandoned_stream_is_closed_not_drained(self):
+        resp = self.transport.stream_json(self.base + '/endless', {})
+        self.assertEqual(next(iter(resp)), b'data: 0\n')
+        started = time.perf_counter()
+        resp.close()
+        self.assertLess(time.perf_counter() - started, 0.1)
+        self.transport.post_json(self.base + '/echo', {})
+        self.assertEqual(self.server.connections, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
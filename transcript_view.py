@@ -0,0 +1,378 @@
+from bisect import bisect_right
+from collections import OrderedDict
+from PyQt5.QtWidgets import QAbstractScrollArea, QStyledItemDelegate, QStyleOptionViewItem, QStyle, QApplication
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QSize, QPointF, QRect, QRectF
+from PyQt5.QtGui import QTextLayout, QTextCharFormat, QFont, QPainter, QPalette, QKeySequence
+
+
+class TranscriptMessage:
+    __slots__ = ('label', 'text', 'revision', 'height', 'height_key')
+
+    def __init__(self, label: str, text: str = ''):
+        self.label = label
+        self.text = text
+        self.revision = 0
+        # Cached layout height for (width, revision)
+        self.height = 0
+        self.height_key = None
+
+    def display_text(self) -> str:
+        return f'{self.label}: {self.text}' if self.label else self.text
+
+
+class TranscriptModel(QAbstractListModel):
+    # Flat list of chat lines for the transcript view. Only the newest
+    # MAX_MESSAGES are kept; older ones are dropped in batches so trimming
+    # stays amortized O(1) per append. The conversation sent to the model
+    # lives in ChatWindow.messages, so this is display state only.
+    MessageRole = Qt.UserRole + 1
+
+    MAX_MESSAGES = 500
+    TRIM_BATCH = 50
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._messages = []
+        self.trimmed = 0
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._messages)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        message = self._messages[index.row()]
+        if role == Qt.DisplayRole:
+            return message.display_text()
+        if role == self.MessageRole:
+            return message
+        return None
+
+    def message(self, row: int) -> TranscriptMessage:
+        return self._messages[row]
+
+    def append_message(self, label: str, text: str = '') -> int:
+        if len(self._messages) >= self.MAX_MESSAGES:
+            self._trim(self.TRIM_BATCH)
+        row = len(self._messages)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._messages.append(TranscriptMessage(label, text))
+        self.endInsertRows()
+        return row
+
+    def append_text(self, text: str) -> None:
+        # Extend the newest message (used while a reply is being typed)
+        if not self._messages or not text:
+            return
+        message = self._messages[-1]
+        message.text += text
+        message.revision += 1
+        index = self.index(len(self._messages) - 1)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole])
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._messages = []
+        self.endResetModel()
+
+    def _trim(self, count: int):
+        count = min(count, len(self._messages))
+        self.beginRemoveRows(QModelIndex(), 0, count - 1)
+        del self._messages[:count]
+        self.endRemoveRows()
+        self.trimmed += count
+
+
+class TranscriptDelegate(QStyledItemDelegate):
+    # Lays out one message with QTextLayout (bold speaker label, word wrap),
+    # one layout per paragraph. A reply being typed only grows its last
+    # paragraph, so earlier paragraphs are never laid out again. Heights are
+    # cached on the message per (width, revision); layouts are kept for
+    # recently used messages only.
+    PADDING = 4
+    SPACING = 8
+    LAYOUT_CACHE = 128
+
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+        # id(message) -> (message, width, font key, [(paragraph, layout), ...])
+        self._layouts = OrderedDict()
+
+    def _text_width(self) -> int:
+        return max(40, self.view.viewport().width() - 2 * self.PADDING)
+
+    def _layout_paragraph(self, text, font, width, bold_chars=0):
+        layout = QTextLayout(text, font)
+        if bold_chars:
+            bold = QTextCharFormat()
+            bold.setFontWeight(QFont.Bold)
+            fmt = QTextLayout.FormatRange()
+            fmt.start = 0
+            fmt.length = bold_chars
+            fmt.format = bold
+            layout.setFormats([fmt])
+        layout.beginLayout()
+        y = 0.0
+        while True:
+            line = layout.createLine()
+            if not line.isValid():
+                break
+            line.setLineWidth(width)
+            line.setPosition(QPointF(0, y))
+            y += line.height()
+        layout.endLayout()
+        return layout
+
+    def _layouts_for(self, message, font, width):
+        key = id(message)
+        font_key = font.key()
+        entry = self._layouts.get(key)
+        if entry is None or entry[0] is not message or entry[1] != width or entry[2] != font_key:
+            entry = (message, width, font_key, [])
+            self._layouts[key] = entry
+            while len(self._layouts) > self.LAYOUT_CACHE:
+                self._layouts.popitem(last=False)
+        else:
+            self._layouts.move_to_end(key)
+        cached = entry[3]
+        prefix = f'{message.label}: ' if message.label else ''
+        paragraphs = (prefix + message.text).split('\n')
+        for i, text in enumerate(paragraphs):
+            if i < len(cached) and cached[i][0] == text:
+                continue
+            bold = len(prefix) - 1 if i == 0 and prefix else 0
+            layout = self._layout_paragraph(text, font, width, bold)
+            if i < len(cached):
+                cached[i] = (text, layout)
+            else:
+                cached.append((text, layout))
+        del cached[len(paragraphs):]
+        return [layout for _, layout in cached]
+
+    def _height(self, message, font, width) -> int:
+        key = (width, message.revision)
+        if message.height_key != key:
+            total = sum(layout.boundingRect().height() for layout in self._layouts_for(message, font, width))
+            message.height = int(total + 0.999) + 2 * self.PADDING + self.SPACING
+            message.height_key = key
+        return message.height
+
+    def sizeHint(self, option, index):
+        message = index.model().message(index.row())
+        width = self._text_width()
+        return QSize(width, self._height(message, option.font, width))
+
+    def paint(self, painter, option, index):
+        message = index.model().message(index.row())
+        width = self._text_width()
+        painter.save()
+        if option.state & QStyle.State_Selected:
+            highlight = option.palette.color(QPalette.Highlight)
+            highlight.setAlpha(70)
+            painter.fillRect(option.rect, highlight)
+        painter.setPen(option.palette.color(QPalette.Text))
+        x = option.rect.left() + self.PADDING
+        y = option.rect.top() + self.PADDING
+        for layout in self._layouts_for(message, option.font, width):
+            layout.draw(painter, QPointF(x, y))
+            y += layout.boundingRect().height()
+        painter.restore()
+
+
+class TranscriptView(QAbstractScrollArea):
+    # Virtualized chat transcript. Row offsets are kept as a running total,
+    # so appending a message or typing into the newest one is O(1), and
+    # painting only lays out the rows that intersect the viewport.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.transcript = TranscriptModel(self)
+        self.delegate = TranscriptDelegate(self)
+        # _tops[i] is the top of row i relative to _origin; _bottom is the end
+        self._tops = []
+        self._bottom = 0
+        self._origin = 0
+        self._width = 0
+        self._placeholder = ''
+        self._follow = True
+        self._anchor = -1
+        self._current = -1
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setFocusPolicy(Qt.ClickFocus)
+        self.verticalScrollBar().setSingleStep(24)
+        self.verticalScrollBar().valueChanged.connect(self._on_scrolled)
+        self.transcript.rowsInserted.connect(self._on_rows_inserted)
+        self.transcript.rowsRemoved.connect(self._on_rows_removed)
+        self.transcript.dataChanged.connect(self._on_data_changed)
+        self.transcript.modelReset.connect(self._relayout)
+
+    def setPlaceholderText(self, text: str) -> None:
+        self._placeholder = text
+        self.viewport().update()
+
+    def add_message(self, label: str, text: str = '') -> None:
+        self.transcript.append_message(label, text)
+
+    def append_text(self, text: str) -> None:
+        self.transcript.append_text(text)
+
+    def row_count(self) -> int:
+        return len(self._tops)
+
+    def _option(self):
+        option = QStyleOptionViewItem()
+        option.initFrom(self.viewport())
+        option.font = self.font()
+        return option
+
+    def _row_height(self, row: int, option=None) -> int:
+        return self.delegate.sizeHint(option or self._option(), self.transcript.index(row)).height()
+
+    def _row_top(self, row: int) -> int:
+        return self._tops[row] - self._origin
+
+    def _row_bottom(self, row: int) -> int:
+        return (self._tops[row + 1] if row + 1 < len(self._tops) else self._bottom) - self._origin
+
+    def _content_height(self) -> int:
+        return self._bottom - self._origin
+
+    def _on_rows_inserted(self, parent, first: int, last: int):
+        if first != len(self._tops):
+            self._relayout()
+            return
+        option = self._option()
+        for row in range(first, last + 1):
+            self._tops.append(self._bottom)
+            self._bottom += self._row_height(row, option)
+        self._content_changed()
+
+    def _on_rows_removed(self, parent, first: int, last: int):
+        if first != 0:
+            self._relayout()
+            return
+        count = last + 1
+        removed = (self._tops[count] if count < len(self._tops) else self._bottom) - self._tops[0]
+        del self._tops[:count]
+        self._origin += removed
+        self._anchor = max(-1, self._anchor - count)
+        self._current = max(-1, self._current - count)
+        if not self._follow:
+            # Keep the rows being read in place
+            bar = self.verticalScrollBar()
+            bar.blockSignals(True)
+            bar.setValue(max(0, bar.value() - removed))
+            bar.blockSignals(False)
+        self._content_changed()
+
+    def _on_data_changed(self, top_left, bottom_right, roles=()):
+        option = self._option()
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            diff = self._row_height(row, option) - (self._row_bottom(row) - self._row_top(row))
+            if not diff:
+                continue
+            # Only rows below a resized one move; while typing that is none
+            for later in range(row + 1, len(self._tops)):
+                self._tops[later] += diff
+            self._bottom += diff
+        self._content_changed()
+
+    def _relayout(self):
+        # Full pass; only needed when the width changes or the model resets
+        option = self._option()
+        self._tops = []
+        self._origin = 0
+        self._bottom = 0
+        for row in range(self.transcript.rowCount()):
+            self._tops.append(self._bottom)
+            self._bottom += self._row_height(row, option)
+        self._content_changed()
+
+    def _content_changed(self):
+        bar = self.verticalScrollBar()
+        page = self.viewport().height()
+        bar.setPageStep(page)
+        bar.setRange(0, max(0, self._content_height() - page))
+        if self._follow:
+            bar.setValue(bar.maximum())
+        self.viewport().update()
+
+    def _on_scrolled(self, value: int):
+        # Stick to the bottom unless the user has scrolled up to read
+        self._follow = value >= self.verticalScrollBar().maximum() - 4
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.viewport().width() != self._width:
+            self._width = self.viewport().width()
+            self._relayout()
+        else:
+            self._content_changed()
+
+    def _row_at(self, y: int) -> int:
+        if not self._tops:
+            return -1
+        y += self.verticalScrollBar().value() + self._origin
+        row = bisect_right(self._tops, y) - 1
+        if row < 0 or y >= self._bottom:
+            return -1
+        return row
+
+    def _selected_rows(self):
+        if self._anchor < 0 or self._current < 0:
+            return range(0)
+        return range(min(self._anchor, self._current), max(self._anchor, self._current) + 1)
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        rect = self.viewport().rect()
+        if not self._tops:
+            if self._placeholder:
+                color = self.palette().color(QPalette.Text)
+                color.setAlpha(110)
+                painter.setPen(color)
+                painter.drawText(QRectF(rect).adjusted(6, 6, -6, -6), Qt.AlignLeft | Qt.AlignTop, self._placeholder)
+            return
+        offset = self.verticalScrollBar().value()
+        option = self._option()
+        selected = self._selected_rows()
+        row = max(0, self._row_at(event.rect().top()))
+        while row < len(self._tops):
+            top = self._row_top(row) - offset
+            if top > event.rect().bottom():
+                break
+            option.rect = QRect(0, top, rect.width(), self._row_bottom(row) - self._row_top(row))
+            option.state = QStyle.State_Enabled | (QStyle.State_Selected if row in selected else QStyle.State_None)
+            self.delegate.paint(painter, option, self.transcript.index(row))
+            row += 1
+
+    def mousePressEvent(self, event):
+        row = self._row_at(event.pos().y())
+        if event.button() == Qt.LeftButton:
+            if row >= 0 and event.modifiers() & Qt.ShiftModifier and self._anchor >= 0:
+                self._current = row
+            else:
+                self._anchor = self._current = row
+            self.viewport().update()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton and self._anchor >= 0:
+            row = self._row_at(event.pos().y())
+            if row >= 0 and row != self._current:
+                self._current = row
+                self.viewport().update()
+        super().mouseMoveEvent(event)
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy):
+            text = '\n'.join(self.transcript.message(r).display_text() for r in self._selected_rows())
+            if text:
+                QApplication.clipboard().setText(text)
+            return
+        if event.matches(QKeySequence.SelectAll) and self._tops:
+            self._anchor, self._current = 0, len(self._tops) - 1
+            self.viewport().update()
+            return
+        super().keyPressEvent(event)
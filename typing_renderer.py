@@ -0,0 +1,112 @@
+import math
+import time
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+
+class TypingRenderer(QObject):
+    # Reveals assistant text in a TranscriptView in per-frame batches. Each
+    # tick appends as many characters as fit in the frame budget (measured
+    # from the cost of previous appends), so long replies no longer cost one
+    # relayout per character.
+    finished = pyqtSignal()
+
+    FRAME_MS = 16
+    BUDGET_MS = 4.0
+    TARGET_DURATION_MS = 1500
+    MIN_CHUNK = 3
+
+    def __init__(self, view, parent=None):
+        super().__init__(parent)
+        self.view = view
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.FRAME_MS)
+        self._timer.timeout.connect(self._on_tick)
+        self._pending = ''
+        self._paced = False
+        self._pace_chunk = self.MIN_CHUNK
+        self._closed = True
+        self._active = False
+        # Smoothed cost of inserting one character, in milliseconds
+        self._ms_per_char = 0.01
+        self.stats = {'ticks': 0, 'chars': 0, 'busy_ms': 0.0, 'worst_tick_ms': 0.0}
+
+    def is_active(self) -> bool:
+        return self._active
+
+    def begin(self, paced: bool = False) -> None:
+        # paced=True spreads a complete reply over about TARGET_DURATION_MS;
+        # otherwise fed text (e.g. streamed deltas) is shown on the next frame.
+        self.finish()
+        self._pending = ''
+        self._paced = paced
+        self._pace_chunk = self.MIN_CHUNK
+        self._closed = False
+        self._active = True
+
+    def feed(self, text: str) -> None:
+        if not self._active or not text:
+            return
+        self._pending += text.replace('\r', '')
+        if self._paced:
+            frames = max(1, self.TARGET_DURATION_MS // self.FRAME_MS)
+            self._pace_chunk = max(self.MIN_CHUNK, math.ceil(len(self._pending) / frames))
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def close(self) -> None:
+        # No more text will be fed; `finished` fires once the buffer drains
+        if not self._active:
+            return
+        self._closed = True
+        if not self._pending:
+            self._complete()
+        elif not self._timer.isActive():
+            self._timer.start()
+
+    def finish(self) -> None:
+        # Skip to the end immediately
+        if not self._active:
+            return
+        if self._pending:
+            self._insert(self._pending)
+            self._pending = ''
+        self._complete()
+
+    def _complete(self):
+        self._timer.stop()
+        self._active = False
+        self._closed = True
+        self.finished.emit()
+
+    def _chunk_size(self) -> int:
+        budget_chars = max(self.MIN_CHUNK, int(self.BUDGET_MS / max(self._ms_per_char, 1e-4)))
+        wanted = self._pace_chunk if self._paced else len(self._pending)
+        return max(1, min(wanted, budget_chars))
+
+    def _on_tick(self):
+        if not self._pending:
+            self._timer.stop()
+            if self._closed:
+                self._complete()
+            return
+        if not self.view.isVisible():
+            # Nobody is watching; don't spend frames on the animation
+            self._insert(self._pending)
+            self._pending = ''
+        else:
+            n = self._chunk_size()
+            chunk, self._pending = self._pending[:n], self._pending[n:]
+            self._insert(chunk)
+        if not self._pending and self._closed:
+            self._complete()
+
+    def _insert(self, text: str):
+        started = time.perf_counter()
+        self.view.append_text(text)
+        elapsed = (time.perf_counter() - started) * 1000.0
+        per_char = elapsed / max(1, len(text))
+        self._ms_per_char = 0.7 * self._ms_per_char + 0.3 * per_char
+        self.stats['ticks'] += 1
+        self.stats['chars'] += len(text)
+        self.stats['busy_ms'] += elapsed
+        self.stats['worst_tick_ms'] = max(self.stats['worst_tick_ms'], elapsed)
@@ -2,11 +2,15 @@ import sys
 import os
 import logging
 import json
-from urllib import request, error
+import threading
 try:
-    from openai import OpenAI  # type: ignore
+    from .http_transport import HttpTransport, HttpError, RETRY_STATUSES, retry_after_seconds  # type: ignore
+    from .request_scheduler import RateLimited  # type: ignore
+    from . import app_logging  # type: ignore
 except Exception:
-    OpenAI = None  # type: ignore
+    from http_transport import HttpTransport, HttpError, RETRY_STATUSES, retry_after_seconds  # type: ignore
+    from request_scheduler import RateLimited  # type: ignore
+    import app_logging  # type: ignore
 
 
 def resource_path(relative_path: str) -> str:
@@ -17,51 +21,195 @@ def resource_path(relative_path: str) -> str:
     return os.path.join(base_path, relative_path)
 
 
+_openai_class = False
+
+
+def load_openai():
+    # The SDK (with httpx/pydantic) is slow to import, so it is only loaded
+    # when the first ChatClient is created. Returns None if not installed.
+    global _openai_class
+    if _openai_class is False:
+        try:
+            from openai import OpenAI  # type: ignore
+            _openai_class = OpenAI
+        except Exception:
+            _openai_class = None
+    return _openai_class
+
+
+_sdk_clients = {}
+_sdk_clients_lock = threading.Lock()
+
+
+def shared_sdk_client(OpenAI, **kwargs):
+    # One SDK client (and so one httpx connection pool) per configuration,
+    # shared by every ChatClient in the process
+    key = tuple(sorted((k, repr(v)) for k, v in kwargs.items()))
+    with _sdk_clients_lock:
+        client = _sdk_clients.get(key)
+        if client is None:
+            client = _sdk_clients[key] = OpenAI(**kwargs)
+        return client
+
+
+def _defer_rate_limits(response) -> None:
+    # httpx response hook. The SDK does not retry a response marked
+    # x-should-retry: false, so 429s go straight to the RequestScheduler
+    # while 5xx, timeouts and connection errors keep the SDK's own retries.
+    if response.status_code == 429:
+        response.headers['x-should-retry'] = 'false'
+
+
+_scheduled_http_client = None
+
+
+def scheduled_http_client():
+    # One httpx client (with the hook above) for every scheduled SDK client
+    global _scheduled_http_client
+    with _sdk_clients_lock:
+        if _scheduled_http_client is None:
+            try:
+                from openai import DefaultHttpxClient as client_class  # type: ignore
+            except ImportError:
+                from httpx import Client as client_class  # type: ignore
+            _scheduled_http_client = client_class(event_hooks={'response': [_defer_rate_limits]})
+        return _scheduled_http_client
+
+
+def app_data_dir(*parts: str) -> str:
+    appdata = os.getenv('APPDATA') or os.path.expanduser('~')
+    return os.path.join(appdata, 'VirtualDeskmate', *parts)
+
+
 def setup_logging() -> None:
+    # Background-written, rotating app.log plus the events.jsonl timing
+    # stream (see app_logging)
     try:
-        appdata = os.getenv('APPDATA') or os.path.expanduser('~')
-        log_dir = os.path.join(appdata, 'VirtualDeskmate', 'logs')
-        os.makedirs(log_dir, exist_ok=True)
-        log_file = os.path.join(log_dir, 'app.log')
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s [%(levelname)s] %(message)s',
-            handlers=[
-                logging.FileHandler(log_file, encoding='utf-8'),
-                logging.StreamHandler(sys.stdout)
-            ]
-        )
+        app_logging.configure(app_data_dir('logs'))
         logging.info('Logging initialized')
     except Exception as e:
         logging.basicConfig(level=logging.INFO)
         logging.warning('Logging setup failed: %s', e)
 
 
-
 class ChatClient:
-    def __init__(self, api_key: str, model: str = 'gpt-4o-mini', base_url: str = None):
+    def __init__(self, api_key: str, model: str = 'gpt-4o-mini', base_url: str = None,
+                 connect_timeout: float = 10.0, read_timeout: float = 60.0, max_retries: int = 3,
+                 cache=None, scheduler=None):
         self.api_key = api_key
         self.model = model
         self.base_url = base_url
+        self.temperature = 0.7
+        # Optional ResponseCache; identical payloads are answered locally
+        self.cache = cache
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        # Optional RequestScheduler; it sees every response's rate-limit
+        # headers and handles 429s (raised as RateLimited) for all clients
+        self.scheduler = scheduler
         if not self.api_key:
             raise ValueError('OpenAI API key is missing')
         # If SDK available, initialize it; otherwise use HTTP fallback
         self.client = None
+        self.transport = None
+        OpenAI = load_openai()
         if OpenAI is not None:
-            kwargs = {'api_key': self.api_key}
+            kwargs = {'api_key': self.api_key, 'max_retries': max_retries}
+            if scheduler is not None:
+                # 429s are retried by the scheduler (after the shared
+                # retry-after hold), not inside the SDK
+                kwargs['http_client'] = scheduled_http_client()
+            try:
+                import httpx  # type: ignore
+                kwargs['timeout'] = httpx.Timeout(read_timeout, connect=connect_timeout)
+            except Exception:
+                kwargs['timeout'] = read_timeout
             if self.base_url:
                 kwargs['base_url'] = self.base_url.rstrip('/')
-            self.client = OpenAI(**kwargs)  # type: ignore[arg-type]
+            self.client = shared_sdk_client(OpenAI, **kwargs)
+        else:
+            retry_statuses = tuple(s for s in RETRY_STATUSES if s != 429) if scheduler is not None else RETRY_STATUSES
+            self.transport = HttpTransport(connect_timeout, read_timeout, max_retries, retry_statuses=retry_statuses)
 
-    def chat(self, messages):
+    def _payload(self, messages, stream: bool = False) -> dict:
+        payload = {
+            'model': self.model,
+            'messages': messages,
+            'temperature': self.temperature
+        }
+        if stream:
+            payload['stream'] = True
+        return payload
+
+    def _http_url(self) -> str:
+        base = (self.base_url or 'https://api.openai.com').rstrip('/')
+        return f"{base}/v1/chat/completions"
+
+    def _http_headers(self, stream: bool = False) -> dict:
+        headers = {'Authorization': f'Bearer {self.api_key}'}
+        if stream:
+            headers['Accept'] = 'text/event-stream'
+        return headers
+
+    def _observe(self, headers) -> None:
+        if self.scheduler is not None and headers:
+            self.scheduler.observe(headers)
+
+    def _api_error(self, e, via: str):
+        # Rate-limit refusals go back to the scheduler to be retried
+        response = getattr(e, 'response', None)
+        headers = getattr(e, 'headers', None) or getattr(response, 'headers', None) or {}
+        status = getattr(e, 'status', None) or getattr(e, 'status_code', None)
+        if status == 429 and self.scheduler is not None:
+            return RateLimited(f'Rate limited by the API: {e}', retry_after_seconds(headers), headers)
+        self._observe(headers)
+        if isinstance(e, HttpError):
+            return RuntimeError(str(e))
+        return RuntimeError(f'Failed to call OpenAI API ({via}): {e}')
+
+    def _sdk_create(self, payload):
+        raw = self.client.chat.completions.with_raw_response.create(**payload)  # type: ignore[attr-defined]
+        self._observe(raw.headers)
+        return raw.parse()
+
+    def _cache_key(self, messages, use_cache: bool):
+        if self.cache is None or not use_cache:
+            return None
+        return self.cache.make_key(self.base_url, self.model, messages, self.temperature)
+
+    def chat(self, messages, use_cache: bool = True):
+        key = self._cache_key(messages, use_cache)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        content = self._chat(messages)
+        if key is not None:
+            self.cache.put(key, content)
+        return content
+
+    def chat_stream(self, messages, use_cache: bool = True):
+        # Yields content deltas as they arrive. Closing the generator early
+        # closes the underlying response. A cache hit arrives as one delta;
+        # only streams that run to completion are cached.
+        key = self._cache_key(messages, use_cache)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        parts = []
+        for delta in self._chat_stream(messages):
+            parts.append(delta)
+            yield delta
+        if key is not None:
+            self.cache.put(key, ''.join(parts))
+
+    def _chat(self, messages):
         # Prefer SDK when available; otherwise POST directly
         if self.client is not None:
             try:
-                result = self.client.chat.completions.create(  # type: ignore[attr-defined]
-                    model=self.model,
-                    messages=messages,
-                    temperature=0.7
-                )
+                result = self._sdk_create(self._payload(messages))
                 if not result or not getattr(result, 'choices', None):
                     raise RuntimeError(f'Unexpected API response: {result}')
                 message = result.choices[0].message
@@ -70,27 +218,76 @@ class ChatClient:
                     raise RuntimeError('No content in assistant message')
                 return content
             except Exception as e:
-                raise RuntimeError(f'Failed to call OpenAI API (SDK): {e}')
+                raise self._api_error(e, 'SDK')
         else:
             # HTTP fallback (compatible with /v1)
-            base = (self.base_url or 'https://api.openai.com').rstrip('/')
-            url = f"{base}/v1/chat/completions"
-            payload = {
-                'model': self.model,
-                'messages': messages,
-                'temperature': 0.7
-            }
-            data = json.dumps(payload).encode('utf-8')
-            req = request.Request(url, data=data, method='POST')
-            req.add_header('Content-Type', 'application/json')
-            req.add_header('Authorization', f'Bearer {self.api_key}')
             try:
-                with request.urlopen(req, timeout=60) as resp:
-                    body = resp.read()
-                    parsed = json.loads(body.decode('utf-8'))
-                    return parsed['choices'][0]['message']['content']
-            except error.HTTPError as e:
-                detail = e.read().decode('utf-8', errors='ignore')
-                raise RuntimeError(f"API error {e.code}: {detail}")
+                resp = self.transport.post_json(self._http_url(), self._payload(messages), self._http_headers())
+                self._observe(resp.headers)
+                parsed = resp.json()
+                return parsed['choices'][0]['message']['content']
+            except Exception as e:
+                raise self._api_error(e, 'HTTP')
+
+    def _chat_stream(self, messages):
+        if self.client is not None:
+            try:
+                stream = self._sdk_create(self._payload(messages, stream=True))
+            except Exception as e:
+                raise self._api_error(e, 'SDK')
+            try:
+                for chunk in stream:
+                    choices = getattr(chunk, 'choices', None)
+                    if not choices:
+                        continue
+                    delta = getattr(choices[0].delta, 'content', None)
+                    if delta:
+                        yield delta
+            except GeneratorExit:
+                raise
             except Exception as e:
-                raise RuntimeError(f"Failed to call OpenAI API (HTTP): {e}")
\ No newline at end of file
+                raise self._api_error(e, 'SDK')
+            finally:
+                close = getattr(stream, 'close', None)
+                if close is not None:
+                    close()
+        else:
+            try:
+                resp = self.transport.stream_json(self._http_url(), self._payload(messages, stream=True), self._http_headers(stream=True))
+            except Exception as e:
+                raise self._api_error(e, 'HTTP')
+            self._observe(resp.headers)
+            with resp:
+                try:
+                    lines = iter(resp)
+                    for delta in iter_sse_deltas(lines):
+                        yield delta
+                    # Past [DONE] only the end of the body is left; reading
+                    # it lets the connection go back to the pool
+                    for _ in lines:
+                        pass
+                except GeneratorExit:
+                    raise
+                except Exception as e:
+                    raise RuntimeError(f"Failed to call OpenAI API (HTTP): {e}")
+
+
+def iter_sse_deltas(lines):
+    # Parses an OpenAI-style server-sent event stream of chat completion chunks
+    for raw in lines:
+        line = raw.decode('utf-8', errors='ignore').strip() if isinstance(raw, bytes) else raw.strip()
+        if not line.startswith('data:'):
+            continue
+        data = line[5:].strip()
+        if data == '[DONE]':
+            return
+        try:
+            parsed = json.loads(data)
+        except ValueError:
+            continue
+        if 'error' in parsed:
+            raise RuntimeError(f"API error: {parsed['error']}")
+        for choice in parsed.get('choices') or []:
+            delta = (choice.get('delta') or {}).get('content')
+            if delta:
+                yield delta